@@ -1,119 +1,22 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import requests
-from bs4 import BeautifulSoup
-import time
-import random
 from datetime import datetime
-import io
 import matplotlib.font_manager as fm
-import matplotlib
-import platform
-import os
 import warnings
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from ssq import (
+    PERIOD_OPTIONS, HISTORY_COLUMNS, Dataset, DatasetHolder, DrawRefresher,
+    filter_history, analytics_cache, chart_cache, export_cache,
+)
+from ssq import (
+    analytics, bundle, chart_specs, combination_filter, config, games, jobs, memory, positional, profiling, storage,
+    transitions, validation, views,
+)
+from ssq.charts import ensure_matplotlib_chinese
 warnings.filterwarnings('ignore')
 
 # ============= 全面解决matplotlib中文显示问题 =============
-def setup_matplotlib_chinese():
-    """配置matplotlib支持中文显示（参考SmartClean方案）"""
-    
-    # 1. 设置seaborn样式（seaborn会自动配置更好的字体）
-    sns.set_style("whitegrid")
-    sns.set_context("notebook", font_scale=1.1)
-    
-    # 2. 根据操作系统设置字体优先级
-    system = platform.system()
-    
-    if system == 'Windows':
-        font_priorities = [
-            'Microsoft YaHei',      # 微软雅黑
-            'SimHei',              # 黑体
-            'SimSun',              # 宋体
-            'FangSong',            # 仿宋
-            'KaiTi',              # 楷体
-            'Arial Unicode MS'
-        ]
-    elif system == 'Darwin':  # macOS
-        font_priorities = [
-            'PingFang SC',         # 苹方
-            'Heiti SC',            # 黑体-简
-            'STHeiti',            # 华文黑体
-            'Apple LiGothic',     # 苹果俪中黑
-            'Arial Unicode MS'
-        ]
-    else:  # Linux
-        font_priorities = [
-            'WenQuanYi Micro Hei', # 文泉驿微米黑
-            'WenQuanYi Zen Hei',   # 文泉驿正黑
-            'Noto Sans CJK SC',    # 思源黑体
-            'Noto Sans CJK JP',
-            'Droid Sans Fallback'
-        ]
-    
-    # 3. 添加通用后备字体
-    font_priorities.extend(['DejaVu Sans', 'Arial', 'Tahoma'])
-    
-    # 4. 尝试注册系统字体
-    font_dirs = []
-    if system == 'Windows':
-        font_dirs = ['C:/Windows/Fonts', 'C:/WINNT/Fonts']
-    elif system == 'Darwin':
-        font_dirs = ['/System/Library/Fonts', '/Library/Fonts', os.path.expanduser('~/Library/Fonts')]
-    else:
-        font_dirs = ['/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts')]
-    
-    # 注册找到的字体
-    registered_fonts = []
-    for font_dir in font_dirs:
-        if os.path.exists(font_dir):
-            try:
-                fm.fontManager.addfont(font_dir)
-            except:
-                pass
-    
-    # 5. 测试每个字体，使用第一个可用的
-    for font in font_priorities:
-        try:
-            # 设置字体
-            plt.rcParams['font.sans-serif'] = [font] + ['DejaVu Sans']
-            plt.rcParams['axes.unicode_minus'] = False
-            
-            # 测试字体是否可用
-            fig, ax = plt.subplots(figsize=(2, 1))
-            ax.set_title('测试中文')
-            ax.set_xlabel('测试X轴')
-            ax.set_ylabel('测试Y轴')
-            plt.close(fig)
-            
-            print(f"✅ 成功加载中文字体: {font}")
-            return True
-        except Exception as e:
-            continue
-    
-    # 6. 如果都失败，使用DejaVu Sans（纯英文）
-    print("⚠️ 未找到中文字体，图表将使用英文显示")
-    plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
-    plt.rcParams['axes.unicode_minus'] = False
-    return False
-
-# 执行初始化
-setup_matplotlib_chinese()
-
-def create_fig_ax(figsize=(12, 6)):
-    """创建图表和轴对象，确保中文显示正常"""
-    fig, ax = plt.subplots(figsize=figsize)
-    
-    # 重新应用seaborn样式
-    sns.set_style("whitegrid")
-    
-    # 重新设置字体
-    setup_matplotlib_chinese()
-    
-    return fig, ax
-
+# 字体在profiler安装后初始化（每个进程只探测一次字体），见下方
 # 强制刷新字体缓存
 try:
     fm._rebuild()
@@ -214,6 +117,97 @@ footer = """
     </div>
 """
 
+# 性能调试：记录本次重跑各阶段的耗时与内存（未开启时为空操作）
+profiler = profiling.RerunProfiler(enabled=config.PROFILE, track_memory=config.PROFILE_MEMORY)
+profiling.install(profiler)
+
+# 中文字体探测只在进程的第一次重跑中执行，耗时记录为font_setup阶段
+ensure_matplotlib_chinese()
+
+# 本次重跑交给Streamlit显示的图表与导出文件的字节数（会话的下一次重跑前一直由Streamlit持有）
+session_media = {'charts': 0, 'exports': 0}
+
+def show_chart(name, build, *params):
+    """按配置的后端显示图表；图表规格与渲染结果按数据版本、数据范围和参数缓存"""
+    key = (name,) + range_key + params
+    with profiler.stage(f'{name}.compute'):
+        spec = views.chart_spec(dataset, key, lambda: build(chart_data, *params))
+    with profiler.stage(f'{name}.render'):
+        output = views.chart_output(dataset, key, spec)
+    session_media['charts'] += memory.sizeof(output)
+    with profiler.stage(f'{name}.display'):
+        if config.CHART_BACKEND == 'vega-lite':
+            st.vega_lite_chart(output, use_container_width=True)
+        else:
+            st.image(output, use_column_width=True)
+
+# 显著性检验中与红球、蓝球页面相关的分布
+SIGNIFICANCE_TESTS = {
+    'red': ['红球号码频率', '红球区间分布', '红球奇偶比分布', '红球大小比分布'],
+    'blue': ['蓝球号码频率', '蓝球奇偶分布', '蓝球大小分布'],
+}
+
+def session_owner():
+    """当前会话的标识，用于后台任务的共享与取消"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+def cancel_job(job, toggle_key):
+    """本会话不再等待该任务（其他会话仍在等待时任务继续），并收起对应的功能"""
+    jobs.manager.cancel(job, session_owner())
+    st.session_state[toggle_key] = False
+
+def watch_job(job, toggle_key, render_partial):
+    """轮询显示后台任务的进度与中间结果，不阻塞页面；任务结束后整页重跑以显示最终结果"""
+    if job.status == jobs.FAILED:
+        st.error(f"{job.label}失败：{job.error}")
+        st.button("重试", key=f"{toggle_key}.retry")
+        return
+
+    @st.experimental_fragment(run_every=config.JOB_POLL_SECONDS)
+    def poll():
+        if job.finished:
+            st.rerun()
+        st.progress(job.progress, text=f"{job.label}：{jobs.STATUS_LABELS[job.status]} {job.done}/{job.total}")
+        st.button("取消计算", key=f"{toggle_key}.cancel", on_click=cancel_job, args=(job, toggle_key))
+        partial = job.partial()
+        if partial is not None:
+            render_partial(partial)
+
+    poll()
+
+def render_significance(report, ball, partial=False):
+    if partial:
+        st.caption(f"中间结果：已完成 {report.resamples:,} 次模拟，结果会随模拟次数增加而更新")
+    else:
+        st.caption(f"在每期完全随机开奖的假设下模拟 {report.resamples:,} 份同样{report.periods}期的数据"
+                   f"（固定种子 {report.seed}），p值越小说明越不像随机波动；已做多重比较校正")
+    distributions = report.distributions[report.distributions['检验'].isin(SIGNIFICANCE_TESTS[ball])]
+    st.dataframe(distributions, use_container_width=True, hide_index=True)
+    numbers = report.red_numbers if ball == 'red' else report.blue_numbers
+    significant = numbers[numbers['显著']]
+    if significant.empty:
+        st.info("校正后没有任何号码的出现次数显著偏离随机期望，所谓冷热号很可能只是随机波动")
+    else:
+        st.warning(f"校正后出现次数显著偏离随机期望的号码：{', '.join(map(str, significant['号码']))}")
+    if not partial:
+        with st.expander("各号码检验明细"):
+            st.dataframe(numbers.sort_values('模拟p值'), use_container_width=True, hide_index=True)
+
+def show_significance(ball):
+    """与完全随机开奖比较，检验频率差异是否显著（勾选后在后台计算，结果按数据版本缓存）"""
+    st.markdown("### 📐 显著性检验")
+    toggle_key = f"significance.{ball}"
+    if not st.checkbox("检验上面的频率差异是否超出随机波动", key=toggle_key):
+        return
+    resamples = st.select_slider("模拟次数", [1000, 5000, 10000, 20000], 10000, key=f"significance.{ball}.resamples")
+    with profiler.stage('significance'):
+        report, job = views.significance_report(dataset, chart_data, range_key, resamples, owner=session_owner())
+    if report is None:
+        watch_job(job, toggle_key, lambda partial: render_significance(partial, ball, partial=True))
+    else:
+        render_significance(report, ball)
+
 # 页面标题
 st.title("🎯 双色球历史数据规律分析")
 st.markdown("---")
@@ -221,87 +215,34 @@ st.markdown("---")
 # 初始化数据
 @st.cache_data
 def load_initial_data():
-    """加载初始数据"""
+    """加载本地数据库中的历史数据（首次运行时从CSV导入）"""
     try:
-        df = pd.read_csv("data/initial_data.csv")
-        # 转换数据类型
-        for col in ['红球1', '红球2', '红球3', '红球4', '红球5', '红球6', '蓝球']:
-            df[col] = df[col].astype(int)
-        df['奖池(元)'] = df['奖池(元)'].astype(float)
-        df['开奖日期'] = pd.to_datetime(df['开奖日期'])
-        return df
+        return storage.load_history()
     except Exception as e:
         st.error(f"加载初始数据失败: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
 
-# 尝试从网络获取最新数据
-def fetch_latest_data():
-    """从网络获取最新双色球数据"""
-    try:
-        url = "https://datachart.500.com/ssq/history/history.shtml"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.encoding = 'utf-8'
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 查找表格数据
-        table = soup.find('table', class_='tb_data')
-        if not table:
-            st.warning("未找到最新数据，使用本地数据")
-            return load_initial_data()
-        
-        # 解析表格数据
-        rows = table.find_all('tr')[2:]  # 跳过表头
-        data = []
-        for row in rows:
-            cols = row.find_all('td')
-            if len(cols) >= 10:
-                issue = cols[0].text.strip()
-                red_balls = [cols[i].text.strip() for i in range(1, 7)]
-                blue_ball = cols[7].text.strip()
-                date = cols[-1].text.strip()
-                pool = cols[4].text.strip().replace(',', '') if len(cols) > 4 else '0'
-                
-                data.append({
-                    '期号': issue,
-                    '红球1': red_balls[0],
-                    '红球2': red_balls[1],
-                    '红球3': red_balls[2],
-                    '红球4': red_balls[3],
-                    '红球5': red_balls[4],
-                    '红球6': red_balls[5],
-                    '蓝球': blue_ball,
-                    '开奖日期': date,
-                    '奖池(元)': pool
-                })
-        
-        # 创建DataFrame
-        df = pd.DataFrame(data)
-        
-        # 转换数据类型
-        for col in ['红球1', '红球2', '红球3', '红球4', '红球5', '红球6', '蓝球']:
-            df[col] = df[col].astype(int)
-        df['奖池(元)'] = df['奖池(元)'].astype(float)
-        df['开奖日期'] = pd.to_datetime(df['开奖日期'])
-        
-        # 合并新旧数据，去重
-        old_df = load_initial_data()
-        if not old_df.empty:
-            combined_df = pd.concat([df, old_df])
-            combined_df = combined_df.drop_duplicates(subset=['期号'], keep='first')
-            combined_df = combined_df.sort_values(by='开奖日期', ascending=False)
-            return combined_df
-        else:
-            return df.sort_values(by='开奖日期', ascending=False)
-            
-    except Exception as e:
-        st.warning(f"获取最新数据失败: {e}，使用本地数据")
-        return load_initial_data()
+@st.cache_resource
+def get_data_service():
+    """创建所有会话共享的数据集和后台刷新线程（网络抓取与解析都在后台线程完成）
+
+    有与当前数据一致的启动包时直接使用，默认设置下的页面不需要任何计算。
+    """
+    loaded = bundle.load()
+    if loaded is not None:
+        dataset = bundle.install(loaded)
+    else:
+        dataset = Dataset(load_initial_data())
+    holder = DatasetHolder(dataset)
+    refresher = DrawRefresher(holder, warmers=[views.warm_default_views], store=storage.get_store())
+    refresher.start()
+    return holder, refresher
 
-# 加载数据
-df = load_initial_data()
+# 加载数据（读取当前版本的快照，不等待网络）
+with profiler.stage('load'):
+    holder, refresher = get_data_service()
+    dataset = holder.current()
+    df = dataset.df
 
 # 侧边栏
 st.sidebar.title("功能导航")
@@ -311,49 +252,68 @@ st.sidebar.markdown("---")
 st.sidebar.subheader("数据管理")
 update_data = st.sidebar.button("🔄 更新最新数据")
 if update_data:
-    with st.spinner("正在获取最新数据..."):
-        df = fetch_latest_data()
-        st.success("数据更新成功！")
+    refresher.trigger()
+    st.sidebar.info("已在后台开始更新，完成后刷新页面即可看到最新数据")
+
+refresh_status = refresher.status()
+if refresh_status['busy']:
+    st.sidebar.caption("⏳ 后台正在获取最新数据...")
+elif refresh_status['last_result'] == 'failed':
+    st.sidebar.caption(f"⚠️ 最近一次更新失败: {refresh_status['last_error']}，使用现有数据")
+st.sidebar.caption(f"当前数据：最新第{dataset.latest_issue}期（版本 {dataset.version}）")
+active_jobs = jobs.manager.active()
+if active_jobs:
+    st.sidebar.caption(f"⏳ 后台计算任务：{len(active_jobs)}个进行中")
+if refresh_status['next_run']:
+    st.sidebar.caption(f"下次自动更新：{refresh_status['next_run'].strftime('%Y-%m-%d %H:%M')}")
+
+# 数据校验结果（本地数据与最近一次抓取）
+for report in validation.latest_reports().values():
+    if report.ok and not report.warnings:
+        continue
+    source = '网络数据' if report.source == 'fetch' else '本地数据'
+    title = f"隔离{len(report.quarantine)}行" if not report.ok else f"{len(report.warnings)}条提示"
+    with st.sidebar.expander(f"⚠️ {source}校验：{title}"):
+        for warning in report.warnings:
+            st.caption(warning)
+        if not report.ok:
+            st.dataframe(report.quarantine, use_container_width=True, hide_index=True)
 
 # 数据范围选择
 st.sidebar.subheader("数据范围")
-period_options = ["全部数据", "最近50期", "最近100期", "最近200期", "自定义范围"]
-selected_period = st.sidebar.selectbox("选择数据范围", period_options)
+# 回溯：所有页面只使用截至所选期号（含）的数据，查看当时各页面的统计结果
+as_of = None
+if len(dataset) > 1 and st.sidebar.checkbox("回溯到历史某一期", key='as_of_enabled'):
+    # 输入期号而不是列出所有期号；跨年等期号不连续处取不晚于输入的最近一期
+    first_issue = int(dataset.issues.min())
+    requested = st.sidebar.number_input("截至期号", first_issue, dataset.latest_issue, dataset.latest_issue,
+                                        key='as_of_issue')
+    as_of_issue = dataset.issue_at_or_before(int(requested))
+    as_of_date = dataset.df['开奖日期'].iloc[dataset.issue_row(as_of_issue)]
+    st.sidebar.caption(f"截至第{as_of_issue}期（{as_of_date.strftime('%Y-%m-%d')}）")
+    as_of = None if as_of_issue == dataset.latest_issue else as_of_issue
+snapshot_df = views.snapshot(dataset, as_of)
+selected_period = st.sidebar.selectbox("选择数据范围", PERIOD_OPTIONS)
 
 # 自定义日期范围
 start_date = None
 end_date = None
 if selected_period == "自定义范围":
-    if not df.empty:
-        min_date = df['开奖日期'].min().date()
-        max_date = df['开奖日期'].max().date()
+    if not snapshot_df.empty:
+        min_date = snapshot_df['开奖日期'].min().date()
+        max_date = snapshot_df['开奖日期'].max().date()
         col1, col2 = st.sidebar.columns(2)
         with col1:
             start_date = st.date_input("开始日期", min_date)
         with col2:
             end_date = st.date_input("结束日期", max_date)
 
-# 筛选数据
-def filter_data(df, period, start_date=None, end_date=None):
-    """根据选择的时间范围筛选数据"""
-    if df.empty:
-        return df
-    
-    if period == "全部数据":
-        return df
-    elif period == "最近50期":
-        return df.head(50)
-    elif period == "最近100期":
-        return df.head(100)
-    elif period == "最近200期":
-        return df.head(200)
-    elif period == "自定义范围" and start_date and end_date:
-        mask = (df['开奖日期'].dt.date >= start_date) & (df['开奖日期'].dt.date <= end_date)
-        return df[mask]
-    else:
-        return df
-
-filtered_df = filter_data(df, selected_period, start_date, end_date)
+# 筛选数据，各页面的统计都基于红球/蓝球数组计算
+with profiler.stage('filter'):
+    range_key = views.range_key(selected_period, start_date, end_date, as_of)
+    filtered_df = filter_history(snapshot_df, selected_period, start_date, end_date)
+    chart_data = chart_specs.ChartData(filtered_df, dataset)
+    reds, blues = chart_data.reds, chart_data.blues
 
 # 功能选择
 st.sidebar.markdown("---")
@@ -375,6 +335,10 @@ selected_analysis = st.sidebar.radio(
 
 # 主内容区
 st.markdown("---")
+if as_of is not None:
+    as_of_row = dataset.issue_row(as_of)
+    st.info(f"🕰️ 回溯模式：以下所有统计只使用截至第{as_of}期（{df['开奖日期'].iloc[as_of_row]:%Y-%m-%d}）的数据，"
+            f"之后还有{as_of_row}期开奖")
 
 # 显示使用说明
 if selected_analysis == "基本数据概览":
@@ -426,25 +390,30 @@ if selected_analysis == "基本数据概览":
         # 数据导出
         st.markdown("---")
         st.subheader("💾 数据导出")
-        col1, col2 = st.columns(2)
-        with col1:
-            csv = filtered_df.to_csv(index=False).encode('utf-8-sig')
-            st.download_button(
-                label="📥 导出CSV",
-                data=csv,
-                file_name=f"双色球数据_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime='text/csv',
-            )
-        with col2:
-            excel_buffer = io.BytesIO()
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                filtered_df.to_excel(writer, index=False, sheet_name='双色球数据')
-            st.download_button(
-                label="📥 导出Excel",
-                data=excel_buffer.getvalue(),
-                file_name=f"双色球数据_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            )
+        # 导出文件只在需要时生成（各会话共享同一份）；本会话占用超过上限时释放，需要时重新勾选
+        if memory.sessions.over_cap(session_owner()) and st.session_state.get('export.prepare'):
+            st.session_state['export.prepare'] = False
+            st.caption("⚠️ 本会话占用的内存超过上限，已释放导出文件，需要时请重新生成")
+        if st.checkbox("生成导出文件", key='export.prepare'):
+            with profiler.stage('export'):
+                csv = views.export_csv(dataset, filtered_df, range_key)
+                excel = views.export_excel(dataset, filtered_df, range_key)
+            session_media['exports'] += len(csv) + len(excel)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    label="📥 导出CSV",
+                    data=csv,
+                    file_name=f"双色球数据_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime='text/csv',
+                )
+            with col2:
+                st.download_button(
+                    label="📥 导出Excel",
+                    data=excel,
+                    file_name=f"双色球数据_{datetime.now().strftime('%Y%m%d')}.xlsx",
+                    mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                )
     else:
         st.warning("暂无数据，请检查数据加载情况")
 
@@ -453,99 +422,32 @@ elif selected_analysis == "红球号码分析":
     st.subheader("🔴 红球号码分析")
     
     if not filtered_df.empty:
-        # 提取所有红球号码
-        red_balls = pd.concat([
-            filtered_df['红球1'], filtered_df['红球2'], filtered_df['红球3'],
-            filtered_df['红球4'], filtered_df['红球5'], filtered_df['红球6']
-        ], axis=0).astype(int)
-        
-        # 计算每个号码出现的频率
-        red_freq = red_balls.value_counts().sort_index()
-        red_freq_df = pd.DataFrame({
-            '号码': red_freq.index,
-            '出现次数': red_freq.values,
-            '出现频率': (red_freq.values / len(filtered_df) * 6 * 100).round(2)
-        })
+        # 计算每个号码出现的频率（按数据版本缓存）
+        with profiler.stage('red.frequency.table'):
+            red_freq_df = views.red_frequency(dataset, chart_data, range_key)
         
         # 号码频率分布
         st.markdown("### 📊 红球出现频率分布")
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        bars = ax.bar(red_freq_df['号码'], red_freq_df['出现次数'], color='red', alpha=0.7)
-        ax.set_xlabel('红球号码')
-        ax.set_ylabel('出现次数')
-        ax.set_title(f'红球号码出现频率 ({len(filtered_df)}期数据)')
-        ax.grid(True, axis='y', linestyle='--', alpha=0.7)
-        
-        # 在柱状图上显示数值
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{int(height)}', ha='center', va='bottom')
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('red.frequency', chart_specs.red_frequency)
         
         # 热力图显示号码分布
         st.markdown("### 🔥 红球号码热力图")
-        # 创建33x1的热力图数据
-        heatmap_data = np.zeros((1, 33))
-        for num, freq in zip(red_freq_df['号码'], red_freq_df['出现次数']):
-            heatmap_data[0, num-1] = freq
-        
-        fig, ax = create_fig_ax(figsize=(15, 3))
-        sns.heatmap(heatmap_data, cmap='Reds', annot=True, fmt='.0f',
-                   xticklabels=[f'{i}' for i in range(1, 34)],
-                   yticklabels=['出现次数'])
-        ax.set_title(f'红球号码出现次数热力图 ({len(filtered_df)}期数据)')
-        ax.set_xlabel('红球号码')
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('red.heatmap', chart_specs.red_heatmap)
         
         # 红球区间分布
         st.markdown("### 📈 红球区间分布")
-        # 定义区间
-        ranges = [(1, 11), (12, 22), (23, 33)]
-        range_names = ['小号区(1-11)', '中号区(12-22)', '大号区(23-33)']
-        
-        range_counts = []
-        for start, end in ranges:
-            count = 0
-            for col in ['红球1', '红球2', '红球3', '红球4', '红球5', '红球6']:
-                count += ((filtered_df[col] >= start) & (filtered_df[col] <= end)).sum()
-            range_counts.append(count)
-        
-        fig, ax = create_fig_ax(figsize=(10, 6))
-        bars = ax.bar(range_names, range_counts, color=['#FF9999', '#FF6666', '#CC0000'])
-        ax.set_ylabel('出现次数')
-        ax.set_title(f'红球区间分布 ({len(filtered_df)}期数据)')
-        ax.grid(True, axis='y', linestyle='--', alpha=0.7)
-        
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{int(height)}', ha='center', va='bottom')
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('red.zones', chart_specs.red_zones)
         
         # 出现频率最高的前10个红球
         st.markdown("### 🏆 红球出现频率TOP10")
         top10_red = red_freq_df.sort_values('出现次数', ascending=False).head(10)
         st.dataframe(top10_red, use_container_width=True)
+        show_significance('red')
         
         # 最近N期未出现的红球
         st.markdown("### ❓ 最近未出现的红球")
         recent_periods = st.slider("选择最近期数", 5, 50, 10)
-        recent_red_balls = pd.concat([
-            filtered_df.head(recent_periods)['红球1'],
-            filtered_df.head(recent_periods)['红球2'],
-            filtered_df.head(recent_periods)['红球3'],
-            filtered_df.head(recent_periods)['红球4'],
-            filtered_df.head(recent_periods)['红球5'],
-            filtered_df.head(recent_periods)['红球6']
-        ], axis=0).unique()
-        
-        missing_red = [i for i in range(1, 34) if i not in recent_red_balls]
+        missing_red = chart_data.slots.missing(recent_periods)
         if missing_red:
             st.write(f"最近{recent_periods}期未出现的红球号码：{', '.join(map(str, missing_red))}")
             
@@ -554,6 +456,18 @@ elif selected_analysis == "红球号码分析":
             st.dataframe(missing_red_freq, use_container_width=True)
         else:
             st.write(f"最近{recent_periods}期所有红球号码都出现过")
+
+        # 按位置（从小到大第1~6个）统计，基于整个数据集的前缀和表，任意范围都只需6×33次运算
+        st.markdown("### 📍 红球位置分析")
+        st.caption("每期红球从小到大排序后，第1~6个号码分别称为红球1~红球6")
+        show_chart('red.slots', chart_specs.slot_frequency)
+        st.dataframe(views.slot_summary(dataset, chart_data, range_key), use_container_width=True, hide_index=True)
+        show_chart('red.slot_omission', chart_specs.slot_omission)
+        slot_window = st.slider("位置走势平均期数", 5, 50, views.DEFAULT_SLOT_WINDOW)
+        show_chart('red.slot_trend', chart_specs.slot_trend, slot_window)
+        slot = st.selectbox("查看分位数走势的位置", range(len(positional.SLOT_LABELS)),
+                            format_func=lambda i: positional.SLOT_LABELS[i])
+        show_chart('red.slot_quantiles', chart_specs.slot_quantiles, slot, slot_window)
     else:
         st.warning("暂无数据，请检查数据加载情况")
 
@@ -564,85 +478,62 @@ elif selected_analysis == "蓝球号码分析":
     if not filtered_df.empty:
         # 蓝球出现频率
         st.markdown("### 📊 蓝球出现频率分布")
-        blue_freq = filtered_df['蓝球'].value_counts().sort_index()
-        blue_freq_df = pd.DataFrame({
-            '号码': blue_freq.index,
-            '出现次数': blue_freq.values,
-            '出现频率': (blue_freq.values / len(filtered_df) * 100).round(2)
-        })
-        
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        bars = ax.bar(blue_freq_df['号码'], blue_freq_df['出现次数'], color='blue', alpha=0.7)
-        ax.set_xlabel('蓝球号码')
-        ax.set_ylabel('出现次数')
-        ax.set_title(f'蓝球号码出现频率 ({len(filtered_df)}期数据)')
-        ax.grid(True, axis='y', linestyle='--', alpha=0.7)
-        
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{int(height)}', ha='center', va='bottom')
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        with profiler.stage('blue.stats'):
+            blue_stats = views.blue_stats(dataset, chart_data, range_key)
+            blue_freq_df = views.blue_frequency(dataset, chart_data, range_key)
+        show_chart('blue.frequency', chart_specs.blue_frequency)
         
         # 蓝球奇偶分布
         st.markdown("### 🔢 蓝球奇偶分布")
-        even_count = (filtered_df['蓝球'] % 2 == 0).sum()
-        odd_count = (filtered_df['蓝球'] % 2 == 1).sum()
-        
-        fig, ax = create_fig_ax(figsize=(8, 6))
-        ax.pie([even_count, odd_count], labels=['偶数', '奇数'], autopct='%1.1f%%',
-               colors=['#6699CC', '#336699'], startangle=90)
-        ax.set_title(f'蓝球奇偶分布 ({len(filtered_df)}期数据)')
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('blue.parity', chart_specs.blue_parity)
         
         # 蓝球大小分布（1-8为小，9-16为大）
         st.markdown("### 📏 蓝球大小分布")
-        small_count = (filtered_df['蓝球'] <= 8).sum()
-        big_count = (filtered_df['蓝球'] > 8).sum()
-        
-        fig, ax = create_fig_ax(figsize=(8, 6))
-        ax.pie([small_count, big_count], labels=['小号(1-8)', '大号(9-16)'], autopct='%1.1f%%',
-               colors=['#99CCFF', '#3366CC'], startangle=90)
-        ax.set_title(f'蓝球大小分布 ({len(filtered_df)}期数据)')
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('blue.size', chart_specs.blue_size)
+
+        # 蓝球除4、除5余数分布
+        st.markdown("### 🧮 蓝球余数分布")
+        col1, col2 = st.columns(2)
+        with col1:
+            show_chart('blue.mod4', chart_specs.blue_mod4)
+        with col2:
+            show_chart('blue.mod5', chart_specs.blue_mod5)
         
         # 蓝球走势图
         st.markdown("### 📈 蓝球走势折线图")
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        ax.plot(range(len(filtered_df)), filtered_df['蓝球'], marker='o', linestyle='-', color='blue')
-        ax.set_xlabel('期次')
-        ax.set_ylabel('蓝球号码')
-        ax.set_title('蓝球号码走势')
-        ax.grid(True, linestyle='--', alpha=0.7)
-        
-        # 只显示部分期号标签，避免重叠
-        if len(filtered_df) > 20:
-            step = len(filtered_df) // 10
-            ax.set_xticks(range(0, len(filtered_df), step))
-            ax.set_xticklabels(filtered_df['期号'].iloc[::step], rotation=45)
-        else:
-            ax.set_xticks(range(len(filtered_df)))
-            ax.set_xticklabels(filtered_df['期号'], rotation=45)
-        
-        fig.tight_layout()
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('blue.trend', chart_specs.blue_trend)
+
+        # 某个蓝球最近N期的出现次数走势
+        st.markdown("### 🌊 蓝球滚动频率")
+        col1, col2 = st.columns(2)
+        with col1:
+            rolling_number = st.selectbox("选择蓝球号码", list(range(1, 17)), index=views.DEFAULT_BLUE_NUMBER - 1)
+        with col2:
+            rolling_window = st.slider("滚动窗口（期）", 5, 100, views.DEFAULT_BLUE_WINDOW, 5)
+        show_chart('blue.rolling', chart_specs.blue_rolling, rolling_number, rolling_window)
+
+        # 相邻两次出现的间隔与重号
+        st.markdown("### ⏱️ 蓝球出现间隔")
+        col1, col2 = st.columns(2)
+        col1.metric("重号率（连续两期相同）", f"{blue_stats.repeat_rate()}%",
+                    help=f"共{blue_stats.pairs}对相邻两期，其中{blue_stats.repeats}次蓝球相同；无规律时约为6.25%")
+        col2.metric("平均间隔", f"{blue_stats.gaps.mean():.1f}期" if len(blue_stats.gaps) else "-",
+                    help="同一个蓝球相邻两次出现相隔的期数，无规律时约为16期")
+        show_chart('blue.intervals', chart_specs.blue_intervals)
+        with profiler.stage('blue.intervals.table'):
+            interval_df = views.blue_intervals(dataset, chart_data, range_key)
+        st.dataframe(interval_df, use_container_width=True, hide_index=True)
         
         # 出现频率最高的前5个蓝球
         st.markdown("### 🏆 蓝球出现频率TOP5")
         top5_blue = blue_freq_df.sort_values('出现次数', ascending=False).head(5)
         st.dataframe(top5_blue, use_container_width=True)
+        show_significance('blue')
         
         # 最近N期未出现的蓝球
         st.markdown("### ❓ 最近未出现的蓝球")
         recent_periods = st.slider("选择最近期数", 5, 50, 10)
-        recent_blue_balls = filtered_df.head(recent_periods)['蓝球'].unique()
-        
-        missing_blue = [i for i in range(1, 17) if i not in recent_blue_balls]
+        missing_blue = chart_data.blue_slots.missing(recent_periods)
         if missing_blue:
             st.write(f"最近{recent_periods}期未出现的蓝球号码：{', '.join(map(str, missing_blue))}")
             
@@ -661,298 +552,163 @@ elif selected_analysis == "号码组合分析":
     if not filtered_df.empty:
         # 奇偶比分析
         st.markdown("### ⚖️ 红球奇偶比分析")
-        
-        # 计算每期的奇偶比
-        def calculate_odd_even_ratio(row):
-            red_balls = [row['红球1'], row['红球2'], row['红球3'], row['红球4'], row['红球5'], row['红球6']]
-            odd_count = sum(1 for ball in red_balls if ball % 2 == 1)
-            even_count = 6 - odd_count
-            return f"{odd_count}:{even_count}"
-        
-        filtered_df['奇偶比'] = filtered_df.apply(calculate_odd_even_ratio, axis=1)
-        odd_even_counts = filtered_df['奇偶比'].value_counts().sort_index()
-        
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        bars = ax.bar(odd_even_counts.index, odd_even_counts.values, color='purple', alpha=0.7)
-        ax.set_xlabel('奇偶比')
-        ax.set_ylabel('出现次数')
-        ax.set_title(f'红球奇偶比分布 ({len(filtered_df)}期数据)')
-        ax.grid(True, axis='y', linestyle='--', alpha=0.7)
-        
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{int(height)}', ha='center', va='bottom')
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('combo.odd_even', chart_specs.odd_even)
         
         # 大小比分析（1-16为小，17-33为大）
         st.markdown("### 📏 红球大小比分析")
-        
-        def calculate_big_small_ratio(row):
-            red_balls = [row['红球1'], row['红球2'], row['红球3'], row['红球4'], row['红球5'], row['红球6']]
-            small_count = sum(1 for ball in red_balls if ball <= 16)
-            big_count = 6 - small_count
-            return f"{small_count}:{big_count}"
-        
-        filtered_df['大小比'] = filtered_df.apply(calculate_big_small_ratio, axis=1)
-        big_small_counts = filtered_df['大小比'].value_counts().sort_index()
-        
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        bars = ax.bar(big_small_counts.index, big_small_counts.values, color='green', alpha=0.7)
-        ax.set_xlabel('大小比')
-        ax.set_ylabel('出现次数')
-        ax.set_title(f'红球大小比分布 ({len(filtered_df)}期数据)')
-        ax.grid(True, axis='y', linestyle='--', alpha=0.7)
-        
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{int(height)}', ha='center', va='bottom')
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('combo.small_big', chart_specs.small_big)
         
         # 连号分析
         st.markdown("### 🔗 红球连号分析")
-        
-        def count_consecutive_pairs(row):
-            red_balls = sorted([row['红球1'], row['红球2'], row['红球3'], row['红球4'], row['红球5'], row['红球6']])
-            consecutive_count = 0
-            for i in range(5):
-                if red_balls[i+1] - red_balls[i] == 1:
-                    consecutive_count += 1
-            return consecutive_count
-        
-        filtered_df['连号数'] = filtered_df.apply(count_consecutive_pairs, axis=1)
-        consecutive_counts = filtered_df['连号数'].value_counts().sort_index()
-        
-        fig, ax = create_fig_ax(figsize=(10, 6))
-        bars = ax.bar(consecutive_counts.index, consecutive_counts.values, color='orange', alpha=0.7)
-        ax.set_xlabel('连号对数')
-        ax.set_ylabel('出现次数')
-        ax.set_title(f'红球连号分布 ({len(filtered_df)}期数据)')
-        ax.grid(True, axis='y', linestyle='--', alpha=0.7)
-        
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{int(height)}', ha='center', va='bottom')
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('combo.consecutive', chart_specs.consecutive)
         
         # 和值分析
         st.markdown("### 📊 红球和值分析")
-        
-        def calculate_sum(row):
-            return row['红球1'] + row['红球2'] + row['红球3'] + row['红球4'] + row['红球5'] + row['红球6']
-        
-        filtered_df['和值'] = filtered_df.apply(calculate_sum, axis=1)
-        
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        ax.hist(filtered_df['和值'], bins=20, color='cyan', alpha=0.7, edgecolor='black')
-        ax.set_xlabel('和值')
-        ax.set_ylabel('出现次数')
-        ax.set_title(f'红球和值分布 ({len(filtered_df)}期数据)')
-        ax.grid(True, linestyle='--', alpha=0.7)
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('combo.sum', chart_specs.sum_histogram)
         
         # 显示统计信息
         st.markdown("### 📋 和值统计信息")
-        sum_stats = filtered_df['和值'].describe()
+        with profiler.stage('combo.sum_stats'):
+            sum_stats = views.sum_statistics(dataset, chart_data, range_key)
         sum_stats_df = pd.DataFrame({
-            '统计指标': ['平均值', '中位数', '最小值', '最大值', '标准差'],
-            '数值': [
-                sum_stats['mean'].round(2),
-                sum_stats['50%'].round(2),
-                sum_stats['min'].round(2),
-                sum_stats['max'].round(2),
-                sum_stats['std'].round(2)
-            ]
+            '统计指标': list(sum_stats.keys()),
+            '数值': list(sum_stats.values())
         })
         st.dataframe(sum_stats_df, use_container_width=True)
         
         # 红球跨度分析（最大红球 - 最小红球）
         st.markdown("### 📏 红球跨度分析")
-        
-        def calculate_span(row):
-            red_balls = [row['红球1'], row['红球2'], row['红球3'], row['红球4'], row['红球5'], row['红球6']]
-            return max(red_balls) - min(red_balls)
-        
-        filtered_df['跨度'] = filtered_df.apply(calculate_span, axis=1)
-        
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        ax.hist(filtered_df['跨度'], bins=15, color='brown', alpha=0.7, edgecolor='black')
-        ax.set_xlabel('跨度')
-        ax.set_ylabel('出现次数')
-        ax.set_title(f'红球跨度分布 ({len(filtered_df)}期数据)')
-        ax.grid(True, linestyle='--', alpha=0.7)
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('combo.span', chart_specs.span_histogram)
+
+        # 号码缩水：在全部红球组合中按上面的统计特征筛选
+        st.markdown("### ✂️ 红球组合缩水")
+        st.caption(f"从全部 {combination_filter.TOTAL_COMBINATIONS:,} 注红球组合中按条件筛选，未修改的条件不影响结果")
+        ratio_options = [f"{k}:{6 - k}" for k in range(7)]
+        defaults = views.DEFAULT_COMBINATION_FILTER
+        col1, col2 = st.columns(2)
+        with col1:
+            sum_range = st.slider("和值范围", 21, 183, defaults['sum_range'])
+            odd_labels = st.multiselect("奇偶比", ratio_options, [ratio_options[k] for k in defaults['odd_counts']])
+            consecutive_range = st.slider("连号对数", 0, 5, defaults['consecutive_range'])
+            exclude = st.multiselect("排除号码", list(range(1, 34)))
+        with col2:
+            span_range = st.slider("跨度范围", 5, 32, defaults['span_range'])
+            small_labels = st.multiselect("大小比（1-16为小）", ratio_options,
+                                          [ratio_options[k] for k in defaults['small_counts']])
+            zone_ranges = [st.slider(f"{name}个数", 0, 6, bounds)
+                           for name, bounds in zip(analytics.RED_ZONE_NAMES, defaults['zone_ranges'])]
+            require = st.multiselect("必选号码", list(range(1, 34)))
+        col1, col2 = st.columns(2)
+        with col1:
+            min_omission = st.number_input("冷号：当前遗漏期数不少于", 1, 100, views.DEFAULT_MIN_OMISSION)
+        with col2:
+            cold_range = st.slider("每注包含的冷号个数", 0, 6, defaults['cold_range'])
+
+        # 结果按条件和冷号缓存（默认条件的结果在启动包中），重跑时不必重新筛选全部组合
+        with profiler.stage('combo.filter'):
+            result, cold = views.combination_summary(
+                dataset, chart_data, min_omission,
+                sum_range=sum_range, span_range=span_range,
+                odd_counts=[ratio_options.index(label) for label in odd_labels],
+                small_counts=[ratio_options.index(label) for label in small_labels],
+                zone_ranges=zone_ranges, consecutive_range=consecutive_range,
+                exclude=exclude, require=require, cold_range=cold_range,
+            )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("剩余注数", f"{result.count:,}")
+        with col2:
+            st.metric("保留比例", f"{result.ratio:.2%}")
+        if cold:
+            st.caption(f"当前冷号：{', '.join(map(str, cold))}")
+        else:
+            st.caption("当前没有冷号")
+        st.dataframe(pd.DataFrame(result.steps, columns=['条件', '剩余注数']), use_container_width=True, hide_index=True)
+        if result.count:
+            st.dataframe(pd.DataFrame(result.head, columns=[f'红球{i}' for i in range(1, 7)]),
+                         use_container_width=True, hide_index=True)
+            if result.index is not None:
+                combinations_csv = result.result().to_csv().encode('utf-8-sig')
+                session_media['exports'] += len(combinations_csv)
+                st.download_button(
+                    label="📥 导出全部组合",
+                    data=combinations_csv,
+                    file_name=f"双色球缩水_{datetime.now().strftime('%Y%m%d')}.csv",
+                    mime='text/csv',
+                )
+            else:
+                st.caption(f"剩余组合超过{combination_filter.DOWNLOAD_LIMIT:,}注时不提供导出，请继续缩小条件")
     else:
         st.warning("暂无数据，请检查数据加载情况")
 
 # 历史趋势分析
 elif selected_analysis == "历史趋势分析":
     st.subheader("📈 历史趋势分析")
+    trend_view = st.radio("选择内容", ["走势图表", "转移统计"], horizontal=True, label_visibility="collapsed")
     
-    if not filtered_df.empty:
+    if filtered_df.empty:
+        st.warning("暂无数据，请检查数据加载情况")
+    elif trend_view == "走势图表":
         # 奖池趋势
         st.markdown("### 💰 奖池金额趋势")
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        ax.plot(filtered_df['开奖日期'], filtered_df['奖池(元)'] / 100000000, marker='o', linestyle='-', color='gold')
-        ax.set_xlabel('开奖日期')
-        ax.set_ylabel('奖池金额（亿元）')
-        ax.set_title('奖池金额历史趋势')
-        ax.grid(True, linestyle='--', alpha=0.7)
-        
-        # 自动调整日期标签
-        plt.xticks(rotation=45)
-        fig.tight_layout()
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('trend.pool', chart_specs.pool_trend)
         
-        # 红球和值趋势
+        # 红球和值趋势（含移动平均线）
         st.markdown("### 📊 红球和值趋势")
-        
-        def calculate_sum(row):
-            return row['红球1'] + row['红球2'] + row['红球3'] + row['红球4'] + row['红球5'] + row['红球6']
-        
-        filtered_df['和值'] = filtered_df.apply(calculate_sum, axis=1)
-        
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        ax.plot(filtered_df['开奖日期'], filtered_df['和值'], marker='o', linestyle='-', color='red')
-        ax.set_xlabel('开奖日期')
-        ax.set_ylabel('和值')
-        ax.set_title('红球和值历史趋势')
-        ax.grid(True, linestyle='--', alpha=0.7)
-        
-        # 添加移动平均线
-        window = st.slider("选择移动平均线窗口大小", 3, 20, 5)
-        filtered_df['和值移动平均'] = filtered_df['和值'].rolling(window=window).mean()
-        ax.plot(filtered_df['开奖日期'], filtered_df['和值移动平均'], linestyle='--', color='blue', label=f'{window}期移动平均')
-        ax.legend()
-        
-        plt.xticks(rotation=45)
-        fig.tight_layout()
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        window = st.slider("选择移动平均线窗口大小", 3, 20, views.DEFAULT_SUM_WINDOW)
+        show_chart('trend.sum', chart_specs.sum_trend, window)
         
         # 蓝球大小趋势（1-8为小，9-16为大）
         st.markdown("### 🔵 蓝球大小趋势")
-        filtered_df['蓝球大小'] = filtered_df['蓝球'].apply(lambda x: '小' if x <= 8 else '大')
-        
-        # 计算每期的大小分布
-        size_trend = filtered_df.groupby('开奖日期')['蓝球大小'].value_counts().unstack(fill_value=0)
-        
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        if '小' in size_trend.columns and '大' in size_trend.columns:
-            ax.plot(size_trend.index, size_trend['小'], marker='o', linestyle='-', color='lightblue', label='小号(1-8)')
-            ax.plot(size_trend.index, size_trend['大'], marker='o', linestyle='-', color='darkblue', label='大号(9-16)')
-        ax.set_xlabel('开奖日期')
-        ax.set_ylabel('出现次数')
-        ax.set_title('蓝球大小历史趋势')
-        ax.legend()
-        ax.grid(True, linestyle='--', alpha=0.7)
-        
-        plt.xticks(rotation=45)
-        fig.tight_layout()
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('trend.blue_size', chart_specs.blue_size_trend)
         
         # 红球奇偶趋势
         st.markdown("### 🔴 红球奇偶趋势")
-        
-        def count_odd_even(row):
-            red_balls = [row['红球1'], row['红球2'], row['红球3'], row['红球4'], row['红球5'], row['红球6']]
-            odd_count = sum(1 for ball in red_balls if ball % 2 == 1)
-            even_count = 6 - odd_count
-            return pd.Series({'奇数': odd_count, '偶数': even_count})
-        
-        odd_even_trend = filtered_df.apply(count_odd_even, axis=1)
-        odd_even_trend.index = filtered_df['开奖日期']
-        
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        ax.plot(odd_even_trend.index, odd_even_trend['奇数'], marker='o', linestyle='-', color='red', label='奇数')
-        ax.plot(odd_even_trend.index, odd_even_trend['偶数'], marker='o', linestyle='-', color='blue', label='偶数')
-        ax.set_xlabel('开奖日期')
-        ax.set_ylabel('出现次数')
-        ax.set_title('红球奇偶历史趋势')
-        ax.legend()
-        ax.grid(True, linestyle='--', alpha=0.7)
-        
-        plt.xticks(rotation=45)
-        fig.tight_layout()
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('trend.odd_even', chart_specs.odd_even_trend)
         
         # 红球区间趋势
         st.markdown("### 📈 红球区间趋势")
+        show_chart('trend.zones', chart_specs.zone_trend)
         
-        def count_ranges(row):
-            red_balls = [row['红球1'], row['红球2'], row['红球3'], row['红球4'], row['红球5'], row['红球6']]
-            range1 = sum(1 for ball in red_balls if 1 <= ball <= 11)  # 小号区
-            range2 = sum(1 for ball in red_balls if 12 <= ball <= 22)  # 中号区
-            range3 = sum(1 for ball in red_balls if 23 <= ball <= 33)  # 大号区
-            return pd.Series({'小号区(1-11)': range1, '中号区(12-22)': range2, '大号区(23-33)': range3})
-        
-        range_trend = filtered_df.apply(count_ranges, axis=1)
-        range_trend.index = filtered_df['开奖日期']
-        
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        ax.plot(range_trend.index, range_trend['小号区(1-11)'], marker='o', linestyle='-', color='green', label='小号区(1-11)')
-        ax.plot(range_trend.index, range_trend['中号区(12-22)'], marker='o', linestyle='-', color='orange', label='中号区(12-22)')
-        ax.plot(range_trend.index, range_trend['大号区(23-33)'], marker='o', linestyle='-', color='red', label='大号区(23-33)')
-        ax.set_xlabel('开奖日期')
-        ax.set_ylabel('出现次数')
-        ax.set_title('红球区间历史趋势')
-        ax.legend()
-        ax.grid(True, linestyle='--', alpha=0.7)
-        
-        plt.xticks(rotation=45)
-        fig.tight_layout()
-        
-        st.pyplot(fig)
-        plt.close(fig)
-        
-        # 红球号码热度趋势
+        # 红球号码热度趋势（10期移动平均）
         st.markdown("### 🔥 红球号码热度趋势")
         selected_number = st.selectbox("选择要分析的红球号码", list(range(1, 34)))
-        
-        # 计算每期是否包含该号码
-        def check_number_presence(row, number):
-            red_balls = [row['红球1'], row['红球2'], row['红球3'], row['红球4'], row['红球5'], row['红球6']]
-            return 1 if number in red_balls else 0
-        
-        filtered_df[f'号码{selected_number}_出现'] = filtered_df.apply(lambda row: check_number_presence(row, selected_number), axis=1)
-        
-        # 计算移动平均热度
-        window_size = 10
-        filtered_df[f'号码{selected_number}_热度'] = filtered_df[f'号码{selected_number}_出现'].rolling(window=window_size).mean() * 10
-        
-        fig, ax = create_fig_ax(figsize=(12, 6))
-        ax.plot(filtered_df['开奖日期'], filtered_df[f'号码{selected_number}_热度'], marker='o', linestyle='-', color='red')
-        ax.set_xlabel('开奖日期')
-        ax.set_ylabel(f'号码{selected_number}热度（10期移动平均）')
-        ax.set_title(f'红球号码{selected_number}热度趋势')
-        ax.grid(True, linestyle='--', alpha=0.7)
-        
-        plt.xticks(rotation=45)
-        fig.tight_layout()
-        
-        st.pyplot(fig)
-        plt.close(fig)
+        show_chart('trend.heat', chart_specs.number_heat, selected_number)
+    elif len(filtered_df) < 3:
+        st.warning("转移统计至少需要3期数据，请扩大数据范围")
     else:
-        st.warning("暂无数据，请检查数据加载情况")
+        # 相邻两期之间的转移：本期的特征确定时，下一期的特征分布
+        st.caption("统计相邻两期之间特征的变化：以最新一期的状态为条件，查看历史上下一期的分布")
+        # 正好3期时只有一个可选值，滑块的最小值必须小于最大值
+        if len(filtered_df) > 3:
+            window = st.slider("统计最近N期", 3, len(filtered_df), len(filtered_df))
+        else:
+            window = len(filtered_df)
+
+        for feature, name in transitions.FEATURES.items():
+            st.markdown(f"### 🔁 {name}转移")
+            show_chart('transition.next', chart_specs.transition_next, feature, window)
+            with st.expander(f"{name}完整转移表（行：本期，列：下一期，单位：%）"):
+                with profiler.stage(f'transition.{feature}.table'):
+                    table = views.transition_table(dataset, chart_data, range_key, feature, window)
+                st.dataframe(table, use_container_width=True)
+
+        # 重号：上期号码在下一期再次出现；邻号：上期号码±1在下一期出现
+        st.markdown("### 🔂 重号分析")
+        st.caption(f"重号率 = 上期出现后下一期再次出现的比例，随机情况下约为 {transitions.BASE_RATE:.2%}")
+        show_chart('transition.repeat_rates', chart_specs.repeat_rates, window)
+        show_chart('transition.repeat_counts', chart_specs.repeat_counts, window)
+
+        st.markdown("### ↔️ 邻号分析")
+        st.caption("邻号率 = 号码为上期某个号码±1（且不是上期号码）时，下一期出现的比例")
+        show_chart('transition.neighbor_rates', chart_specs.neighbor_rates, window)
+        show_chart('transition.neighbor_counts', chart_specs.neighbor_counts, window)
+
+        with st.expander("各号码重号、邻号明细"):
+            with profiler.stage('transition.number_rates'):
+                rates = views.transition_rates(dataset, chart_data, range_key, window)
+            st.dataframe(rates, use_container_width=True, hide_index=True)
 
 # 智能号码推荐
 elif selected_analysis == "智能号码推荐":
@@ -977,103 +733,24 @@ elif selected_analysis == "智能号码推荐":
         # 生成推荐号码
         if st.button("🎯 生成推荐号码"):
             with st.spinner("正在分析历史数据，生成推荐号码..."):
-                time.sleep(1)  # 模拟分析过程
-                
-                # 提取所有红球号码
-                red_balls = pd.concat([
-                    filtered_df['红球1'], filtered_df['红球2'], filtered_df['红球3'],
-                    filtered_df['红球4'], filtered_df['红球5'], filtered_df['红球6']
-                ], axis=0).astype(int)
-                
-                # 计算红球频率
-                red_freq = red_balls.value_counts()
-                red_freq_dict = dict(zip(red_freq.index, red_freq.values))
-                
-                # 计算红球热度分数
-                total_periods = len(filtered_df)
-                red_scores = {}
-                for num in range(1, 34):
-                    freq = red_freq_dict.get(num, 0)
-                    # 基础分数：出现频率
-                    base_score = freq / total_periods * 6 * 100
-                    
-                    # 时间衰减：最近出现的号码得分更高
-                    recent_periods = min(20, total_periods)
-                    recent_red_balls = pd.concat([
-                        filtered_df.head(recent_periods)['红球1'],
-                        filtered_df.head(recent_periods)['红球2'],
-                        filtered_df.head(recent_periods)['红球3'],
-                        filtered_df.head(recent_periods)['红球4'],
-                        filtered_df.head(recent_periods)['红球5'],
-                        filtered_df.head(recent_periods)['红球6']
-                    ], axis=0).astype(int)
-                    
-                    recent_freq = recent_red_balls.value_counts()
-                    recent_freq_dict = dict(zip(recent_freq.index, recent_freq.values))
-                    recent_score = recent_freq_dict.get(num, 0) / recent_periods * 6 * 100
-                    
-                    # 综合分数
-                    red_scores[num] = hot_weight * base_score + (1 - hot_weight) * recent_score
-                
-                # 计算红球冷门分数（近期未出现的号码得分更高）
-                cold_scores = {}
-                for num in range(1, 34):
-                    if num not in recent_freq_dict:
-                        cold_scores[num] = 100  # 最近20期未出现
-                    else:
-                        # 计算距离最近一次出现的期数
-                        last_occurrence = 0
-                        for i, row in filtered_df.head(recent_periods).iterrows():
-                            red_balls_row = [row['红球1'], row['红球2'], row['红球3'], row['红球4'], row['红球5'], row['红球6']]
-                            if num in red_balls_row:
-                                last_occurrence = i
-                                break
-                        cold_scores[num] = (recent_periods - last_occurrence) / recent_periods * 100
-                
-                # 综合热门和冷门分数
-                combined_scores = {}
-                for num in range(1, 34):
-                    combined_scores[num] = hot_weight * red_scores[num] + cold_weight * cold_scores[num]
-                
-                # 生成多组推荐号码
-                st.markdown("### 🎯 推荐号码组合")
-                
-                # 推荐组合数量
-                num_combinations = 5
-                
-                # 生成推荐组合
-                recommendations = []
-                for i in range(num_combinations):
-                    # 根据得分选择红球
-                    sorted_numbers = sorted(combined_scores.keys(), key=lambda x: combined_scores[x], reverse=True)
-                    
-                    # 选择得分最高的前10个号码，然后随机选择6个
-                    top_numbers = sorted_numbers[:15]
-                    selected_red = sorted(random.sample(top_numbers, 6))
-                    
-                    # 蓝球推荐
-                    blue_freq = filtered_df['蓝球'].value_counts()
-                    blue_freq_dict = dict(zip(blue_freq.index, blue_freq.values))
-                    
-                    # 计算蓝球得分
-                    blue_scores = {}
-                    for num in range(1, 17):
-                        freq = blue_freq_dict.get(num, 0)
-                        blue_scores[num] = freq / total_periods * 100
-                    
-                    # 选择蓝球
-                    sorted_blue = sorted(blue_scores.keys(), key=lambda x: blue_scores[x], reverse=True)
-                    selected_blue = random.choice(sorted_blue[:5])
-                    
-                    recommendations.append({
-                        '组合': f"推荐{i+1}",
-                        '红球': selected_red,
-                        '蓝球': selected_blue,
-                        '红球得分': sum(combined_scores[num] for num in selected_red) / 6,
-                        '蓝球得分': blue_scores[selected_blue]
-                    })
+                # 综合历史频率、近期热度和冷门号码生成推荐组合
+                with profiler.stage('recommend'):
+                    blue_scores = views.blue_stats(dataset, chart_data, range_key).scores()
+                    recommendations = analytics.recommend(reds, blues, hot_weight, cold_weight, count=5,
+                                                          blue=blue_scores)
                 
+                # 回溯时用下一期的实际开奖号码检验推荐结果
+                next_draw = None
+                if as_of is not None:
+                    row = dataset.issue_row(as_of) - 1
+                    next_draw = {'期号': int(dataset.issues[row]), '红球': dataset.reds[row].tolist(),
+                                 '蓝球': int(dataset.blues[row])}
+
                 # 显示推荐结果
+                st.markdown("### 🎯 推荐号码组合")
+                if next_draw is not None:
+                    red_str = ' '.join(f"{num:02d}" for num in next_draw['红球'])
+                    st.caption(f"下一期（第{next_draw['期号']}期）实际开奖：红球 {red_str}，蓝球 {next_draw['蓝球']:02d}")
                 for rec in recommendations:
                     col1, col2 = st.columns([3, 1])
                     with col1:
@@ -1085,6 +762,11 @@ elif selected_analysis == "智能号码推荐":
                         st.markdown("#### 评分")
                         st.markdown(f"**红球评分：** {rec['红球得分']:.1f}")
                         st.markdown(f"**蓝球评分：** {rec['蓝球得分']:.1f}")
+                        if next_draw is not None:
+                            red_hits = len(set(rec['红球']) & set(next_draw['红球']))
+                            blue_hit = rec['蓝球'] == next_draw['蓝球']
+                            prize = games.SSQ.prize((red_hits, int(blue_hit))) or '未中奖'
+                            st.markdown(f"**下一期对照：** 红球中{red_hits}个，蓝球{'中' if blue_hit else '未中'}（{prize}）")
                     st.markdown("---")
                 
                 # 显示推荐依据
@@ -1111,3 +793,32 @@ elif selected_analysis == "智能号码推荐":
 
 # 显示页脚
 st.markdown(footer, unsafe_allow_html=True)
+
+# 记录本会话重跑后仍持有的内存
+memory.sessions.record(session_owner(), dict(
+    session_media, session_state=memory.sizeof({key: value for key, value in st.session_state.items()})))
+
+# 性能调试面板
+if profiler.enabled:
+    with st.sidebar.expander("🛠️ 性能调试", expanded=True):
+        st.caption(f"本次重跑共 {profiler.total_ms:.1f} ms")
+        st.dataframe(pd.DataFrame(profiler.summary()), use_container_width=True, hide_index=True)
+        background = jobs.manager.jobs()
+        if background:
+            st.caption("后台计算任务")
+            st.dataframe(pd.DataFrame([job.summary() for job in background]), use_container_width=True, hide_index=True)
+        st.caption("共享缓存")
+        st.dataframe(pd.DataFrame([cache.stats() for cache in (analytics_cache, chart_cache, export_cache)]),
+                     use_container_width=True, hide_index=True)
+        st.caption(f"本会话持有 {memory.sessions.total(session_owner()) / 1024:.1f} KB"
+                   f"（上限 {config.SESSION_MEMORY_MB:g} MB），共{len(memory.sessions)}个活跃会话")
+        st.dataframe(pd.DataFrame(memory.sessions.summary()), use_container_width=True, hide_index=True)
+    if config.PROFILE_LOG:
+        ctx = get_script_run_ctx()
+        profiler.write_jsonl(
+            config.PROFILE_LOG,
+            session=ctx.session_id if ctx else None,
+            page=selected_analysis,
+            period=selected_period,
+            version=dataset.version,
+        )
@@ -0,0 +1,310 @@
+"""多会话压测：在一个进程内用Streamlit的AppTest同时驱动多个模拟会话，统计重跑延迟、吞吐量和内存峰值
+
+每个模拟会话反复随机操作（切换页面、切换数据范围、拖动滑块、点击"更新最新数据"），每个操作触发一次整页重跑。
+所有会话共享进程内的数据集、缓存、后台刷新线程和媒体文件存储，与一个Streamlit服务进程的情况一致；
+"更新最新数据"请求本地的夹具HTTP服务（合成的开奖历史页面），不访问外网。
+并发级别按给定顺序依次运行，后面的级别使用前面留下的缓存（--clear-caches在每个级别前清空）。
+
+运行：python -m benchmarks.loadtest --sessions 1 4 16 --steps 20 --draws 3000 --output load.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+import uuid
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+UPDATE_LABEL = "🔄 更新最新数据"
+RANGE_LABEL = "选择数据范围"
+# 各操作的权重
+ACTIONS = (('page', 35), ('range', 20), ('slider', 40), ('update', 5))
+
+
+# ---------- 夹具 ----------
+
+def serve_fixture():
+    """在本地随机端口提供开奖历史页面（内容为server.page），返回(server, url)"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = self.server.page.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.page = ''
+    threading.Thread(target=server.serve_forever, name='loadtest-fixture', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/history.shtml'
+
+
+def prepare_environment(workdir, draws, extra):
+    """通过环境变量把应用指向临时目录中的合成数据和夹具服务，返回夹具服务
+
+    ssq.config在导入时读取环境变量，必须在导入ssq（包括benchmarks.synthetic）之前调用。
+    本地CSV为较早的draws期；夹具页面列出最近50期，其中最新的extra期本地没有，点击更新后得到新的数据版本。
+    """
+    server, url = serve_fixture()
+    csv_path = os.path.join(workdir, 'history.csv')
+    os.environ.update({
+        'SSQ_DATA_PATH': csv_path,
+        'SSQ_DB_PATH': os.path.join(workdir, 'ssq.db'),
+        'SSQ_BUNDLE_DIR': os.path.join(workdir, 'bundle'),
+        'SSQ_HISTORY_URL': url,
+        'SSQ_AUTO_REFRESH': '0',
+    })
+
+    from .synthetic import make_history, make_history_csv, make_history_html
+
+    df = make_history(draws + extra, seed=draws)
+    make_history_csv(df.iloc[extra:], csv_path)
+    server.page = make_history_html(df.head(max(extra, 50)))
+    return server
+
+
+# ---------- 模拟会话 ----------
+
+def install_runtime():
+    """所有模拟会话共用一个模拟的Streamlit运行时
+
+    AppTest每次运行都会替换并在结束时清空全局的运行时，多个会话并发时会互相干扰，这里改为只设置一次。
+    """
+    from unittest.mock import MagicMock
+
+    from streamlit import config as st_config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    st_config.set_option('global.appTest', True)
+
+
+def make_session(timeout):
+    """创建一个有独立会话ID的AppTest（AppTest默认所有实例的会话ID相同）"""
+    from streamlit.testing.v1 import AppTest
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    session_id = uuid.uuid4().hex
+
+    class Runner(LocalScriptRunner):
+        def __init__(self, script_path, session_state):
+            super().__init__(script_path, session_state)
+            self._session_id = session_id
+
+    class Session(AppTest):
+        def _run(self, widget_state=None, timeout=None):
+            runner = Runner(self._script_path, self.session_state)
+            self._tree = runner.run(widget_state, self.query_params, timeout or self.default_timeout,
+                                    self._page_hash)
+            self._tree._runner = self
+            return self
+
+    return Session(APP_PATH, default_timeout=timeout)
+
+
+def _slider_value(slider, rng):
+    """滑块范围内的随机值（区间滑块取两个值）"""
+    steps = int(round((slider.max - slider.min) / slider.step))
+
+    def pick():
+        value = slider.min + rng.randint(0, steps) * slider.step
+        return round(value, 6) if isinstance(value, float) else value
+
+    if isinstance(slider.value, (list, tuple)):
+        return sorted((pick(), pick()))
+    return pick()
+
+
+def act(session, rng):
+    """随机执行一个操作（触发一次重跑），返回操作名"""
+    action = rng.choices([name for name, _ in ACTIONS], [weight for _, weight in ACTIONS])[0]
+    if action == 'slider' and not session.slider:
+        action = 'page'
+    if action == 'page':
+        # 选项显示为"图标 页面名"，设置的值为页面名
+        radio = session.sidebar.radio[0]
+        radio.set_value(rng.choice(radio.options).split(' ', 1)[-1]).run()
+    elif action == 'range':
+        select = next(s for s in session.sidebar.selectbox if s.label == RANGE_LABEL)
+        select.set_value(rng.choice([option for option in select.options if option != "自定义范围"])).run()
+    elif action == 'slider':
+        slider = rng.choice(list(session.slider))
+        slider.set_value(_slider_value(slider, rng)).run()
+    else:
+        next(b for b in session.sidebar.button if b.label == UPDATE_LABEL).click().run()
+    return action
+
+
+def run_session(steps, seed, timeout, barrier, records):
+    rng = random.Random(seed)
+    barrier.wait()
+    try:
+        session = make_session(timeout)
+        start = time.perf_counter()
+        session.run()
+        records.append(('first', (time.perf_counter() - start) * 1000, _error(session)))
+        for _ in range(steps):
+            start = time.perf_counter()
+            action = act(session, rng)
+            records.append((action, (time.perf_counter() - start) * 1000, _error(session)))
+    except Exception as e:
+        records.append(('crash', 0.0, f'{type(e).__name__}: {e}'))
+
+
+def _error(session):
+    return str(session.exception[0].value) if session.exception else None
+
+
+# ---------- 统计 ----------
+
+def rss_bytes():
+    """当前进程的常驻内存（Linux读/proc，其他系统退化为历史峰值）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemorySampler(threading.Thread):
+    """后台定时采样常驻内存，记录峰值"""
+
+    def __init__(self, interval=0.05):
+        super().__init__(name='loadtest-memory', daemon=True)
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, rss_bytes())
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    ms = np.asarray(samples)
+    return {
+        'count': len(ms),
+        'p50_ms': round(float(np.percentile(ms, 50)), 1),
+        'p90_ms': round(float(np.percentile(ms, 90)), 1),
+        'p99_ms': round(float(np.percentile(ms, 99)), 1),
+        'max_ms': round(float(ms.max()), 1),
+    }
+
+
+def run_level(sessions, steps, seed, timeout):
+    """sessions个会话同时各执行steps个操作"""
+    from ssq import analytics_cache, chart_cache, export_cache, memory
+
+    gc.collect()
+    rss_start = rss_bytes()
+    sampler = MemorySampler()
+    sampler.start()
+    barrier = threading.Barrier(sessions + 1)
+    records = []
+    threads = [threading.Thread(target=run_session, args=(steps, seed * 1000 + i, timeout, barrier, records),
+                                name=f'loadtest-session-{i}')
+               for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    sampler.stop()
+
+    completed = [record for record in records if record[0] != 'crash']
+    reruns = [ms for action, ms, _ in completed if action != 'first']
+    errors = [f'{action}: {error}' for action, _, error in records if error]
+    return {
+        'sessions': sessions,
+        'reruns': len(completed),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:5],
+        'wall_s': round(wall, 2),
+        'throughput_rps': round(len(completed) / wall, 2) if wall else None,
+        'first_run': percentiles([ms for action, ms, _ in records if action == 'first']),
+        'rerun': percentiles(reruns),
+        'by_action': {name: percentiles([ms for action, ms, _ in records if action == name])
+                      for name, _ in ACTIONS},
+        'rss_start_mb': round(rss_start / 2 ** 20, 1),
+        'rss_peak_mb': round(sampler.peak / 2 ** 20, 1),
+        'session_memory_kb': round(sum(row['total_kb'] for row in memory.sessions.summary()), 1),
+        'caches': [cache.stats() for cache in (analytics_cache, chart_cache, export_cache)],
+    }
+
+
+def print_level(result):
+    rerun = result['rerun'] or {}
+    print(f"{result['sessions']:>8}{result['reruns']:>8}{result['errors']:>7}{result['throughput_rps']:>10}"
+          f"{rerun.get('p50_ms', '-'):>10}{rerun.get('p90_ms', '-'):>10}{rerun.get('p99_ms', '-'):>10}"
+          f"{result['rss_peak_mb']:>11}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streamlit应用多会话压测")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4, 16], help="依次测试的并发会话数")
+    parser.add_argument('--steps', type=int, default=20, help="每个会话的操作次数")
+    parser.add_argument('--draws', type=int, default=3000, help="合成历史数据的期数")
+    parser.add_argument('--extra', type=int, default=1, help="夹具页面中比本地多出的期数")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=120, help="单次重跑的超时（秒）")
+    parser.add_argument('--clear-caches', action='store_true', help="每个并发级别之前清空共享缓存")
+    parser.add_argument('--output', help="结果JSON文件")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    with tempfile.TemporaryDirectory() as workdir:
+        server = prepare_environment(workdir, args.draws, args.extra)
+        try:
+            from ssq import analytics_cache, chart_cache, export_cache
+
+            install_runtime()
+            results = []
+            print(f"{'sessions':>8}{'reruns':>8}{'errors':>7}{'rerun/s':>10}{'p50_ms':>10}{'p90_ms':>10}"
+                  f"{'p99_ms':>10}{'peak_MB':>11}")
+            for sessions in args.sessions:
+                if args.clear_caches:
+                    for cache in (analytics_cache, chart_cache, export_cache):
+                        cache.clear()
+                result = run_level(sessions, args.steps, args.seed, args.timeout)
+                results.append(result)
+                print_level(result)
+        finally:
+            server.shutdown()
+
+    if args.output:
+        report = {'draws': args.draws, 'steps': args.steps, 'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                  'levels': results}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""基准测试：数据加载、数据库读写、启动包载入、校验、筛选、各分析页面的计算、位置统计、蓝球统计、网页解析、图表渲染、组合缩水、显著性检验与号码推荐
+
+运行：python -m benchmarks.run --sizes 100 1000 10000 100000 --output bench.json
+对比：python -m benchmarks.run --compare old.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+
+from ssq import analytics, blue, bundle, charts, chart_specs, combination_filter, positional, significance, vega, views
+from ssq.dataset import Dataset
+from ssq.storage import HistoryStore
+from ssq.data import RED_COLUMNS, BLUE_COLUMN, load_history_csv, parse_history_html, filter_history, validate_history
+
+from .synthetic import make_history, make_history_csv, make_history_html
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+
+def timed(fn, repeat):
+    """运行repeat次，返回耗时统计（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'repeat': repeat,
+    }
+
+
+# ---------- 各页面的计算（与app.py中各页面调用的统计一致） ----------
+# 每个页面函数在新的ChartData（未命中缓存）上计算页面的统计和全部图表规格，返回图表规格列表，
+# 再交给render_page即为页面的完整渲染路径（Vega-Lite后端在服务端只做转换）
+
+def red_page(df, dataset):
+    """红球页：频率表、各图表规格、遗漏与位置统计"""
+    data = chart_specs.ChartData(df, dataset)
+    analytics.frequency_table(data.slots.number_counts(), data.periods, analytics.RED_PICKS)
+    specs = [chart_specs.red_frequency(data), chart_specs.red_heatmap(data), chart_specs.red_zones(data)]
+    data.slots.missing(10)
+    specs.append(chart_specs.slot_frequency(data))
+    data.slots.summary()
+    specs += [chart_specs.slot_omission(data), chart_specs.slot_trend(data, views.DEFAULT_SLOT_WINDOW),
+              chart_specs.slot_quantiles(data, views.DEFAULT_SLOT, views.DEFAULT_SLOT_WINDOW)]
+    return specs
+
+
+def blue_page(df, dataset):
+    """蓝球页：蓝球统计、各图表规格、间隔表与遗漏"""
+    data = chart_specs.ChartData(df, dataset)
+    data.blue.frequency_table()
+    specs = [build(data) for build in (
+        chart_specs.blue_frequency, chart_specs.blue_parity, chart_specs.blue_size, chart_specs.blue_mod4,
+        chart_specs.blue_mod5, chart_specs.blue_trend, chart_specs.blue_intervals)]
+    specs.append(chart_specs.blue_rolling(data, views.DEFAULT_BLUE_NUMBER, views.DEFAULT_BLUE_WINDOW))
+    data.blue.interval_table()
+    data.blue_slots.missing(10)
+    return specs
+
+
+def blue_engine(blues):
+    """蓝球页的全部统计：一次分组后的分布、间隔、重号与滚动频率"""
+    stats = blue.BlueStats(blues)
+    stats.frequency_table()
+    stats.parity()
+    stats.size()
+    stats.residues(4)
+    stats.residues(5)
+    stats.repeat_rate()
+    stats.interval_table()
+    stats.interval_distribution()
+    stats.rolling(20)
+
+
+def combination_page(df, dataset):
+    """号码组合页：各图表规格、和值统计与冷号（不含组合缩水，见combination_filter）"""
+    data = chart_specs.ChartData(df, dataset)
+    specs = [build(data) for build in (
+        chart_specs.odd_even, chart_specs.small_big, chart_specs.consecutive, chart_specs.sum_histogram)]
+    analytics.sum_statistics(analytics.red_sums(data.reds))
+    specs.append(chart_specs.span_histogram(data))
+    combination_filter.cold_numbers(data.slots.number_omissions(), views.DEFAULT_MIN_OMISSION)
+    return specs
+
+
+def trend_page(df, dataset):
+    """历史趋势页（走势图表）：各图表规格"""
+    data = chart_specs.ChartData(df, dataset)
+    return [chart_specs.pool_trend(data), chart_specs.sum_trend(data, views.DEFAULT_SUM_WINDOW),
+            chart_specs.blue_size_trend(data), chart_specs.odd_even_trend(data), chart_specs.zone_trend(data),
+            chart_specs.number_heat(data, views.DEFAULT_HEAT_NUMBER)]
+
+
+PAGES = {'red': red_page, 'blue': blue_page, 'combination': combination_page, 'trend': trend_page}
+
+
+def render_page(page, df, dataset):
+    """页面的统计、图表规格，以及全部图表转换为Vega-Lite"""
+    return [json.dumps(vega.to_vega_lite(spec)) for spec in page(df, dataset)]
+
+
+def position_page(positions):
+    """与页面相同的位置统计（全部数据范围）：频率矩阵、汇总表和遗漏"""
+    window = positional.SlotWindow(positions, 0, len(positions))
+    window.frequency()
+    window.summary()
+    window.omissions()
+
+
+def render_frequency_chart(data):
+    """与页面相同的方式生成红球频率图表规格并渲染为PNG"""
+    charts.spec_png(chart_specs.red_frequency(data))
+
+
+def vega_frequency_chart(data):
+    """生成红球频率图表规格并转换为Vega-Lite（浏览器端渲染，服务端只做转换）"""
+    json.dumps(vega.to_vega_lite(chart_specs.red_frequency(data)))
+
+
+def bench_size(draws, repeat, max_parse, chart_repeat, tmpdir):
+    df = make_history(draws, seed=draws)
+    csv_path = os.path.join(tmpdir, f'history_{draws}.csv')
+    make_history_csv(df, csv_path)
+    df = load_history_csv(csv_path)
+    reds, blues = df[RED_COLUMNS].to_numpy(), df[BLUE_COLUMN].to_numpy()
+    start_date, end_date = df['开奖日期'].iloc[len(df) // 2].date(), df['开奖日期'].iloc[0].date()
+    chart_data = chart_specs.ChartData(df)
+    # 与应用一样，前缀和表在载入数据集时生成一次，页面只做按范围的查询
+    dataset = Dataset(df)
+    dataset.index('red')
+    dataset.index('blue')
+
+    positions = positional.PositionIndex(reds)
+    store = HistoryStore(os.path.join(tmpdir, f'history_{draws}.db'))
+    store.upsert(df)
+    # 只含数组的启动包（不渲染图表），与storage.load对比从磁盘得到数据集和索引的耗时
+    bundle_dir = os.path.join(tmpdir, f'bundle_{draws}')
+    bundle.build(bundle_dir, store=store, warm=False)
+    results = {
+        'load_initial_data': timed(lambda: load_history_csv(csv_path), repeat),
+        'storage.upsert': timed(lambda: store.upsert(df), max(1, repeat // 2)),
+        'storage.load': timed(lambda: store.frame(), repeat),
+        'storage.recent_100': timed(lambda: store.arrays(limit=100), repeat),
+        'bundle.load': timed(lambda: bundle.load(bundle_dir, store=store), repeat),
+        'validate': timed(lambda: validate_history(df), repeat),
+        'filter_data.recent_100': timed(lambda: filter_history(df, "最近100期"), repeat),
+        'filter_data.custom_range': timed(lambda: filter_history(df, "自定义范围", start_date, end_date), repeat),
+        'blue.stats': timed(lambda: blue_engine(blues), repeat),
+        'positions.build': timed(lambda: positional.PositionIndex(reds), repeat),
+        'positions.full_range': timed(lambda: position_page(positions), repeat),
+        'recommend': timed(lambda: analytics.recommend(reds, blues, rng=random.Random(0)), repeat),
+        'chart.render_png': timed(lambda: charts.render_png(lambda fig, ax: None), chart_repeat),
+        'chart.red_frequency': timed(lambda: render_frequency_chart(chart_data), chart_repeat),
+        'chart.red_frequency.vega': timed(lambda: vega_frequency_chart(chart_data), repeat),
+    }
+    for name, page in PAGES.items():
+        results[f'page.{name}'] = timed(lambda: page(df, dataset), repeat)
+        results[f'page.{name}.vega'] = timed(lambda: render_page(page, df, dataset), repeat)
+    cold = combination_filter.cold_numbers(analytics.red_omissions(reds), 10)
+    results['combination_filter'] = timed(lambda: combination_filter.filter_combinations(
+        sum_range=(80, 120), span_range=(20, 30), odd_counts=(2, 3, 4), small_counts=(2, 3, 4),
+        zone_ranges=[(1, 3), (1, 3), (1, 3)], consecutive_range=(0, 1), exclude=(1, 33), require=(7,),
+        cold=cold, cold_range=(0, 1)), repeat)
+    if draws <= max_parse:
+        # 模拟耗时与期数成正比，和网页解析一样只在较小的数据量上测试
+        results['significance.10000'] = timed(
+            lambda: significance.significance_report(reds, blues, resamples=10000, seed=0), chart_repeat)
+        html = make_history_html(df)
+        results['fetch_latest_data.parse'] = timed(lambda: parse_history_html(html), max(1, repeat // 2))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeat, max_parse, chart_repeat):
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+        },
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for draws in sizes:
+            print(f"⏱️ {draws}期 ...", file=sys.stderr)
+            report['results'][str(draws)] = bench_size(draws, repeat, max_parse, chart_repeat, tmpdir)
+    return report
+
+
+def compare(old_path, new_path):
+    """对比两次结果的中位数耗时，输出新/旧比值"""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)['results']
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)['results']
+    print(f"{'期数':>8}  {'项目':<28}{'旧(ms)':>12}{'新(ms)':>12}{'比值':>8}")
+    for size, cases in new.items():
+        for name, stats in cases.items():
+            before = old.get(size, {}).get(name)
+            if before is None:
+                continue
+            ratio = stats['median_ms'] / before['median_ms'] if before['median_ms'] else float('nan')
+            print(f"{size:>8}  {name:<28}{before['median_ms']:>12.3f}{stats['median_ms']:>12.3f}{ratio:>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="双色球分析基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="合成历史数据的期数")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--chart-repeat', type=int, default=3)
+    parser.add_argument('--max-parse', type=int, default=10000, help="网页解析只测不超过该期数的数据")
+    parser.add_argument('--output', help="结果JSON文件，默认输出到标准输出")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="对比两次结果")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    warnings.filterwarnings('ignore')
+    report = run(args.sizes, args.repeat, args.max_parse, args.chart_repeat)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""基准测试用的合成开奖数据与网页夹具"""
+
+import numpy as np
+import pandas as pd
+
+from ssq.data import RED_COLUMNS, BLUE_COLUMN, HISTORY_COLUMNS
+
+
+def make_history(draws, seed=0):
+    """生成draws期合成历史数据，格式与data/initial_data.csv一致（最新一期在前）"""
+    rng = np.random.default_rng(seed)
+    # 每行对33个号码取随机键，取最小的6个即为不放回抽样
+    reds = np.sort(np.argsort(rng.random((draws, 33)), axis=1)[:, :6] + 1, axis=1)
+    blues = rng.integers(1, 17, size=draws)
+
+    # 开奖间隔2-3天，以2026-02-10为最后一期往前推；期数过多超出pandas日期范围时改为每天一期
+    gaps = rng.choice([2, 3], size=draws) if draws < 40000 else np.ones(draws, dtype=np.int64)
+    offsets = np.cumsum(gaps) - gaps.sum()
+    dates = pd.Timestamp('2026-02-10') + pd.to_timedelta(offsets, unit='D')
+    years = dates.year.to_numpy()
+    seq = pd.Series(1, index=np.arange(draws)).groupby(years).cumsum().to_numpy()
+    issues = years * 1000 + seq
+
+    df = pd.DataFrame(reds, columns=RED_COLUMNS)
+    df.insert(0, '期号', issues)
+    df[BLUE_COLUMN] = blues
+    df['开奖日期'] = dates
+    df['奖池(元)'] = rng.integers(1_000_000_00, 3_000_000_000, size=draws).astype(float)
+    return df[HISTORY_COLUMNS].iloc[::-1].reset_index(drop=True)
+
+
+def make_history_csv(df, path):
+    """按仓库CSV格式写出（号码补零）"""
+    out = df.copy()
+    for col in RED_COLUMNS + [BLUE_COLUMN]:
+        out[col] = out[col].map('{:02d}'.format)
+    out['奖池(元)'] = out['奖池(元)'].astype(np.int64)
+    out['开奖日期'] = out['开奖日期'].dt.strftime('%Y-%m-%d')
+    out.to_csv(path, index=False)
+
+
+def make_history_html(df):
+    """生成与500.com历史页面结构一致的表格HTML（两行表头 + 每期16列）"""
+    rows = []
+    for row in df.itertuples(index=False):
+        issue, *balls, date, pool = row
+        cells = [str(issue)] + [f'{b:02d}' for b in balls] + \
+            ['', f'{int(pool):,}', '5', '7,000,000', '120', '200,000', '350,000,000', date.strftime('%Y-%m-%d')]
+        rows.append('<tr class="t_tr1">' + ''.join(f'<td>{c}</td>' for c in cells) + '</tr>')
+    header = '<tr><td>期号</td></tr><tr><td>红球</td></tr>'
+    return f'<html><body><table class="tb_data">{header}{"".join(rows)}</table></body></html>'
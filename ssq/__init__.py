@@ -0,0 +1,13 @@
+"""双色球历史数据分析核心模块"""
+
+from .data import (
+    RED_COLUMNS, BLUE_COLUMN, BALL_COLUMNS, HISTORY_COLUMNS, PERIOD_OPTIONS, PRESET_PERIODS,
+    load_history_csv, fetch_history_html, parse_history_html, merge_history, filter_history, validate_history,
+)
+from .games import Area, Game, GAMES, SSQ, DLT, FC3D, get_game
+from .dataset import Dataset, DatasetHolder
+from .cache import VersionedCache, analytics_cache, chart_cache, export_cache
+from .refresher import DrawRefresher, next_refresh_time
+from .validation import ValidationReport
+from .storage import HistoryStore, load_history
+from . import analytics
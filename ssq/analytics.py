@@ -0,0 +1,291 @@
+"""统计计算（纯NumPy/Pandas实现，不依赖Streamlit）
+
+所有函数都接收数组输入：reds为形如(期数, 6)的红球数组，blues为长度为期数的蓝球数组，
+行顺序与页面一致，即第0行为最新一期。
+号码区的参数来自games.SSQ；区间、大小、比例等函数可传入其他玩法号码区的参数（如大乐透前区每期5个）。
+"""
+
+import random
+
+import numpy as np
+import pandas as pd
+
+from .games import SSQ
+
+RED = SSQ.area('red')
+BLUE = SSQ.area('blue')
+
+RED_NUMBERS = RED.size
+BLUE_NUMBERS = BLUE.size
+RED_PICKS = RED.picks
+
+# 红球区间与大小、蓝球大小的分界
+RED_ZONES = RED.zones
+RED_ZONE_NAMES = RED.zone_names
+RED_SMALL_MAX = RED.small_max
+BLUE_SMALL_MAX = BLUE.small_max
+
+
+def _reds(reds):
+    """(期数, 每期个数)的二维数组；一维输入按每期6个红球整理"""
+    reds = np.asarray(reds)
+    return reds if reds.ndim == 2 else reds.reshape(-1, RED_PICKS)
+
+
+# ---------- 频率 ----------
+
+def number_counts(balls, size):
+    """统计1..size每个号码的出现次数，返回长度为size的数组"""
+    balls = np.asarray(balls).ravel()
+    return np.bincount(balls, minlength=size + 1)[1:size + 1]
+
+
+def red_counts(reds):
+    return number_counts(reds, RED_NUMBERS)
+
+
+def blue_counts(blues):
+    return number_counts(blues, BLUE_NUMBERS)
+
+
+def frequency_table(counts, periods, per_draw):
+    """把出现次数整理为 号码/出现次数/出现频率 表，只保留出现过的号码"""
+    numbers = np.flatnonzero(counts) + 1
+    hits = counts[numbers - 1]
+    return pd.DataFrame({
+        '号码': numbers,
+        '出现次数': hits,
+        '出现频率': (hits / periods * per_draw * 100).round(2) if periods else np.zeros(len(hits)),
+    })
+
+
+def red_frequency_table(reds):
+    """红球频率表"""
+    reds = _reds(reds)
+    return frequency_table(red_counts(reds), len(reds), RED_PICKS)
+
+
+def blue_frequency_table(blues):
+    """蓝球频率表"""
+    blues = np.asarray(blues)
+    return frequency_table(blue_counts(blues), len(blues), 1)
+
+
+# ---------- 区间与比例 ----------
+
+def zone_counts(reds, zones=RED_ZONES):
+    """每期红球落在各区间的个数，返回(期数, 区间数)"""
+    reds = _reds(reds)
+    return np.stack([((reds >= lo) & (reds <= hi)).sum(axis=1) for lo, hi in zones], axis=1)
+
+
+def zone_totals(reds, zones=RED_ZONES):
+    """各区间的总出现次数"""
+    return zone_counts(reds, zones).sum(axis=0)
+
+
+def odd_counts(reds):
+    """每期红球中奇数的个数"""
+    return (_reds(reds) % 2 == 1).sum(axis=1)
+
+
+def small_counts(reds, small_max=RED_SMALL_MAX):
+    """每期红球中小号（默认1-16）的个数"""
+    return (_reds(reds) <= small_max).sum(axis=1)
+
+
+def ratio_labels(counts, total=RED_PICKS):
+    """把个数转换为"k:(total-k)"形式的比例标签"""
+    counts = np.asarray(counts)
+    return np.char.add(np.char.add(counts.astype(str), ':'), (total - counts).astype(str))
+
+
+def ratio_distribution(counts, total=RED_PICKS):
+    """比例分布，索引为比例标签，按标签排序"""
+    return pd.Series(ratio_labels(counts, total)).value_counts().sort_index()
+
+
+def value_distribution(values):
+    """数值分布，按数值排序"""
+    return pd.Series(np.asarray(values)).value_counts().sort_index()
+
+
+def odd_even_distribution(reds):
+    return ratio_distribution(odd_counts(reds))
+
+
+def small_big_distribution(reds):
+    return ratio_distribution(small_counts(reds))
+
+
+def consecutive_pairs(reds):
+    """每期红球中相邻号码（差为1）的对数"""
+    ordered = np.sort(_reds(reds), axis=1)
+    return (np.diff(ordered, axis=1) == 1).sum(axis=1)
+
+
+# ---------- 和值与跨度 ----------
+
+def red_sums(reds):
+    return _reds(reds).sum(axis=1, dtype=np.int64)
+
+
+def red_spans(reds):
+    reds = _reds(reds)
+    return (reds.max(axis=1) - reds.min(axis=1)).astype(np.int64)
+
+
+def sum_statistics(sums):
+    """和值统计：平均值、中位数、最小值、最大值、标准差"""
+    stats = pd.Series(np.asarray(sums)).describe()
+    return {
+        '平均值': round(stats['mean'], 2),
+        '中位数': round(stats['50%'], 2),
+        '最小值': round(stats['min'], 2),
+        '最大值': round(stats['max'], 2),
+        '标准差': round(stats['std'], 2),
+    }
+
+
+# ---------- 遗漏 ----------
+
+def missing_numbers(balls, recent, size):
+    """最近recent期内没有出现过的号码"""
+    recent_balls = np.asarray(balls)[:recent]
+    return [int(n) for n in np.flatnonzero(number_counts(recent_balls, size) == 0) + 1]
+
+
+def missing_reds(reds, recent):
+    return missing_numbers(_reds(reds), recent, RED_NUMBERS)
+
+
+def missing_blues(blues, recent):
+    return missing_numbers(blues, recent, BLUE_NUMBERS)
+
+
+def presence_matrix(balls, size):
+    """每期每个号码是否出现，返回(期数, size)的布尔矩阵"""
+    balls = np.asarray(balls)
+    if balls.ndim == 1:
+        balls = balls[:, None]
+    presence = np.zeros((len(balls), size + 1), dtype=bool)
+    presence[np.arange(len(balls))[:, None], balls] = True
+    return presence[:, 1:]
+
+
+def omissions(balls, size):
+    """每个号码的当前遗漏期数（最近一期出现为0，从未出现为总期数）"""
+    presence = presence_matrix(balls, size)
+    if len(presence) == 0:
+        return np.zeros(size, dtype=np.int64)
+    seen = presence.any(axis=0)
+    return np.where(seen, presence.argmax(axis=0), len(presence))
+
+
+def red_omissions(reds):
+    return omissions(_reds(reds), RED_NUMBERS)
+
+
+def blue_omissions(blues):
+    return omissions(blues, BLUE_NUMBERS)
+
+
+# ---------- 趋势 ----------
+
+def moving_average(values, window):
+    """按行顺序的移动平均，前window-1个位置为NaN（与pandas rolling一致）"""
+    return pd.Series(np.asarray(values, dtype=float)).rolling(window=window).mean().to_numpy()
+
+
+def blue_parity_counts(blues):
+    """蓝球偶数、奇数个数"""
+    blues = np.asarray(blues)
+    even = int((blues % 2 == 0).sum())
+    return even, len(blues) - even
+
+
+def blue_size_counts(blues):
+    """蓝球小号（1-8）、大号（9-16）个数"""
+    blues = np.asarray(blues)
+    small = int((blues <= BLUE_SMALL_MAX).sum())
+    return small, len(blues) - small
+
+
+def blue_size_trend(blues, dates):
+    """按开奖日期统计蓝球大小，返回列为 小/大 的表"""
+    blues = np.asarray(blues)
+    small = blues <= BLUE_SMALL_MAX
+    trend = pd.DataFrame({'小': small.astype(int), '大': (~small).astype(int)}, index=pd.Index(dates, name='开奖日期'))
+    return trend.groupby(level=0).sum()
+
+
+def odd_even_trend(reds, dates):
+    """每期奇数、偶数个数"""
+    odd = odd_counts(reds)
+    return pd.DataFrame({'奇数': odd, '偶数': RED_PICKS - odd}, index=pd.Index(dates, name='开奖日期'))
+
+
+def zone_trend(reds, dates):
+    """每期三个区间的个数"""
+    return pd.DataFrame(zone_counts(reds), columns=list(RED_ZONE_NAMES), index=pd.Index(dates, name='开奖日期'))
+
+
+def number_heat(reds, number, window=10):
+    """某个红球的热度：最近window期出现比例 × 10"""
+    presence = (_reds(reds) == number).any(axis=1)
+    return moving_average(presence, window) * 10
+
+
+# ---------- 推荐 ----------
+
+def red_scores(reds, hot_weight=0.7, cold_weight=0.3, recent_periods=20):
+    """计算每个红球的综合得分，返回长度为33的数组（下标0对应号码1）"""
+    reds = _reds(reds)
+    total_periods = len(reds)
+    recent_periods = min(recent_periods, total_periods)
+
+    # 基础分数：历史出现频率；近期热度：最近recent_periods期的出现频率
+    base_score = red_counts(reds) / total_periods * RED_PICKS * 100
+    recent_counts = red_counts(reds[:recent_periods])
+    recent_score = recent_counts / recent_periods * RED_PICKS * 100
+    hot_scores = hot_weight * base_score + (1 - hot_weight) * recent_score
+
+    # 冷门分数：近期未出现为100，否则按最近一次出现的位置递减
+    last_seen = omissions(reds[:recent_periods], RED_NUMBERS)
+    cold_scores = np.where(recent_counts == 0, 100.0,
+                           (recent_periods - last_seen) / recent_periods * 100)
+
+    return hot_weight * hot_scores + cold_weight * cold_scores
+
+
+def blue_scores(blues):
+    """每个蓝球的频率得分，返回长度为16的数组"""
+    blues = np.asarray(blues)
+    return blue_counts(blues) / len(blues) * 100
+
+
+def recommend(reds, blues, hot_weight=0.7, cold_weight=0.3, count=5, recent_periods=20, rng=None, blue=None):
+    """生成推荐号码组合：红球从得分前15中随机取6个，蓝球从得分前5中随机取1个
+
+    blue为已算好的蓝球得分（如缓存的BlueStats.scores()），不提供时按blues计算。
+    """
+    rng = rng or random
+    combined = red_scores(reds, hot_weight, cold_weight, recent_periods)
+    blue = blue_scores(blues) if blue is None else np.asarray(blue)
+
+    # 稳定排序，得分相同时号码小的在前
+    top_red = [int(n) + 1 for n in np.argsort(-combined, kind='stable')[:15]]
+    top_blue = [int(n) + 1 for n in np.argsort(-blue, kind='stable')[:5]]
+
+    recommendations = []
+    for i in range(count):
+        selected_red = sorted(rng.sample(top_red, RED_PICKS))
+        selected_blue = rng.choice(top_blue)
+        recommendations.append({
+            '组合': f"推荐{i+1}",
+            '红球': selected_red,
+            '蓝球': selected_blue,
+            '红球得分': float(combined[np.array(selected_red) - 1].mean()),
+            '蓝球得分': float(blue[selected_blue - 1]),
+        })
+    return recommendations
@@ -0,0 +1,119 @@
+"""蓝球统计：对一个数据范围的蓝球序列做一次分组，得到页面和推荐需要的全部蓝球统计
+
+数据按开奖日期从新到旧排列（第0行为最新一期）。构造时只做一次bincount和一次稳定排序：
+排序后同一号码的行号连续且递增，相邻两项之差即该号码相邻两次出现的间隔（间隔1为连续两期重号）。
+频率、奇偶、大小、除4/除5余数分布都由16个号码的次数直接汇总；滚动频率在需要时按前缀和计算。
+对象只保存长度为16的小数组和蓝球序列本身，可以按数据范围放进共享缓存（以及启动包）。
+"""
+
+import numpy as np
+import pandas as pd
+
+from . import analytics
+from .analytics import BLUE
+
+# 间隔分布中单独统计的最大间隔，更长的合并为一列
+MAX_GAP = 30
+
+
+class BlueStats:
+    """某个数据范围的蓝球统计"""
+
+    def __init__(self, blues, area=BLUE):
+        self.area = area
+        self.blues = np.asarray(blues, dtype=np.int8)
+        self.periods = len(self.blues)
+        self.numbers = area.numbers
+        codes = area.encode(self.blues).astype(np.intp)
+        self.counts = np.bincount(codes, minlength=area.size + 1)[1:]
+
+        # 按号码分组的行号（组内从新到旧）；组内相邻两项之差为间隔
+        order = np.argsort(codes, kind='stable')
+        grouped = codes[order]
+        same = grouped[1:] == grouped[:-1]
+        self.gap_codes = grouped[1:][same]
+        self.gaps = np.diff(order)[same]
+        # 每个号码最近一次出现的行号即当前遗漏，从未出现为总期数
+        self.omissions = np.full(area.size, self.periods)
+        present = self.counts > 0
+        self.omissions[present] = order[np.searchsorted(grouped, np.flatnonzero(present) + 1)]
+        self.gap_counts = np.bincount(self.gap_codes, minlength=area.size + 1)[1:]
+
+    # ---------- 分布 ----------
+
+    def frequency_table(self):
+        """号码/出现次数/出现频率（只保留出现过的号码）"""
+        return analytics.frequency_table(self.counts, self.periods, 1)
+
+    def scores(self):
+        """推荐使用的频率得分（与analytics.blue_scores相同）"""
+        return self.counts / max(self.periods, 1) * 100
+
+    def parity(self):
+        """偶数、奇数个数"""
+        even = int(self.counts[self.numbers % 2 == 0].sum())
+        return even, self.periods - even
+
+    def size(self):
+        """小号、大号个数"""
+        small = int(self.counts[self.numbers <= self.area.small_max].sum())
+        return small, self.periods - small
+
+    def residues(self, k):
+        """按号码除以k的余数分组的出现次数，索引为余数"""
+        totals = np.bincount(self.numbers % k, weights=self.counts, minlength=k).astype(np.int64)
+        return pd.Series(totals, index=pd.Index(range(k), name=f'除{k}余数'))
+
+    # ---------- 间隔与重号 ----------
+
+    @property
+    def pairs(self):
+        """相邻两期的对数"""
+        return max(self.periods - 1, 0)
+
+    @property
+    def repeats(self):
+        """连续两期蓝球相同的次数"""
+        return int((self.gaps == 1).sum())
+
+    def repeat_rate(self):
+        """重号率（%），无规律时约为1/16"""
+        return round(self.repeats / self.pairs * 100, 2) if self.pairs else 0.0
+
+    def interval_table(self):
+        """各号码的出现次数、相邻两次出现的间隔统计、重号次数和当前遗漏"""
+        groups = np.split(self.gaps, np.cumsum(self.gap_counts)[:-1])
+
+        def stat(func):
+            return [round(float(func(g)), 2) if len(g) else np.nan for g in groups]
+
+        return pd.DataFrame({
+            '号码': self.numbers,
+            '出现次数': self.counts,
+            '平均间隔': stat(np.mean),
+            '中位间隔': stat(np.median),
+            '最短间隔': stat(np.min),
+            '最长间隔': stat(np.max),
+            '重号次数': np.bincount(self.gap_codes[self.gaps == 1], minlength=self.area.size + 1)[1:],
+            '当前遗漏': self.omissions,
+        })
+
+    def interval_distribution(self, max_gap=MAX_GAP):
+        """间隔分布矩阵(号码, max_gap)：第g-1列为间隔g的次数，最后一列为间隔不小于max_gap的次数"""
+        gaps = np.minimum(self.gaps, max_gap) - 1
+        counts = np.bincount((self.gap_codes - 1) * max_gap + gaps, minlength=self.area.size * max_gap)
+        return counts.reshape(self.area.size, max_gap)
+
+    # ---------- 滚动频率 ----------
+
+    def rolling(self, window):
+        """每期最近window期（含当期）各号码的出现次数，形状(期数, 16)，最早的window-1期为NaN"""
+        codes = self.area.encode(self.blues).astype(np.intp)
+        prefix = np.zeros((self.periods + 1, self.area.size), dtype=np.int32)
+        prefix[np.arange(1, self.periods + 1), codes - 1] = 1
+        np.cumsum(prefix, axis=0, out=prefix)
+        rolling = np.full((self.periods, self.area.size), np.nan)
+        valid = self.periods - window + 1
+        if valid > 0:
+            rolling[:valid] = prefix[window:window + valid] - prefix[:valid]
+        return rolling
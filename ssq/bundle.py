@@ -0,0 +1,347 @@
+"""预构建的启动包：新容器的第一个访问者不必再解析数据、生成索引、渲染默认图表
+
+构建：python -m ssq.bundle build（数据更新后重新构建；查看：python -m ssq.bundle info）
+
+启动包是一个目录：
+- 每个数组一个.npy文件（开奖数据、各号码区的前缀和表、全部红球组合的特征表），启动时以内存映射方式只读打开，
+  多个应用进程共享同一份页缓存；
+- views.json和views.npz为各预设数据范围、默认参数下的统计表、图表规格、渲染结果（构建时的CHART_BACKEND）
+  和默认条件的组合缩水结果：结构以JSON保存，其中的数组、表格列和PNG字节存放在npz中（allow_pickle=False）。
+  启动包目录可能被其他进程写入，载入时只解析数据、不执行任何代码（不使用pickle）；
+  无法识别的内容按启动包损坏处理。
+- manifest.json记录格式版本、玩法、数据版本（Dataset.version）和数据来源的指纹。
+开奖数据和前缀和表按数据集的玩法逐个号码区保存；组合特征表和预先算好的页面只有双色球有。
+启动时先比对数据来源的指纹（数据库的校验和；数据库为空时为CSV文件的SHA1），
+再比对由数组算出的数据版本，任何一项不一致都放弃启动包，按原流程从数据库加载。
+load只读取并校验启动包，install才写入数据库和进程内的缓存，测试和基准测试可以只调用load。
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from . import blue, charts, combination_filter, config, storage, views
+from .cache import analytics_cache, chart_cache
+from .dataset import Dataset
+from .games import SSQ
+from .positional import PositionIndex
+
+logger = logging.getLogger(__name__)
+
+# 目录结构或数组含义变化时递增，旧的启动包随即失效
+FORMAT = 4
+MANIFEST = 'manifest.json'
+VIEWS = 'views.json'
+VIEW_ARRAYS = 'views.npz'
+
+
+def file_sha1(path):
+    """文件内容的SHA1，文件不存在时为None"""
+    if not path or not os.path.exists(path):
+        return None
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build(path=None, store=None, warm=True):
+    """由数据库中的全部数据生成启动包，返回manifest
+
+    warm为False时只保存数组，不预先计算页面的统计和图表。
+    先写到同一目录下的临时目录再整体替换，正在运行的应用不会读到写了一半的启动包。
+    """
+    path = path or config.BUNDLE_DIR
+    store = store if store is not None else storage.get_store()
+    start = time.perf_counter()
+    # 与应用启动时相同，数据库中的数据先经过校验
+    game = store.game
+    dataset = Dataset(storage.load_history(store), game=game)
+    arrays = {'issues': dataset.issues, **dataset.balls,
+              'dates': dataset.df['开奖日期'].to_numpy(dtype='datetime64[ns]'),
+              'pools': dataset.df['奖池(元)'].to_numpy(dtype=float)}
+    for area in game.areas:
+        index = dataset.index(area.name)
+        arrays[f'index.{area.name}.prefix'] = index.prefix
+        arrays[f'index.{area.name}.values'] = index.values
+    if game is SSQ:
+        for name, arr in combination_filter.get_table().arrays().items():
+            arrays[f'combinations.{name}'] = arr
+
+    cached = {'analytics': [], 'charts': []}
+    if warm and game is SSQ:
+        charts.ensure_matplotlib_chinese()
+        views.warm_default_views(dataset)
+        cached = {'analytics': analytics_cache.entries(dataset.cache_version),
+                  'charts': chart_cache.entries(dataset.cache_version)}
+
+    manifest = {
+        'format': FORMAT,
+        'game': game.key,
+        'version': dataset.version,
+        'periods': len(dataset),
+        'latest_issue': dataset.latest_issue,
+        'source': store.checksum(),
+        'csv': file_sha1(config.DATA_PATH),
+        'chart_backend': config.CHART_BACKEND,
+        'views': {name: len(entries) for name, entries in cached.items()},
+        'arrays': {name: {'dtype': str(arr.dtype), 'shape': list(arr.shape)} for name, arr in arrays.items()},
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.bundle-', dir=parent)
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f'{name}.npy'), np.ascontiguousarray(arr), allow_pickle=False)
+        write_views(tmp, cached)
+        manifest['build_seconds'] = round(time.perf_counter() - start, 2)
+        with open(os.path.join(tmp, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        if os.path.exists(path):
+            old = tempfile.mkdtemp(prefix='.bundle-old-', dir=parent)
+            os.replace(path, os.path.join(old, 'bundle'))
+            os.replace(tmp, path)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return manifest
+
+
+# ---------- 预先算好的页面（views） ----------
+
+def write_views(path, views):
+    """把views（{名称: [(缓存键, 值)]}）写为path下的views.json和views.npz"""
+    arrays = {}
+    encoded = _encode(views, arrays)
+    np.savez(os.path.join(path, VIEW_ARRAYS), **arrays)
+    with open(os.path.join(path, VIEWS), 'w', encoding='utf-8') as f:
+        json.dump(encoded, f, ensure_ascii=False)
+
+
+def read_views(path, game=SSQ):
+    """读取write_views写入的views；内容无法识别时抛出ValueError"""
+    with open(os.path.join(path, VIEWS), encoding='utf-8') as f:
+        encoded = json.load(f)
+    with np.load(os.path.join(path, VIEW_ARRAYS), allow_pickle=False) as arrays:
+        return _decode(encoded, arrays, game)
+
+
+def _store(arrays, arr):
+    if arr.dtype == object:
+        if not all(isinstance(item, str) for item in arr.flat):
+            raise TypeError("启动包只能保存数值、日期和字符串数组")
+        arr = arr.astype(str)
+    name = f'a{len(arrays)}'
+    arrays[name] = arr
+    return name
+
+
+def _encode(value, arrays):
+    """转换为可JSON序列化的结构，数组存入arrays；特殊类型以{'$类型': 内容}表示"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_encode(item, arrays) for item in value]
+    if isinstance(value, tuple):
+        return {'$tuple': [_encode(item, arrays) for item in value]}
+    if isinstance(value, dict):
+        if all(isinstance(k, str) and not k.startswith('$') for k in value):
+            return {k: _encode(v, arrays) for k, v in value.items()}
+        return {'$dict': [[_encode(k, arrays), _encode(v, arrays)] for k, v in value.items()]}
+    if isinstance(value, (bytes, bytearray)):
+        return {'$bytes': _store(arrays, np.frombuffer(value, dtype=np.uint8))}
+    if isinstance(value, np.ndarray):
+        return {'$array': _store(arrays, value), 'object': value.dtype == object}
+    if isinstance(value, pd.DataFrame):
+        index = value.index
+        return {'$frame': {
+            'columns': _encode(list(value.columns), arrays),
+            'columns_name': _encode(value.columns.name, arrays),
+            'data': [_encode(value.iloc[:, i].to_numpy(), arrays) for i in range(value.shape[1])],
+            'index': ({'range': [index.start, index.stop, index.step]} if isinstance(index, pd.RangeIndex)
+                      else {'values': _encode(index.to_numpy(), arrays)}),
+            'index_name': _encode(index.name, arrays),
+        }}
+    if isinstance(value, blue.BlueStats):
+        # 由蓝球数组重新统计（只是一次bincount和排序）
+        return {'$blue_stats': {'area': value.area.name, 'blues': _encode(value.blues, arrays)}}
+    if isinstance(value, combination_filter.FilterSummary):
+        return {'$filter_summary': _encode(vars(value), arrays)}
+    raise TypeError(f"启动包不能保存{type(value).__name__}")
+
+
+def _decode(value, arrays, game):
+    if isinstance(value, list):
+        return [_decode(item, arrays, game) for item in value]
+    if not isinstance(value, dict):
+        return value
+    tags = [k for k in value if k.startswith('$')]
+    if not tags:
+        return {k: _decode(v, arrays, game) for k, v in value.items()}
+    tag = tags[0]
+    content = value[tag]
+    if tag == '$tuple':
+        return tuple(_decode(item, arrays, game) for item in content)
+    if tag == '$dict':
+        return {_decode(k, arrays, game): _decode(v, arrays, game) for k, v in content}
+    if tag == '$bytes':
+        return arrays[content].tobytes()
+    if tag == '$array':
+        arr = arrays[content]
+        return arr.astype(object) if value.get('object') else arr
+    if tag == '$frame':
+        columns = _decode(content['columns'], arrays, game)
+        data = [_decode(column, arrays, game) for column in content['data']]
+        index = content['index']
+        if 'range' in index:
+            index = pd.RangeIndex(*index['range'], name=_decode(content['index_name'], arrays, game))
+        else:
+            index = pd.Index(_decode(index['values'], arrays, game), name=_decode(content['index_name'], arrays, game))
+        df = pd.DataFrame(dict(enumerate(data)), index=index)
+        df.columns = pd.Index(columns, name=_decode(content['columns_name'], arrays, game))
+        return df
+    if tag == '$blue_stats':
+        return blue.BlueStats(_decode(content['blues'], arrays, game), game.area(content['area']))
+    if tag == '$filter_summary':
+        return combination_filter.FilterSummary(**_decode(content, arrays, game))
+    raise ValueError(f"启动包中有无法识别的内容: {tag}")
+
+
+def read_manifest(path=None):
+    """读取manifest，不存在或无法解析时返回None"""
+    path = path or config.BUNDLE_DIR
+    try:
+        with open(os.path.join(path, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("启动包manifest无法读取: %s", e)
+        return None
+
+
+def _matches_source(manifest, store):
+    """启动包是否由当前的数据生成；数据库为空时（新容器）与CSV比对，通过后用启动包中的数据初始化数据库"""
+    if len(store):
+        return manifest.get('source') == store.checksum()
+    return manifest.get('csv') is not None and manifest.get('csv') == file_sha1(config.DATA_PATH)
+
+
+class Bundle:
+    """载入并校验过的启动包：manifest、数组（内存映射）、由数组得到的数据集和组合特征表、预先算好的统计与图表
+
+    双色球以外的玩法没有组合特征表（table为None）和预先算好的页面。
+    """
+
+    def __init__(self, path, manifest, arrays, dataset, table, views):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+        self.dataset = dataset
+        self.table = table
+        self.views = views
+
+
+def load(path=None, store=None):
+    """载入并校验启动包，返回Bundle；只读取文件和数据库的校验和，不修改任何进程内状态
+
+    启动包不存在、格式不符或与当前数据不一致时返回None。要在应用中使用，再调用install。
+    """
+    path = path or config.BUNDLE_DIR
+    manifest = read_manifest(path)
+    if manifest is None:
+        return None
+    if manifest.get('format') != FORMAT:
+        logger.info("启动包格式版本为%s，当前为%s，忽略", manifest.get('format'), FORMAT)
+        return None
+    store = store if store is not None else storage.get_store(seed=False)
+    if manifest.get('game') != store.game.key:
+        logger.info("启动包的玩法为%s，数据库为%s，忽略", manifest.get('game'), store.game.key)
+        return None
+    if not _matches_source(manifest, store):
+        logger.info("启动包（第%s期）与当前数据不一致，忽略", manifest.get('latest_issue'))
+        return None
+
+    game = store.game
+    try:
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r', allow_pickle=False)
+                  for name in manifest['arrays']}
+        indexes = {area.name: PositionIndex.from_arrays(arrays[f'index.{area.name}.prefix'],
+                                                        arrays[f'index.{area.name}.values'], area)
+                   for area in game.areas}
+        dataset = Dataset(storage.frame_from_arrays(arrays, game), indexes=indexes, game=game)
+        if dataset.version != manifest['version']:
+            logger.warning("启动包数据版本%s与manifest记录的%s不一致，忽略", dataset.version, manifest['version'])
+            return None
+        table = None
+        if game is SSQ:
+            table = combination_filter.CombinationTable.from_arrays(
+                {name: arrays[f'combinations.{name}'] for name in combination_filter.CombinationTable.COLUMNS})
+        cached = read_views(path, game)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("启动包无法载入: %s", e)
+        return None
+    return Bundle(path, manifest, arrays, dataset, table, cached)
+
+
+def install(loaded, store=None):
+    """在进程中使用已载入的启动包，返回其数据集
+
+    数据库为空时（新容器）用启动包中的数据初始化，并使用其中的组合特征表和预先算好的统计与图表缓存。
+    """
+    store = store if store is not None else storage.get_store(seed=False)
+    dataset = loaded.dataset
+    if len(store) == 0:
+        store.upsert(dataset.df)
+        logger.info("已用启动包中的%d期数据初始化%s", len(dataset), store.path)
+    if loaded.table is not None:
+        combination_filter.set_table(loaded.table)
+    analytics_cache.update(dataset.cache_version, loaded.views['analytics'])
+    chart_cache.update(dataset.cache_version, loaded.views['charts'])
+    logger.info("已载入启动包：第%s期，%d项统计、%d张图表", dataset.latest_issue,
+                len(loaded.views['analytics']), len(loaded.views['charts']))
+    return dataset
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="双色球启动包")
+    parser.add_argument('--dir', default=None, help=f"启动包目录（默认 {config.BUNDLE_DIR}）")
+    sub = parser.add_subparsers(dest='command', required=True)
+    builder = sub.add_parser('build', help="由数据库中的数据生成启动包")
+    builder.add_argument('--no-views', action='store_true', help="只保存数组，不预先计算统计和图表")
+    sub.add_parser('info', help="显示启动包信息及是否与当前数据一致")
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        manifest = build(args.dir, warm=not args.no_views)
+        print(f"✅ 启动包已生成：第{manifest['latest_issue']}期，共{manifest['periods']}期，"
+              f"{manifest['views']['charts']}张图表，用时{manifest['build_seconds']}秒")
+        return
+    manifest = read_manifest(args.dir)
+    if manifest is None:
+        print("未找到启动包")
+        return
+    valid = manifest.get('format') == FORMAT and _matches_source(manifest, storage.get_store(seed=False))
+    print(json.dumps({k: v for k, v in manifest.items() if k != 'arrays'}, ensure_ascii=False, indent=2))
+    print("✅ 与当前数据一致" if valid else "⚠️ 与当前数据不一致，启动时不会使用")
+
+
+if __name__ == '__main__':
+    main()
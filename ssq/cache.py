@@ -0,0 +1,122 @@
+"""按数据版本隔离的进程内缓存"""
+
+import threading
+from collections import OrderedDict
+
+from . import config
+from .memory import MB, sizeof
+
+
+class VersionedCache:
+    """线程安全的LRU缓存，键中包含数据版本，版本切换后旧条目会被清理
+
+    同时限制条目数和总字节数（max_bytes为None时不限），超出时淘汰最久未使用的条目；
+    单个条目超过max_bytes时不写入缓存（否则会先淘汰其他全部条目，最后再淘汰它自己）。
+    """
+
+    def __init__(self, name, max_entries=256, max_bytes=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def get(self, version, key, default=None):
+        with self._lock:
+            full_key = (version, key)
+            if full_key in self._entries:
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return self._entries[full_key]
+            self.misses += 1
+            return default
+
+    def put(self, version, key, value):
+        size = sizeof(value)
+        with self._lock:
+            full_key = (version, key)
+            self._remove(full_key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                self.rejected += 1
+                return value
+            self._entries[full_key] = value
+            self._sizes[full_key] = size
+            self.nbytes += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def _remove(self, full_key):
+        if full_key in self._entries:
+            del self._entries[full_key]
+            self.nbytes -= self._sizes.pop(full_key)
+
+    def get_or_compute(self, version, key, compute):
+        """命中则直接返回，否则调用compute()计算并写入缓存"""
+        sentinel = object()
+        value = self.get(version, key, sentinel)
+        if value is sentinel:
+            value = self.put(version, key, compute())
+        return value
+
+    def entries(self, version):
+        """指定版本的全部条目，[(key, value)]，按最近使用的顺序"""
+        with self._lock:
+            return [(k[1], v) for k, v in self._entries.items() if k[0] == version]
+
+    def update(self, version, entries):
+        """批量写入条目（如启动包中预先算好的结果）"""
+        for key, value in entries:
+            self.put(version, key, value)
+
+    def retain_version(self, version):
+        """清理旧版本的条目
+
+        version为(范围, 版本)元组（如Dataset.cache_version）时只清理同一范围的其他版本，
+        其他玩法的条目不受影响；否则只保留指定版本的条目。
+        """
+        scoped = isinstance(version, tuple)
+        with self._lock:
+            stale = [k for k in self._entries if k[0] != version
+                     and (not scoped or (isinstance(k[0], tuple) and k[0][0] == version[0]))]
+            for full_key in stale:
+                self._remove(full_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        return {
+            'cache': self.name,
+            'entries': len(self._entries),
+            'size_kb': round(self.nbytes / 1024, 1),
+            'limit_kb': round(self.max_bytes / 1024, 1) if self.max_bytes is not None else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'rejected': self.rejected,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _limit(mb):
+    return int(mb * MB) if mb > 0 else None
+
+
+# 统计结果缓存、图表缓存与导出文件缓存（进程内所有会话共享）
+analytics_cache = VersionedCache('analytics', max_entries=512, max_bytes=_limit(config.ANALYTICS_CACHE_MB))
+chart_cache = VersionedCache('charts', max_entries=256, max_bytes=_limit(config.CHART_CACHE_MB))
+export_cache = VersionedCache('exports', max_entries=32, max_bytes=_limit(config.EXPORT_CACHE_MB))
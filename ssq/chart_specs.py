@@ -0,0 +1,360 @@
+"""与渲染后端无关的图表规格
+
+每个图表由一个可JSON序列化的小字典描述（kind、标题、坐标轴与数据），
+由charts.draw_spec用matplotlib在服务端绘制，或由vega.to_vega_lite转换后在浏览器中绘制。
+"""
+
+import numpy as np
+
+from . import analytics, blue, positional, transitions
+from .data import RED_COLUMNS, BLUE_COLUMN
+
+
+class ChartData:
+    """图表所需的数组，从筛选后的数据中提取一次
+
+    df为dataset.df中连续的若干行（行号不变）时，号码次数、遗漏和位置统计直接使用数据集的前缀和表；
+    不提供dataset时按df自身生成。
+    """
+
+    def __init__(self, df, dataset=None):
+        self.periods = len(df)
+        self.reds = df[RED_COLUMNS].to_numpy()
+        self.blues = df[BLUE_COLUMN].to_numpy()
+        self.issues = df['期号'].to_numpy()
+        self.dates = df['开奖日期']
+        self.pools = df['奖池(元)'].to_numpy()
+        self._transitions = None
+        self._dataset = dataset
+        self._rows = df.index
+        self._slots = None
+        self._blue_slots = None
+        self._blue = None
+
+    @property
+    def transitions(self):
+        """相邻两期的转移数据（首次使用时计算）"""
+        if self._transitions is None:
+            self._transitions = transitions.DrawTransitions(self.reds, self.blues)
+        return self._transitions
+
+    def _window(self, name, build):
+        rows = self._rows
+        if (self._dataset is not None and self.periods and rows.is_monotonic_increasing
+                and rows[-1] - rows[0] + 1 == self.periods):
+            return positional.SlotWindow(self._dataset.index(name), int(rows[0]), int(rows[-1]) + 1)
+        return positional.SlotWindow(build(), 0, self.periods)
+
+    @property
+    def slots(self):
+        """本数据范围的红球统计（号码次数、遗漏、位置统计）"""
+        if self._slots is None:
+            self._slots = self._window('red', lambda: positional.PositionIndex(self.reds))
+        return self._slots
+
+    @property
+    def blue_slots(self):
+        """本数据范围的蓝球统计"""
+        if self._blue_slots is None:
+            self._blue_slots = self._window(
+                'blue', lambda: positional.PositionIndex(self.blues, analytics.BLUE))
+        return self._blue_slots
+
+    @property
+    def blue(self):
+        """本数据范围的蓝球统计（首次使用时计算；views.blue_stats会换成缓存中的结果）"""
+        if self._blue is None:
+            self._blue = blue.BlueStats(self.blues)
+        return self._blue
+
+    @blue.setter
+    def blue(self, stats):
+        self._blue = stats
+
+
+def _list(values, digits=4):
+    """转换为JSON友好的列表，NaN转为None"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iub':
+        return values.astype(int).tolist()
+    if values.dtype.kind == 'f':
+        return [None if np.isnan(v) else round(float(v), digits) for v in values]
+    return [str(v) for v in values]
+
+
+def _dates(dates):
+    return [d.strftime('%Y-%m-%d') for d in dates]
+
+
+def bar(title, x, y, color, x_label=None, y_label='出现次数', figsize=(12, 6), alpha=0.7):
+    return {'kind': 'bar', 'title': title, 'x': _list(x), 'y': _list(y), 'color': color, 'alpha': alpha,
+            'x_label': x_label, 'y_label': y_label, 'figsize': figsize}
+
+
+def pie(title, labels, values, colors, figsize=(8, 6)):
+    return {'kind': 'pie', 'title': title, 'labels': list(labels), 'values': _list(values),
+            'colors': list(colors), 'figsize': figsize}
+
+
+def hist(title, values, bins, color, x_label, y_label='出现次数', figsize=(12, 6)):
+    """直方图在服务端分箱，两个后端使用同样的箱边界"""
+    counts, edges = np.histogram(np.asarray(values), bins=bins)
+    return {'kind': 'hist', 'title': title, 'counts': _list(counts), 'edges': _list(edges),
+            'color': color, 'x_label': x_label, 'y_label': y_label, 'figsize': figsize}
+
+
+def line(title, x, series, x_label, y_label, x_type='temporal', legend=False, figsize=(12, 6)):
+    """series: [{'name', 'y', 'color', 'marker', 'linestyle'}]"""
+    return {'kind': 'line', 'title': title, 'x': x, 'x_type': x_type, 'series': series,
+            'x_label': x_label, 'y_label': y_label, 'legend': legend, 'figsize': figsize}
+
+
+def series(name, y, color, marker='o', linestyle='-'):
+    return {'name': name, 'y': _list(y), 'color': color, 'marker': marker, 'linestyle': linestyle}
+
+
+# ---------- 红球号码分析 ----------
+
+def red_frequency(data):
+    table = analytics.frequency_table(data.slots.number_counts(), data.periods, analytics.RED_PICKS)
+    return bar(f'红球号码出现频率 ({data.periods}期数据)', table['号码'], table['出现次数'], 'red', '红球号码')
+
+
+def red_heatmap(data):
+    return {'kind': 'heatmap', 'title': f'红球号码出现次数热力图 ({data.periods}期数据)',
+            'x': list(range(1, analytics.RED_NUMBERS + 1)), 'values': _list(data.slots.number_counts()),
+            'row_label': '出现次数', 'x_label': '红球号码', 'cmap': 'Reds', 'figsize': (15, 3)}
+
+
+def red_zones(data):
+    return bar(f'红球区间分布 ({data.periods}期数据)', analytics.RED_ZONE_NAMES, analytics.zone_totals(data.reds),
+               ['#FF9999', '#FF6666', '#CC0000'], figsize=(10, 6), alpha=1.0)
+
+
+def _slot_matrix(table):
+    """位置×号码矩阵转换为二维列表，某个位置不可能出现的号码（如红球1为29~33）为None"""
+    values = table.to_numpy()
+    slots = np.arange(analytics.RED_PICKS)[:, None]
+    highest = analytics.RED_NUMBERS - analytics.RED_PICKS + 1 + slots
+    possible = (positional.NUMBERS > slots) & (positional.NUMBERS <= highest)
+    return [[int(v) if ok else None for v, ok in zip(row, mask)] for row, mask in zip(values, possible)]
+
+
+def _slot_heatmap(title, table, value_label, cmap):
+    return {'kind': 'heatmap', 'title': title, 'x': _list(positional.NUMBERS), 'y': list(positional.SLOT_LABELS),
+            'values': _slot_matrix(table), 'row_label': value_label, 'x_label': '红球号码', 'y_label': '位置',
+            'cmap': cmap, 'figsize': (15, 5)}
+
+
+def slot_frequency(data):
+    return _slot_heatmap(f'红球各位置号码出现次数 ({data.periods}期数据)', data.slots.frequency(), '出现次数', 'Reds')
+
+
+def slot_omission(data):
+    return _slot_heatmap(f'红球各位置号码当前遗漏 ({data.periods}期数据)', data.slots.omissions(), '遗漏期数', 'Blues')
+
+
+SLOT_COLORS = ['red', 'orange', 'gold', 'green', 'blue', 'purple']
+
+
+def slot_trend(data, window):
+    trend = data.slots.mean_trend(window)
+    return line(f'红球各位置{window}期平均号码走势', _dates(data.dates), [
+        series(label, values, color, marker=None)
+        for label, values, color in zip(positional.SLOT_LABELS, trend, SLOT_COLORS)
+    ], '开奖日期', '平均号码', legend=True)
+
+
+def slot_quantiles(data, slot, window):
+    trend = data.slots.quantile_trend(slot, window)
+    label = positional.SLOT_LABELS[slot]
+    return line(f'{label}分位数走势（{window}期）', _dates(data.dates), [
+        series(f'{int(q * 100)}%分位', values, color, marker=None, linestyle=style)
+        for q, values, color, style in zip(positional.QUANTILES, trend,
+                                           ['gray', SLOT_COLORS[slot], 'gray'], ['--', '-', '--'])
+    ], '开奖日期', '号码', legend=True)
+
+
+# ---------- 蓝球号码分析 ----------
+
+def blue_frequency(data):
+    table = data.blue.frequency_table()
+    return bar(f'蓝球号码出现频率 ({data.periods}期数据)', table['号码'], table['出现次数'], 'blue', '蓝球号码')
+
+
+def blue_parity(data):
+    return pie(f'蓝球奇偶分布 ({data.periods}期数据)', ['偶数', '奇数'], data.blue.parity(), ['#6699CC', '#336699'])
+
+
+def blue_size(data):
+    return pie(f'蓝球大小分布 ({data.periods}期数据)', ['小号(1-8)', '大号(9-16)'], data.blue.size(),
+               ['#99CCFF', '#3366CC'])
+
+
+def _blue_residues(data, k, color):
+    counts = data.blue.residues(k)
+    return bar(f'蓝球除{k}余数分布 ({data.periods}期数据)', [f'余{r}' for r in counts.index], counts.values, color,
+               f'除{k}余数', figsize=(8, 5))
+
+
+def blue_mod4(data):
+    return _blue_residues(data, 4, 'steelblue')
+
+
+def blue_mod5(data):
+    return _blue_residues(data, 5, 'slateblue')
+
+
+def blue_intervals(data):
+    gaps = [str(g) for g in range(1, blue.MAX_GAP)] + [f'≥{blue.MAX_GAP}']
+    return {'kind': 'heatmap', 'title': f'蓝球相邻两次出现的间隔分布 ({data.periods}期数据)', 'x': gaps,
+            'y': _list(data.blue.numbers), 'values': data.blue.interval_distribution().tolist(),
+            'row_label': '次数', 'x_label': '间隔期数', 'y_label': '蓝球号码', 'cmap': 'Blues', 'figsize': (15, 7)}
+
+
+def blue_rolling(data, number, window):
+    rolling = data.blue.rolling(window)[:, number - 1]
+    return line(f'蓝球{number:02d}最近{window}期出现次数走势', _dates(data.dates), [
+        series(f'蓝球{number:02d}', rolling, 'blue', marker=None),
+        series('期望次数', np.where(np.isnan(rolling), np.nan, window / analytics.BLUE_NUMBERS), 'gray',
+               marker=None, linestyle='--'),
+    ], '开奖日期', '出现次数', legend=True)
+
+
+def blue_trend(data):
+    return line('蓝球号码走势', _list(data.issues), [series('蓝球', data.blues, 'blue')],
+                '期次', '蓝球号码', x_type='ordinal')
+
+
+# ---------- 号码组合分析 ----------
+
+def odd_even(data):
+    counts = analytics.odd_even_distribution(data.reds)
+    return bar(f'红球奇偶比分布 ({data.periods}期数据)', counts.index, counts.values, 'purple', '奇偶比')
+
+
+def small_big(data):
+    counts = analytics.small_big_distribution(data.reds)
+    return bar(f'红球大小比分布 ({data.periods}期数据)', counts.index, counts.values, 'green', '大小比')
+
+
+def consecutive(data):
+    counts = analytics.value_distribution(analytics.consecutive_pairs(data.reds))
+    return bar(f'红球连号分布 ({data.periods}期数据)', counts.index, counts.values, 'orange', '连号对数',
+               figsize=(10, 6))
+
+
+def sum_histogram(data):
+    return hist(f'红球和值分布 ({data.periods}期数据)', analytics.red_sums(data.reds), 20, 'cyan', '和值')
+
+
+def span_histogram(data):
+    return hist(f'红球跨度分布 ({data.periods}期数据)', analytics.red_spans(data.reds), 15, 'brown', '跨度')
+
+
+# ---------- 历史趋势分析 ----------
+
+def pool_trend(data):
+    return line('奖池金额历史趋势', _dates(data.dates), [series('奖池', data.pools / 100000000, 'gold')],
+                '开奖日期', '奖池金额（亿元）')
+
+
+def sum_trend(data, window):
+    sums = analytics.red_sums(data.reds)
+    return line('红球和值历史趋势', _dates(data.dates), [
+        series('和值', sums, 'red'),
+        series(f'{window}期移动平均', analytics.moving_average(sums, window), 'blue', marker=None, linestyle='--'),
+    ], '开奖日期', '和值', legend=True)
+
+
+def blue_size_trend(data):
+    trend = analytics.blue_size_trend(data.blues, data.dates)
+    return line('蓝球大小历史趋势', _dates(trend.index), [
+        series('小号(1-8)', trend['小'], 'lightblue'),
+        series('大号(9-16)', trend['大'], 'darkblue'),
+    ], '开奖日期', '出现次数', legend=True)
+
+
+def odd_even_trend(data):
+    trend = analytics.odd_even_trend(data.reds, data.dates)
+    return line('红球奇偶历史趋势', _dates(trend.index), [
+        series('奇数', trend['奇数'], 'red'),
+        series('偶数', trend['偶数'], 'blue'),
+    ], '开奖日期', '出现次数', legend=True)
+
+
+def zone_trend(data):
+    trend = analytics.zone_trend(data.reds, data.dates)
+    return line('红球区间历史趋势', _dates(trend.index), [
+        series(name, trend[name], color) for name, color in zip(analytics.RED_ZONE_NAMES, ['green', 'orange', 'red'])
+    ], '开奖日期', '出现次数', legend=True)
+
+
+def number_heat(data, number):
+    return line(f'红球号码{number}热度趋势', _dates(data.dates),
+                [series(f'号码{number}', analytics.number_heat(data.reds, number, window=10), 'red')],
+                '开奖日期', f'号码{number}热度（10期移动平均）')
+
+
+# ---------- 转移统计 ----------
+
+TRANSITION_COLORS = {'odd_even': 'purple', 'sum': 'cyan', 'zones': 'orange', 'blue_size': 'blue'}
+
+
+def transition_next(data, feature, window):
+    """最新一期的状态在历史上出现后，下一期各状态的次数"""
+    counts = data.transitions.next_distribution(feature, window)
+    counts = counts[counts > 0]
+    name = transitions.FEATURES[feature]
+    return bar(f'最新一期{name}为{data.transitions.current_state(feature)}时的下一期分布（最近{window}期）',
+               counts.index, counts.values, TRANSITION_COLORS[feature], f'下一期{name}', figsize=(10, 5))
+
+
+def _rate_bar(data, window, column, title, color):
+    rates = data.transitions.number_rates(window)
+    return bar(f'{title}（最近{window}期）', rates['号码'], rates[column].fillna(0), color, '红球号码', f'{column}(%)')
+
+
+def repeat_rates(data, window):
+    return _rate_bar(data, window, '重号率', '各号码重号率', 'red')
+
+
+def neighbor_rates(data, window):
+    return _rate_bar(data, window, '邻号率', '各号码邻号率', 'orange')
+
+
+def repeat_counts(data, window):
+    counts = data.transitions.repeat_counts(window)
+    return bar(f'每期重号个数分布（最近{window}期）', counts.index, counts.values, 'red', '重号个数', figsize=(10, 5))
+
+
+def neighbor_counts(data, window):
+    counts = data.transitions.neighbor_counts(window)
+    return bar(f'每期邻号个数分布（最近{window}期）', counts.index, counts.values, 'orange', '邻号个数',
+               figsize=(10, 5))
+
+
+# 只依赖数据范围的图表，数据更新后可以提前生成
+RANGE_CHARTS = {
+    'red.frequency': red_frequency,
+    'red.heatmap': red_heatmap,
+    'red.zones': red_zones,
+    'red.slots': slot_frequency,
+    'red.slot_omission': slot_omission,
+    'blue.frequency': blue_frequency,
+    'blue.parity': blue_parity,
+    'blue.size': blue_size,
+    'blue.trend': blue_trend,
+    'blue.mod4': blue_mod4,
+    'blue.mod5': blue_mod5,
+    'blue.intervals': blue_intervals,
+    'combo.odd_even': odd_even,
+    'combo.small_big': small_big,
+    'combo.consecutive': consecutive,
+    'combo.sum': sum_histogram,
+    'combo.span': span_histogram,
+    'trend.pool': pool_trend,
+    'trend.blue_size': blue_size_trend,
+    'trend.odd_even': odd_even_trend,
+    'trend.zones': zone_trend,
+}
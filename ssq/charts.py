@@ -0,0 +1,228 @@
+"""图表绘制与matplotlib中文字体配置（render_png使用面向对象接口，可在后台线程中渲染）"""
+
+import io
+import logging
+import os
+import platform
+import threading
+
+import matplotlib.font_manager as fm
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure, SubplotParams
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+# 与st.pyplot保持一致的导出参数
+PNG_DPI = 200
+
+# matplotlib的字体缓存等全局状态并非线程安全，渲染时串行化
+_render_lock = threading.Lock()
+
+
+# ============= 全面解决matplotlib中文显示问题 =============
+def setup_matplotlib_chinese():
+    """配置matplotlib支持中文显示（参考SmartClean方案）"""
+    
+    # 1. 设置seaborn样式（seaborn会自动配置更好的字体）
+    sns.set_style("whitegrid")
+    sns.set_context("notebook", font_scale=1.1)
+    
+    # 2. 根据操作系统设置字体优先级
+    system = platform.system()
+    
+    if system == 'Windows':
+        font_priorities = [
+            'Microsoft YaHei',      # 微软雅黑
+            'SimHei',              # 黑体
+            'SimSun',              # 宋体
+            'FangSong',            # 仿宋
+            'KaiTi',              # 楷体
+            'Arial Unicode MS'
+        ]
+    elif system == 'Darwin':  # macOS
+        font_priorities = [
+            'PingFang SC',         # 苹方
+            'Heiti SC',            # 黑体-简
+            'STHeiti',            # 华文黑体
+            'Apple LiGothic',     # 苹果俪中黑
+            'Arial Unicode MS'
+        ]
+    else:  # Linux
+        font_priorities = [
+            'WenQuanYi Micro Hei', # 文泉驿微米黑
+            'WenQuanYi Zen Hei',   # 文泉驿正黑
+            'Noto Sans CJK SC',    # 思源黑体
+            'Noto Sans CJK JP',
+            'Droid Sans Fallback'
+        ]
+    
+    # 3. 添加通用后备字体
+    font_priorities.extend(['DejaVu Sans', 'Arial', 'Tahoma'])
+    
+    # 4. 尝试注册系统字体
+    font_dirs = []
+    if system == 'Windows':
+        font_dirs = ['C:/Windows/Fonts', 'C:/WINNT/Fonts']
+    elif system == 'Darwin':
+        font_dirs = ['/System/Library/Fonts', '/Library/Fonts', os.path.expanduser('~/Library/Fonts')]
+    else:
+        font_dirs = ['/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts')]
+    
+    # 注册找到的字体
+    registered_fonts = []
+    for font_dir in font_dirs:
+        if os.path.exists(font_dir):
+            try:
+                fm.fontManager.addfont(font_dir)
+            except:
+                pass
+    
+    # 5. 测试每个字体，使用第一个可用的
+    for font in font_priorities:
+        try:
+            # 设置字体
+            plt.rcParams['font.sans-serif'] = [font] + ['DejaVu Sans']
+            plt.rcParams['axes.unicode_minus'] = False
+            
+            # 测试字体是否可用
+            fig, ax = plt.subplots(figsize=(2, 1))
+            ax.set_title('测试中文')
+            ax.set_xlabel('测试X轴')
+            ax.set_ylabel('测试Y轴')
+            plt.close(fig)
+            
+            logger.info('成功加载中文字体: %s', font)
+            return True
+        except Exception as e:
+            continue
+    
+    # 6. 如果都失败，使用DejaVu Sans（纯英文）
+    logger.warning('未找到中文字体，图表将使用英文显示')
+    plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
+    plt.rcParams['axes.unicode_minus'] = False
+    return False
+
+
+_chinese_font = None
+_chinese_font_lock = threading.Lock()
+
+
+def ensure_matplotlib_chinese():
+    """每个进程只配置一次中文字体（字体设置是进程全局的，不必在每次重跑时重新探测）"""
+    global _chinese_font
+    with _chinese_font_lock:
+        if _chinese_font is None:
+            with profiling.stage('font_setup'):
+                _chinese_font = setup_matplotlib_chinese()
+        return _chinese_font
+
+
+# 渲染用的Figure按尺寸复用（只在_render_lock内使用），每次渲染后清空，不会随渲染次数累积
+_figures = {}
+
+
+def render_png(draw, figsize=(12, 6)):
+    """在复用的图表上调用draw(fig, ax)绘制，返回PNG字节"""
+    # 后台预热、启动包等不经过app.py的渲染同样需要中文字体
+    ensure_matplotlib_chinese()
+    with _render_lock:
+        fig = _figures.get(figsize)
+        if fig is None:
+            fig = _figures[figsize] = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+        try:
+            ax = fig.add_subplot()
+            draw(fig, ax)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format='png', dpi=PNG_DPI, bbox_inches='tight')
+        finally:
+            fig.clear()
+            # tight_layout等会修改子图边距，恢复默认值，保证结果与新建的图表一致
+            fig.subplotpars = SubplotParams()
+    return buffer.getvalue()
+
+
+def draw_bars(ax, labels, counts, color, xlabel, title, alpha=0.7, ylabel='出现次数'):
+    """带数值标注的柱状图"""
+    bars = ax.bar(labels, counts, color=color, alpha=alpha)
+    if xlabel:
+        ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.grid(True, axis='y', linestyle='--', alpha=0.7)
+
+    # 在柱状图上显示数值
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height + 0.1,
+                f'{int(height)}', ha='center', va='bottom')
+    return bars
+
+
+def _draw_line(fig, ax, spec):
+    if spec['x_type'] == 'temporal':
+        x = pd.to_datetime(spec['x'])
+    else:
+        # 序号作为横坐标，只显示部分期号标签，避免重叠
+        x = np.arange(len(spec['x']))
+        step = len(x) // 10 if len(x) > 20 else 1
+        ax.set_xticks(x[::step])
+        ax.set_xticklabels(spec['x'][::step])
+    for item in spec['series']:
+        y = np.array([np.nan if v is None else v for v in item['y']], dtype=float)
+        ax.plot(x, y, marker=item['marker'], linestyle=item['linestyle'], color=item['color'], label=item['name'])
+    ax.set_xlabel(spec['x_label'])
+    ax.set_ylabel(spec['y_label'])
+    ax.set_title(spec['title'])
+    ax.grid(True, linestyle='--', alpha=0.7)
+    if spec['legend']:
+        ax.legend()
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+
+
+def draw_spec(fig, ax, spec):
+    """按图表规格（见chart_specs）绘制"""
+    kind = spec['kind']
+    if kind == 'bar':
+        draw_bars(ax, spec['x'], spec['y'], spec['color'], spec['x_label'], spec['title'],
+                  alpha=spec['alpha'], ylabel=spec['y_label'])
+    elif kind == 'heatmap':
+        # 单行热力图values为一维列表，多行时为二维列表并由y给出行标签；None为空白格
+        values = np.array(spec['values'], dtype=float)
+        rows = spec.get('y')
+        if rows is None:
+            values, rows = values[None, :], [spec['row_label']]
+        sns.heatmap(values, cmap=spec['cmap'], annot=True, fmt='.0f', annot_kws={'size': 8 if len(rows) > 1 else 10},
+                    xticklabels=[str(x) for x in spec['x']], yticklabels=rows, ax=ax,
+                    cbar_kws={'label': spec['row_label']} if len(rows) > 1 else None)
+        ax.set_title(spec['title'])
+        ax.set_xlabel(spec['x_label'])
+        if spec.get('y_label'):
+            ax.set_ylabel(spec['y_label'])
+        ax.tick_params(axis='y', labelrotation=0)
+    elif kind == 'pie':
+        ax.pie(spec['values'], labels=spec['labels'], autopct='%1.1f%%', colors=spec['colors'], startangle=90)
+        ax.set_title(spec['title'])
+    elif kind == 'hist':
+        edges = np.asarray(spec['edges'])
+        ax.hist(edges[:-1], bins=edges, weights=spec['counts'], color=spec['color'], alpha=0.7, edgecolor='black')
+        ax.set_xlabel(spec['x_label'])
+        ax.set_ylabel(spec['y_label'])
+        ax.set_title(spec['title'])
+        ax.grid(True, linestyle='--', alpha=0.7)
+    elif kind == 'line':
+        _draw_line(fig, ax, spec)
+    else:
+        raise ValueError(f"未知的图表类型: {kind}")
+
+
+def spec_png(spec):
+    """在服务端把图表规格渲染为PNG"""
+    return render_png(lambda fig, ax: draw_spec(fig, ax, spec), figsize=tuple(spec['figsize']))
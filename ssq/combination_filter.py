@@ -0,0 +1,225 @@
+"""红球组合缩水：一次性枚举全部C(33,6)注红球组合并预先计算特征，按条件用向量化掩码筛选
+
+特征表按列存放（每个特征一个uint8数组，号码为(6, n)），约15MB，进程内只生成一次。
+特征表按号码区（games.Area）生成，大乐透前区等其他号码不重复的号码区也可以用同样的方式缩水。
+"""
+
+import itertools
+import math
+import threading
+
+import numpy as np
+
+from .analytics import RED, RED_NUMBERS, RED_PICKS
+
+TOTAL_COMBINATIONS = math.comb(RED_NUMBERS, RED_PICKS)
+# 页面上允许导出的最大注数
+DOWNLOAD_LIMIT = 100000
+
+
+class CombinationTable:
+    """号码区（默认双色球红球）的全部组合（按字典序）及其和值、跨度、奇数个数、小号个数、区间个数、连号对数"""
+
+    COLUMNS = ('numbers', 'sums', 'spans', 'odd', 'small', 'zones', 'consecutive')
+
+    def __init__(self, area=RED):
+        if not area.distinct:
+            raise ValueError(f"{area.label}的号码可以重复，不能按组合缩水")
+        self.area = area
+        count = math.comb(area.size, area.picks)
+        flat = np.fromiter(itertools.chain.from_iterable(itertools.combinations(range(area.low, area.high + 1),
+                                                                                area.picks)),
+                           dtype=np.uint8, count=count * area.picks)
+        numbers = np.ascontiguousarray(flat.reshape(-1, area.picks).T)
+        self.numbers = numbers
+        # 双色球最大和值28+...+33=183，uint8足够
+        sums = numbers.sum(axis=0, dtype=np.uint16)
+        self.sums = sums.astype(np.uint8) if area.high * area.picks <= np.iinfo(np.uint8).max else sums
+        self.spans = numbers[-1] - numbers[0]
+        self.odd = (numbers & 1).sum(axis=0, dtype=np.uint8)
+        self.small = (numbers <= area.small_max).sum(axis=0, dtype=np.uint8)
+        self.zones = np.stack([((numbers >= lo) & (numbers <= hi)).sum(axis=0, dtype=np.uint8) for lo, hi in area.zones])
+        self.consecutive = (numbers[1:] - numbers[:-1] == 1).sum(axis=0, dtype=np.uint8)
+        for arr in self.arrays().values():
+            arr.setflags(write=False)
+
+    @classmethod
+    def from_arrays(cls, arrays, area=RED):
+        """由arrays()保存的各列（如启动包中内存映射的数组）直接构造"""
+        table = cls.__new__(cls)
+        table.area = area
+        for name in cls.COLUMNS:
+            arr = arrays[name]
+            arr.setflags(write=False)
+            setattr(table, name, arr)
+        return table
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    def __len__(self):
+        return self.numbers.shape[1]
+
+    @property
+    def nbytes(self):
+        return sum(arr.nbytes for arr in self.arrays().values())
+
+    def member_counts(self, numbers):
+        """每注组合包含numbers中号码的个数"""
+        lookup = np.zeros(self.area.high + 1, dtype=np.uint8)
+        lookup[list(numbers)] = 1
+        counts = lookup[self.numbers[0]]
+        for position in self.numbers[1:]:
+            counts += lookup[position]
+        return counts
+
+    def rows(self, index):
+        """按索引取组合，返回(k, picks)"""
+        return self.numbers[:, index].T
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    """进程内共享的组合特征表（首次调用时生成）"""
+    global _table
+    with _table_lock:
+        if _table is None:
+            _table = CombinationTable()
+        return _table
+
+
+def set_table(table):
+    """使用已生成的组合特征表（启动时从启动包载入）"""
+    global _table
+    with _table_lock:
+        _table = table
+
+
+def cold_numbers(omissions, min_omission):
+    """当前遗漏期数（长度33的数组）不少于min_omission的红球号码"""
+    return [int(n) for n in np.flatnonzero(np.asarray(omissions) >= min_omission) + 1]
+
+
+def _in_range(values, bounds):
+    lo, hi = bounds
+    return (values >= lo) & (values <= hi)
+
+
+def _allowed(values, allowed, picks):
+    lookup = np.zeros(picks + 1, dtype=bool)
+    lookup[list(allowed)] = True
+    return lookup[values]
+
+
+class FilterResult:
+    """缩水结果：mask标记保留的组合，steps为依次应用每个条件后剩余的注数"""
+
+    def __init__(self, table, mask, steps):
+        self.table = table
+        self.mask = mask
+        self.steps = steps
+        self.count = int(np.count_nonzero(mask))
+
+    @property
+    def ratio(self):
+        return self.count / len(self.table)
+
+    def combinations(self, limit=None):
+        """保留的组合，返回(k, 6)数组，limit限制最多返回的注数"""
+        index = np.flatnonzero(self.mask)
+        if limit is not None:
+            index = index[:limit]
+        return self.table.rows(index)
+
+    def iter_chunks(self, size=100000):
+        """分块返回保留的组合，避免一次性生成大数组"""
+        for start in range(0, len(self.mask), size):
+            index = np.flatnonzero(self.mask[start:start + size]) + start
+            if len(index):
+                yield self.table.rows(index)
+
+    def to_csv(self):
+        """保留的组合导出为CSV文本（每行一注，号码补零）"""
+        lines = [','.join(self.table.area.columns)]
+        for chunk in self.iter_chunks():
+            lines.extend(','.join(f'{n:02d}' for n in row) for row in chunk.tolist())
+        return '\n'.join(lines) + '\n'
+
+
+class FilterSummary:
+    """可缓存的缩水结果：注数、每步剩余注数、前几注组合，以及保留的组合序号（不超过DOWNLOAD_LIMIT注时，供导出）
+
+    不引用组合特征表和全长的mask，缓存中只占很少的内存；导出时用result()在当前的特征表上还原FilterResult。
+    """
+
+    def __init__(self, total, count, steps, head, index=None):
+        self.total = total
+        self.count = count
+        self.steps = steps
+        self.head = head
+        self.index = index
+
+    @classmethod
+    def from_result(cls, result, head=100, limit=DOWNLOAD_LIMIT):
+        index = np.flatnonzero(result.mask).astype(np.int32) if result.count <= limit else None
+        return cls(len(result.table), result.count, [tuple(step) for step in result.steps],
+                   result.combinations(limit=head), index)
+
+    @property
+    def ratio(self):
+        return self.count / self.total
+
+    def result(self, table=None):
+        """还原为FilterResult（只有保存了组合序号时可以）"""
+        if self.index is None:
+            raise ValueError(f"剩余组合超过{DOWNLOAD_LIMIT:,}注，没有保存组合序号")
+        table = table if table is not None else get_table()
+        mask = np.zeros(len(table), dtype=bool)
+        mask[self.index] = True
+        return FilterResult(table, mask, self.steps)
+
+
+def filter_combinations(table=None, sum_range=None, span_range=None, odd_counts=None, small_counts=None,
+                        zone_ranges=None, consecutive_range=None, exclude=(), require=(),
+                        cold=(), cold_range=None):
+    """按条件筛选红球组合，未设置的条件不参与筛选
+
+    sum_range/span_range/consecutive_range/cold_range为闭区间(最小, 最大)；
+    odd_counts/small_counts为允许的奇数个数、小号个数；zone_ranges为三个区间各自的(最小, 最大)或None；
+    exclude为排除的号码，require为必须包含的号码；cold为冷号列表，cold_range限制每注包含的冷号个数。
+    """
+    table = table if table is not None else get_table()
+    picks = table.area.picks
+    conditions = []
+    if sum_range is not None:
+        conditions.append((f'和值{sum_range[0]}-{sum_range[1]}', lambda: _in_range(table.sums, sum_range)))
+    if span_range is not None:
+        conditions.append((f'跨度{span_range[0]}-{span_range[1]}', lambda: _in_range(table.spans, span_range)))
+    if odd_counts is not None:
+        labels = '、'.join(f'{k}:{picks - k}' for k in sorted(odd_counts))
+        conditions.append((f'奇偶比{labels}', lambda: _allowed(table.odd, odd_counts, picks)))
+    if small_counts is not None:
+        labels = '、'.join(f'{k}:{picks - k}' for k in sorted(small_counts))
+        conditions.append((f'大小比{labels}', lambda: _allowed(table.small, small_counts, picks)))
+    for name, zone, bounds in zip(table.area.zone_names, table.zones, zone_ranges or ()):
+        if bounds is not None:
+            conditions.append((f'{name}{bounds[0]}-{bounds[1]}个', lambda zone=zone, bounds=bounds: _in_range(zone, bounds)))
+    if consecutive_range is not None:
+        conditions.append((f'连号{consecutive_range[0]}-{consecutive_range[1]}对',
+                           lambda: _in_range(table.consecutive, consecutive_range)))
+    if exclude:
+        conditions.append((f'排除{len(exclude)}个号码', lambda: table.member_counts(exclude) == 0))
+    if require:
+        conditions.append((f'包含{len(require)}个号码', lambda: table.member_counts(require) == len(set(require))))
+    if cold_range is not None:
+        conditions.append((f'冷号{cold_range[0]}-{cold_range[1]}个', lambda: _in_range(table.member_counts(cold), cold_range)))
+
+    mask = np.ones(len(table), dtype=bool)
+    steps = [('全部组合', len(table))]
+    for label, condition in conditions:
+        mask &= condition()
+        steps.append((label, int(np.count_nonzero(mask))))
+    return FilterResult(table, mask, steps)
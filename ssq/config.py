@@ -0,0 +1,52 @@
+"""运行配置，均可通过环境变量覆盖"""
+
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 本地历史数据：SQLite数据库，为空时从CSV导入
+DATA_PATH = os.environ.get('SSQ_DATA_PATH', os.path.join(BASE_DIR, 'data', 'initial_data.csv'))
+DB_PATH = os.environ.get('SSQ_DB_PATH', os.path.join(BASE_DIR, 'data', 'ssq.db'))
+# 预构建的启动包（python -m ssq.bundle build），与当前数据一致时启动直接使用
+BUNDLE_DIR = os.environ.get('SSQ_BUNDLE_DIR', os.path.join(BASE_DIR, 'data', 'bundle'))
+
+# 网络数据源
+HISTORY_URL = os.environ.get('SSQ_HISTORY_URL', 'https://datachart.500.com/ssq/history/history.shtml')
+FETCH_TIMEOUT = float(os.environ.get('SSQ_FETCH_TIMEOUT', '10'))
+
+# 后台定时刷新（开奖日为周二、周四、周日，北京时间21:15开奖）
+AUTO_REFRESH = os.environ.get('SSQ_AUTO_REFRESH', '1') != '0'
+REFRESH_AT = os.environ.get('SSQ_REFRESH_AT', '21:45')
+REFRESH_RETRY_MINUTES = int(os.environ.get('SSQ_REFRESH_RETRY_MINUTES', '15'))
+REFRESH_MAX_RETRIES = int(os.environ.get('SSQ_REFRESH_MAX_RETRIES', '6'))
+
+# 性能调试：记录每次重跑各阶段的耗时与内存，可选追加到JSONL日志
+PROFILE = os.environ.get('SSQ_PROFILE', '0') == '1'
+PROFILE_LOG = os.environ.get('SSQ_PROFILE_LOG') or None
+# 内存统计基于tracemalloc，开销较大，可单独关闭
+PROFILE_MEMORY = os.environ.get('SSQ_PROFILE_MEMORY', '1') != '0'
+
+# 图表渲染后端：matplotlib（服务端渲染PNG）或 vega-lite（浏览器端渲染）
+CHART_BACKEND = os.environ.get('SSQ_CHART_BACKEND', 'matplotlib').lower()
+
+# 后台计算任务的进程数（默认为CPU核数，最多4个；0或1表示不使用进程池，在后台线程中执行）
+JOB_WORKERS = int(os.environ['SSQ_JOB_WORKERS']) if os.environ.get('SSQ_JOB_WORKERS') else None
+# 小任务直接在后台线程中执行：进程池的任务分发和结果传输约需0.6秒，任务太小时超过并行收益。
+# 提交时给出计算量估计的任务（显著性检验为 期数×模拟次数，单线程约每1000万次模拟1.2秒）
+# 不超过JOB_INLINE_WORK时在后台线程中执行：默认即500期、10000次模拟及以下，完整历史（约3300期）的10000次模拟使用进程池；
+# 没有计算量估计的任务按分块数判断，不超过JOB_INLINE_CHUNKS块时在后台线程中执行
+JOB_INLINE_WORK = int(os.environ.get('SSQ_JOB_INLINE_WORK', '5000000'))
+JOB_INLINE_CHUNKS = int(os.environ.get('SSQ_JOB_INLINE_CHUNKS', '20'))
+# 页面轮询后台任务进度的间隔（秒）
+JOB_POLL_SECONDS = float(os.environ.get('SSQ_JOB_POLL_SECONDS', '0.5'))
+
+# 显著性检验的随机种子
+SIGNIFICANCE_SEED = int(os.environ.get('SSQ_SIGNIFICANCE_SEED', '20030223'))
+
+# 内存上限（MB）：共享缓存按字节数淘汰最久未使用的条目；单个会话超过上限时释放导出文件等可重建的内容
+ANALYTICS_CACHE_MB = float(os.environ.get('SSQ_ANALYTICS_CACHE_MB', '256'))
+CHART_CACHE_MB = float(os.environ.get('SSQ_CHART_CACHE_MB', '256'))
+EXPORT_CACHE_MB = float(os.environ.get('SSQ_EXPORT_CACHE_MB', '64'))
+SESSION_MEMORY_MB = float(os.environ.get('SSQ_SESSION_MEMORY_MB', '32'))
+# 超过该时间没有重跑的会话不再计入
+SESSION_IDLE_MINUTES = float(os.environ.get('SSQ_SESSION_IDLE_MINUTES', '60'))
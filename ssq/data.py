@@ -0,0 +1,153 @@
+"""历史开奖数据的读取、抓取、解析与合并（不依赖Streamlit）"""
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+
+from . import config, validation
+from .games import SSQ
+
+logger = logging.getLogger(__name__)
+
+RED_COLUMNS = SSQ.area('red').columns
+BLUE_COLUMN = SSQ.area('blue').columns[0]
+BALL_COLUMNS = SSQ.columns
+HISTORY_COLUMNS = SSQ.history_columns
+
+# 数据范围选项；预设范围对应的最近期数（None表示全部）
+PERIOD_OPTIONS = ["全部数据", "最近50期", "最近100期", "最近200期", "自定义范围"]
+PRESET_PERIODS = {"全部数据": None, "最近50期": 50, "最近100期": 100, "最近200期": 200}
+
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+
+def normalize_history(df, game=SSQ):
+    """统一数据类型，并按开奖日期从新到旧排序"""
+    df = df.copy()
+    df['期号'] = df['期号'].astype(int)
+    for col in game.columns:
+        df[col] = df[col].astype(int)
+    df['奖池(元)'] = df['奖池(元)'].astype(float)
+    if df['开奖日期'].dtype.kind != 'M':
+        df['开奖日期'] = pd.to_datetime(df['开奖日期'])
+    return df.sort_values(by='开奖日期', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def _to_numbers(series):
+    """转换为浮点数组，无法解析的为NaN（数值列直接转换，不走字符串处理）"""
+    if series.dtype.kind in 'iuf':
+        return series.to_numpy(dtype=float)
+    text = series.astype(str).str.strip().str.replace(',', '', regex=False)
+    return pd.to_numeric(text, errors='coerce').to_numpy(dtype=float)
+
+
+def validate_history(df, source='data', game=SSQ):
+    """校验原始数据（号码列为game.columns）：隔离不合格的行，返回ValidationReport（report.valid为规范化后的数据）"""
+    start = time.perf_counter()
+    df = df.reset_index(drop=True)
+    issues = _to_numbers(df['期号'])
+    balls = {area.name: np.array([_to_numbers(df[col]) for col in area.columns]).reshape(area.picks, len(df))
+             for area in game.areas}
+    dates = df['开奖日期']
+    if dates.dtype.kind != 'M':
+        # 日期互不重复，解析缓存没有收益
+        dates = pd.to_datetime(dates, errors='coerce', cache=False)
+    dates = dates.to_numpy(dtype='datetime64[ns]')
+    pools = _to_numbers(df['奖池(元)'])
+
+    flags = validation.check_rows(issues, balls, dates, pools, game)
+    bad = np.logical_or.reduce(flags, axis=0)
+    good = ~bad
+
+    valid = pd.DataFrame({'期号': issues[good].astype(np.int64)})
+    for area in game.areas:
+        for col, values in zip(area.columns, balls[area.name][:, good].astype(np.int64)):
+            valid[col] = values
+    valid['开奖日期'] = dates[good]
+    valid['奖池(元)'] = pools[good]
+    valid = normalize_history(valid, game)
+
+    quarantine = df[bad].copy()
+    quarantine.insert(0, '问题', validation.row_reasons(flags[:, bad], game))
+    counts = dict(zip(validation.check_labels(game), flags.sum(axis=1).tolist()))
+    warnings = validation.check_sequence(valid['期号'].to_numpy(), valid['开奖日期'].to_numpy())
+    report = validation.ValidationReport(source, valid, quarantine, counts, warnings,
+                                         (time.perf_counter() - start) * 1000)
+    if not report.ok:
+        logger.warning("%s数据中有%d行未通过校验，已隔离: %s", source, len(quarantine),
+                       report.summary()['counts'])
+    return validation.record(report)
+
+
+def load_history_csv(path=None):
+    """读取本地CSV历史数据（经过校验，不合格的行被隔离）"""
+    return validate_history(pd.read_csv(path or config.DATA_PATH), source='csv').valid
+
+
+def fetch_history_html(url=None, timeout=None):
+    """下载开奖历史页面"""
+    response = requests.get(url or config.HISTORY_URL, headers=REQUEST_HEADERS,
+                            timeout=timeout or config.FETCH_TIMEOUT)
+    response.raise_for_status()
+    response.encoding = 'utf-8'
+    return response.text
+
+
+def parse_history_html(html):
+    """解析开奖历史页面中的表格，未找到表格时抛出ValueError"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # 查找表格数据
+    table = soup.find('table', class_='tb_data')
+    if not table:
+        raise ValueError("未找到开奖数据表格")
+
+    # 解析表格数据
+    rows = table.find_all('tr')[2:]  # 跳过表头
+    data = []
+    for row in rows:
+        cols = row.find_all('td')
+        if len(cols) >= 10:
+            issue = cols[0].text.strip()
+            red_balls = [cols[i].text.strip() for i in range(1, 7)]
+            blue_ball = cols[7].text.strip()
+            date = cols[-1].text.strip()
+            pool = cols[9].text.strip()  # 第9列为奖池奖金（第8列为快乐星期天）
+
+            record = {'期号': issue}
+            record.update(zip(RED_COLUMNS, red_balls))
+            record.update({BLUE_COLUMN: blue_ball, '开奖日期': date, '奖池(元)': pool})
+            data.append(record)
+
+    # 抓取的都是字符串，交给校验统一转换类型并隔离异常行
+    return validate_history(pd.DataFrame(data, columns=HISTORY_COLUMNS), source='fetch').valid
+
+
+def merge_history(new_df, old_df, game=SSQ):
+    """合并新旧数据，期号重复时以新数据为准"""
+    if old_df is None or old_df.empty:
+        return normalize_history(new_df, game)
+    combined_df = pd.concat([new_df, old_df])
+    combined_df = combined_df.drop_duplicates(subset=['期号'], keep='first')
+    return normalize_history(combined_df, game)
+
+
+def filter_history(df, period, start_date=None, end_date=None):
+    """根据选择的时间范围筛选数据"""
+    if df.empty:
+        return df
+
+    if period in PRESET_PERIODS:
+        limit = PRESET_PERIODS[period]
+        return df if limit is None else df.head(limit)
+    elif period == "自定义范围" and start_date and end_date:
+        mask = (df['开奖日期'].dt.date >= start_date) & (df['开奖日期'].dt.date <= end_date)
+        return df[mask]
+    else:
+        return df
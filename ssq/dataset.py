@@ -0,0 +1,117 @@
+"""数据集快照与原子替换"""
+
+import hashlib
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .games import SSQ
+from .positional import PositionIndex
+
+
+class Dataset:
+    """某一玩法、某一版本的完整历史数据（只读快照）
+
+    df按开奖日期从新到旧排序，号码列为game.columns；balls为各号码区按列存放的NumPy数组
+    （每期多个号码的区为(期数, picks)，每期一个号码的区为一维），
+    version由玩法和df的全部列（期号、号码、开奖日期、奖池等）计算得到，内容不变则版本不变。
+    """
+
+    def __init__(self, df, loaded_at=None, indexes=None, game=SSQ):
+        self.game = game
+        self.df = df
+        self.issues = df['期号'].to_numpy(dtype=np.int64)
+        self.balls = {}
+        for area in game.areas:
+            columns = area.columns if area.picks > 1 else area.columns[0]
+            self.balls[area.name] = df[columns].to_numpy(dtype=np.int8)
+        self.version = self._fingerprint()
+        self.loaded_at = loaded_at or time.time()
+        # 各号码区的前缀和表可以直接传入（启动包中已生成），否则首次使用时生成
+        self._indexes = dict(indexes or {})
+        self._indexes_lock = threading.Lock()
+        for arr in (self.issues, *self.balls.values()):
+            arr.setflags(write=False)
+
+    def _fingerprint(self):
+        digest = hashlib.sha1(self.game.key.encode())
+        digest.update(np.ascontiguousarray(self.issues).tobytes())
+        for balls in self.balls.values():
+            digest.update(np.ascontiguousarray(balls).tobytes())
+        # 其余列（开奖日期、奖池等）同样会存储和显示，修正它们也要使缓存失效
+        numbered = {'期号', *self.game.columns}
+        for column in self.df.columns:
+            if column not in numbered:
+                digest.update(str(column).encode())
+                digest.update(pd.util.hash_pandas_object(self.df[column], index=False).to_numpy().tobytes())
+        return digest.hexdigest()[:12]
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def reds(self):
+        """双色球红球(期数, 6)"""
+        return self.balls['red']
+
+    @property
+    def blues(self):
+        """双色球蓝球"""
+        return self.balls['blue']
+
+    def index(self, area):
+        """号码区的前缀和表（首次使用时生成，随快照一起释放）"""
+        with self._indexes_lock:
+            if area not in self._indexes:
+                self._indexes[area] = PositionIndex(self.balls[area], self.game.area(area))
+            return self._indexes[area]
+
+    def issue_row(self, issue):
+        """期号所在的行（0为最新一期），不存在时抛出KeyError"""
+        rows = np.flatnonzero(self.issues == issue)
+        if not len(rows):
+            raise KeyError(issue)
+        return int(rows[0])
+
+    def issue_at_or_before(self, issue):
+        """不晚于issue的最近一期期号（期号不连续时取前一期），早于第一期时为None"""
+        rows = np.flatnonzero(self.issues <= issue)
+        return int(self.issues[rows[0]]) if len(rows) else None
+
+    @property
+    def cache_version(self):
+        """共享缓存中使用的版本：(玩法, 数据版本)，切换版本时只清理同一玩法的旧条目"""
+        return (self.game.key, self.version)
+
+    @property
+    def latest_issue(self):
+        return int(self.issues[0]) if len(self.issues) else None
+
+
+class DatasetHolder:
+    """持有当前数据集，后台刷新时整体替换，读取方永远拿到一致的快照"""
+
+    def __init__(self, dataset):
+        self._dataset = dataset
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def current(self):
+        # 引用赋值是原子的，读取无需加锁
+        return self._dataset
+
+    def subscribe(self, listener):
+        """注册数据版本切换后的回调，参数为新数据集"""
+        self._listeners.append(listener)
+
+    def swap(self, dataset):
+        """替换为新数据集，版本相同则忽略；返回是否发生了替换"""
+        with self._lock:
+            if dataset.version == self._dataset.version:
+                return False
+            self._dataset = dataset
+        for listener in list(self._listeners):
+            listener(dataset)
+        return True
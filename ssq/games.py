@@ -0,0 +1,156 @@
+"""彩票玩法定义：号码区（号码范围、每期开出个数、区间划分、大小分界）与奖级规则
+
+双色球、大乐透、福彩3D都是"从M个号码中开出N个"的玩法，区别只在各号码区的参数和奖级规则。
+校验、数据集、数据库、启动包、前缀和表、组合特征表与通用的区间/奇偶/大小统计只依赖这里的定义：
+号码区内的号码统一编码为1..size（编码 = 号码 - low + 1），同一套NumPy代码（bincount、号码位图、前缀和表）
+即可用于任何玩法，多个玩法的数据可以同时载入同一进程。
+页面、图表、转移统计、显著性检验、推荐和网页抓取仍按双色球（红球6个、蓝球1个）编写。
+"""
+
+import numpy as np
+
+
+class Area:
+    """一个号码区，如双色球的红球区（1-33开出6个）
+
+    distinct为True时同一期的号码互不相同、按升序存放；为False时（如3D的百、十、个位）各位置可以重复，
+    按位置存放，中奖按位置比对。
+    """
+
+    def __init__(self, name, label, low, high, picks, zones=None, zone_names=None, small_max=None,
+                 distinct=True, columns=None):
+        self.name = name
+        self.label = label
+        self.low = low
+        self.high = high
+        self.picks = picks
+        self.size = high - low + 1
+        self.distinct = distinct
+        # 大小分界：不超过small_max的为小号，默认前一半
+        self.small_max = small_max if small_max is not None else low + self.size // 2 - 1
+        self.zones = tuple(zones or ((low, high),))
+        self.zone_names = tuple(zone_names or (f'{lo}-{hi}' for lo, hi in self.zones))
+        if columns is None:
+            columns = [label] if picks == 1 else [f'{label}{i}' for i in range(1, picks + 1)]
+        self.columns = list(columns)
+
+    def __repr__(self):
+        return f'Area({self.name!r}, {self.low}-{self.high}, picks={self.picks})'
+
+    @property
+    def numbers(self):
+        return np.arange(self.low, self.high + 1)
+
+    def encode(self, balls):
+        """号码转换为1..size的编码"""
+        return np.asarray(balls) - (self.low - 1)
+
+    def decode(self, codes):
+        return np.asarray(codes) + (self.low - 1)
+
+
+class Game:
+    """一种玩法：若干号码区和奖级规则
+
+    prizes为按奖级从高到低排列的(奖级名称, 中奖条件列表)，每个条件是各号码区的命中个数，
+    如双色球四等奖为[(5, 0), (4, 1)]。
+    """
+
+    def __init__(self, key, name, areas, prizes=()):
+        self.key = key
+        self.name = name
+        self.areas = tuple(areas)
+        self.prizes = tuple((level, tuple(tuple(hits) for hits in rules)) for level, rules in prizes)
+        self._areas = {area.name: area for area in self.areas}
+        # 各号码区命中个数 -> 奖级下标（-1为未中奖）
+        self._levels = np.full(tuple(area.picks + 1 for area in self.areas), -1, dtype=np.int8)
+        for level, (_, rules) in enumerate(self.prizes):
+            for hits in rules:
+                self._levels[hits] = level
+
+    def __repr__(self):
+        return f'Game({self.key!r})'
+
+    def area(self, name):
+        return self._areas[name]
+
+    @property
+    def columns(self):
+        """所有号码列"""
+        return [column for area in self.areas for column in area.columns]
+
+    @property
+    def history_columns(self):
+        return ['期号'] + self.columns + ['开奖日期', '奖池(元)']
+
+    def hits(self, tickets, draw):
+        """每注号码与一期开奖号码在各号码区的命中个数，返回(注数, 号码区数)
+
+        tickets为{号码区名: (注数, picks)数组}，draw为{号码区名: 长度picks的号码}；
+        号码不重复的区按号码集合比对（位图查表），其余按位置比对。
+        """
+        columns = []
+        for area in self.areas:
+            ticket = np.asarray(tickets[area.name]).reshape(-1, area.picks)
+            drawn = np.asarray(draw[area.name]).reshape(area.picks)
+            if area.distinct:
+                bitmap = np.zeros(area.size + 1, dtype=np.int8)
+                bitmap[area.encode(drawn)] = 1
+                columns.append(bitmap[area.encode(ticket)].sum(axis=1))
+            else:
+                columns.append((ticket == drawn).sum(axis=1))
+        return np.stack(columns, axis=1)
+
+    def prize_levels(self, hits):
+        """命中个数(注数, 号码区数) -> 奖级下标，未中奖为-1"""
+        hits = np.asarray(hits).reshape(-1, len(self.areas))
+        return self._levels[tuple(hits.T)]
+
+    def prize(self, hits):
+        """一注的奖级名称，未中奖为None"""
+        level = int(self.prize_levels(hits)[0])
+        return self.prizes[level][0] if level >= 0 else None
+
+
+SSQ = Game('ssq', '双色球', [
+    Area('red', '红球', 1, 33, 6, zones=((1, 11), (12, 22), (23, 33)),
+         zone_names=('小号区(1-11)', '中号区(12-22)', '大号区(23-33)'), small_max=16),
+    Area('blue', '蓝球', 1, 16, 1, small_max=8),
+], prizes=[
+    ('一等奖', [(6, 1)]),
+    ('二等奖', [(6, 0)]),
+    ('三等奖', [(5, 1)]),
+    ('四等奖', [(5, 0), (4, 1)]),
+    ('五等奖', [(4, 0), (3, 1)]),
+    ('六等奖', [(2, 1), (1, 1), (0, 1)]),
+])
+
+DLT = Game('dlt', '大乐透', [
+    Area('front', '前区', 1, 35, 5, zones=((1, 12), (13, 24), (25, 35)),
+         zone_names=('一区(1-12)', '二区(13-24)', '三区(25-35)')),
+    Area('back', '后区', 1, 12, 2),
+], prizes=[
+    ('一等奖', [(5, 2)]),
+    ('二等奖', [(5, 1)]),
+    ('三等奖', [(5, 0)]),
+    ('四等奖', [(4, 2)]),
+    ('五等奖', [(4, 1)]),
+    ('六等奖', [(3, 2)]),
+    ('七等奖', [(4, 0)]),
+    ('八等奖', [(3, 1), (2, 2)]),
+    ('九等奖', [(3, 0), (2, 1), (1, 2), (0, 2)]),
+])
+
+# 3D只按直选规则判奖（组选按号码的组合比对，不属于按号码区命中个数的规则）
+FC3D = Game('3d', '福彩3D', [
+    Area('digits', '号码', 0, 9, 3, distinct=False, columns=['百位', '十位', '个位']),
+], prizes=[
+    ('直选', [(3,)]),
+])
+
+GAMES = {game.key: game for game in (SSQ, DLT, FC3D)}
+
+
+def get_game(key):
+    """按key取玩法，未知的玩法抛出KeyError"""
+    return GAMES[key]
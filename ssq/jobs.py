@@ -0,0 +1,344 @@
+"""后台计算任务：把耗时的统计分块交给常驻进程池执行，页面轮询进度和中间结果
+
+一个任务由若干互相独立的分块（可pickle的函数和参数）和一个合并函数finish组成。
+每个分块完成时记录结果、更新进度，已完成的分块随时可以合并为中间结果；全部完成后合并为最终结果。
+相同key的任务在所有会话之间共享：进行中的任务直接复用，只有所有发起者都取消时才真正取消。
+簿记在分块的完成回调中进行，不占用页面线程；分块较少的小任务或进程池不可用时在一个后台线程中依次执行。
+进程退出时（atexit）取消进行中的任务，等待后台线程结束并关闭进程池。
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+STATUS_LABELS = {
+    PENDING: '排队中',
+    RUNNING: '计算中',
+    DONE: '已完成',
+    FAILED: '失败',
+    CANCELLED: '已取消',
+}
+
+# 保留的已结束任务数（供其他会话直接取结果）
+MAX_FINISHED_JOBS = 32
+
+# 进程内所有的任务表（退出时逐个关闭）
+_managers = weakref.WeakSet()
+
+
+# ---------- 进程池 ----------
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def default_workers():
+    return config.JOB_WORKERS if config.JOB_WORKERS is not None else min(4, os.cpu_count() or 1)
+
+
+def use_pool(chunks, work=None):
+    """分块数为chunks、估计计算量为work的任务是否交给进程池（小任务在当前进程中执行更快）
+
+    给出work时按计算量判断（与config.JOB_INLINE_WORK比较），否则按分块数判断。
+    """
+    if default_workers() <= 1 or chunks <= 1:
+        return False
+    if work is not None:
+        return work > config.JOB_INLINE_WORK
+    return chunks > config.JOB_INLINE_CHUNKS
+
+
+def get_pool():
+    """进程池在首次使用时创建并常驻，进程数由JOB_WORKERS限定；
+    优先使用forkserver，避免在多线程的Streamlit进程中直接fork"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=default_workers(), mp_context=context)
+        return _pool
+
+
+def reset_pool(wait=False):
+    """关闭进程池（下次使用时重新创建），wait为是否等待工作进程退出"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# ---------- 任务 ----------
+
+class Job:
+    """一个后台任务的状态：done/total为已完成/全部分块数，result为最终结果，error为失败原因
+
+    work为计算量估计（可选，用于决定是否使用进程池），pooled为是否在进程池中执行。
+    进程池不可用而改在后台线程中重新执行时attempt加一，之前提交的分块的结果按attempt丢弃。
+    """
+
+    def __init__(self, key, label, tasks, finish, on_done=None, work=None):
+        self.key = key
+        self.label = label
+        self.work = work
+        self.pooled = False
+        self.attempt = 0
+        self.total = len(tasks)
+        self.done = 0
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.owners = set()
+        self.created_at = time.time()
+        self.finished_at = None
+        self._tasks = tasks
+        self._finish = finish
+        self._on_done = on_done
+        self._results = {}
+        self._futures = []
+        self._partial = (0, None)
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.time()) - self.created_at
+
+    def wait(self, timeout=None):
+        """等待任务结束，返回是否已结束"""
+        return self._finished.wait(timeout)
+
+    def partial(self):
+        """已完成分块合并得到的中间结果（按分块顺序），还没有分块完成时为None"""
+        with self._lock:
+            done, cached = self._partial
+            if self.status == DONE:
+                return self.result
+            if self.done == 0 or done == self.done:
+                return cached
+            results = [self._results[i] for i in sorted(self._results)]
+            count = self.done
+        partial = self._finish(results)
+        with self._lock:
+            if count > self._partial[0]:
+                self._partial = (count, partial)
+        return partial
+
+    def summary(self):
+        return {
+            'label': self.label,
+            'status': STATUS_LABELS[self.status],
+            'progress': f'{self.done}/{self.total}',
+            'owners': len(self.owners),
+            'pool': self.pooled,
+            'elapsed_s': round(self.elapsed, 2),
+            'error': self.error,
+        }
+
+    def _chunk_done(self, index, result, attempt):
+        with self._lock:
+            if self.finished or attempt != self.attempt:
+                return
+            self._results[index] = result
+            self.done += 1
+            if self.done < self.total:
+                return
+            results = [self._results[i] for i in range(self.total)]
+        try:
+            result = self._finish(results)
+        except Exception as e:
+            self._end(FAILED, error=str(e))
+            return
+        if self._end(DONE, result=result) and self._on_done is not None:
+            self._on_done(result)
+
+    def _end(self, status, result=None, error=None):
+        """结束任务并取消尚未开始的分块，返回是否由本次调用结束"""
+        with self._lock:
+            if self.finished:
+                return False
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self._results = {}
+            self._partial = (0, None)
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.cancel()
+        self._finished.set()
+        return True
+
+    def _restart(self):
+        """放弃已提交的分块，重新开始一轮执行，返回新的attempt"""
+        with self._lock:
+            self.attempt += 1
+            self.done = 0
+            self.pooled = False
+            self._results = {}
+            self._partial = (0, None)
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.cancel()
+        return self.attempt
+
+
+class JobManager:
+    """按key去重的后台任务表（进程内所有会话共享）"""
+
+    def __init__(self, max_finished=MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._threads = set()
+        self._lock = threading.Lock()
+        _managers.add(self)
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def submit(self, key, label, tasks, finish, owner=None, on_done=None, work=None):
+        """提交任务，tasks为[(函数, 参数元组)]，finish(分块结果列表)合并结果，on_done(结果)在完成后调用
+
+        work为任务的计算量估计，见use_pool。
+
+        相同key的任务进行中或已完成时直接返回该任务（失败或取消的会重新提交）。
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job.status in (FAILED, CANCELLED):
+                job = Job(key, label, tasks, finish, on_done, work)
+                self._jobs[key] = job
+                start = True
+            else:
+                start = False
+            self._jobs.move_to_end(key)
+            job.owners.add(owner)
+            self._prune()
+        if start:
+            self._start(job)
+        return job
+
+    def cancel(self, job, owner=None):
+        """owner不再需要该任务；没有其他会话在等待时取消它"""
+        with self._lock:
+            job.owners.discard(owner)
+            if job.owners:
+                return False
+        return job._end(CANCELLED)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active(self):
+        return [job for job in self.jobs() if not job.finished]
+
+    def shutdown(self, timeout=10):
+        """取消所有进行中的任务并等待后台线程结束（进程退出前调用），返回是否全部结束"""
+        for job in self.active():
+            job._end(CANCELLED)
+        with self._lock:
+            threads = list(self._threads)
+        deadline = time.time() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.time()))
+        return not any(thread.is_alive() for thread in threads)
+
+    def _prune(self):
+        finished = [key for key, job in self._jobs.items() if job.finished]
+        for key in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[key]
+
+    def _start(self, job):
+        job.status = RUNNING
+        if not job.total:
+            job._end(DONE, result=job._finish([]))
+            return
+        attempt = job.attempt
+        if use_pool(job.total, job.work):
+            try:
+                pool = get_pool()
+                job.pooled = True
+                for index, (fn, args) in enumerate(job._tasks):
+                    future = pool.submit(fn, *args)
+                    job._futures.append(future)
+                    future.add_done_callback(
+                        lambda future, index=index, attempt=attempt: self._collect(job, index, future, attempt))
+                return
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                logger.warning('进程池不可用，改为在后台线程中执行: %s', e)
+                reset_pool()
+                # 已提交的分块可能仍会完成，它们的回调按attempt丢弃
+                attempt = job._restart()
+        thread = threading.Thread(target=self._run_inline, args=(job, attempt), name=f'job-{job.label}',
+                                  daemon=True)
+        with self._lock:
+            self._threads.add(thread)
+        thread.start()
+
+    def _collect(self, job, index, future, attempt):
+        if future.cancelled() or job.finished or attempt != job.attempt:
+            return
+        error = future.exception()
+        if error is not None:
+            if isinstance(error, BrokenProcessPool):
+                reset_pool()
+            job._end(FAILED, error=str(error) or type(error).__name__)
+            return
+        job._chunk_done(index, future.result(), attempt)
+
+    def _run_inline(self, job, attempt):
+        try:
+            for index, (fn, args) in enumerate(job._tasks):
+                if job.finished:
+                    return
+                try:
+                    result = fn(*args)
+                except Exception as e:
+                    job._end(FAILED, error=str(e) or type(e).__name__)
+                    return
+                job._chunk_done(index, result, attempt)
+        finally:
+            with self._lock:
+                self._threads.discard(threading.current_thread())
+
+
+# 进程内共享的任务表
+manager = JobManager()
+
+
+def shutdown(timeout=10):
+    """取消进程内所有进行中的任务，等待后台线程结束并关闭进程池"""
+    for item in list(_managers):
+        item.shutdown(timeout)
+    reset_pool(wait=True)
+
+
+atexit.register(shutdown)
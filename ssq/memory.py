@@ -0,0 +1,112 @@
+"""内存统计：估算对象占用的字节数，按缓存、按会话汇总，供性能调试面板显示
+
+sizeof只统计数据本身（NumPy数组、DataFrame、字节串、字符串及其容器），是估计值：
+内存映射的数组（启动包）由页缓存承担、多个进程共享，不计入；元素全是标量的长列表按首个元素的大小估算。
+"""
+
+import io
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import config
+
+MB = 1024 * 1024
+
+_SCALARS = (int, float, bool, str, type(None), np.generic)
+
+
+def _mapped(arr):
+    """数组是否为内存映射文件的视图"""
+    while arr is not None:
+        if isinstance(arr, np.memmap):
+            return True
+        base = arr.base
+        if not isinstance(base, np.ndarray):
+            return base is not None and type(base).__name__ == 'mmap'
+        arr = base
+    return False
+
+
+def sizeof(obj, _seen=None):
+    """obj及其引用的数据占用的字节数（估计值，同一对象只计一次）"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return 0 if _mapped(obj) else obj.nbytes
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, (bytes, bytearray, str)):
+        return sys.getsizeof(obj)
+    if isinstance(obj, io.BytesIO):
+        return obj.getbuffer().nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(sizeof(k, _seen) + sizeof(v, _seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        if len(obj) > 64 and not isinstance(obj, (set, frozenset)) and isinstance(obj[0], _SCALARS):
+            return sys.getsizeof(obj) + len(obj) * sys.getsizeof(obj[0])
+        return sys.getsizeof(obj) + sum(sizeof(item, _seen) for item in obj)
+    if hasattr(obj, '__dict__') and not isinstance(obj, type):
+        return sys.getsizeof(obj) + sizeof(vars(obj), _seen)
+    return sys.getsizeof(obj)
+
+
+class SessionLedger:
+    """各会话在最近一次重跑后仍持有的内存（按项目名记录）
+
+    每次重跑结束时由页面整体更新本会话的记录；超过cap_bytes的会话由页面释放可以重建的项目（如导出文件）。
+    会话结束时Streamlit不会通知，超过idle_seconds没有重跑的会话从记录中移除。
+    clock返回当前时间（秒），默认为time.time。
+    """
+
+    def __init__(self, cap_bytes=None, idle_seconds=None, clock=time.time):
+        self.cap_bytes = cap_bytes if cap_bytes is not None else config.SESSION_MEMORY_MB * MB
+        self.idle_seconds = idle_seconds if idle_seconds is not None else config.SESSION_IDLE_MINUTES * 60
+        self._clock = clock
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def record(self, session, items):
+        """items为{项目名: 字节数}，替换该会话之前的记录"""
+        now = self._clock()
+        with self._lock:
+            self._sessions[session] = {'items': dict(items), 'seen': now}
+            for key in [k for k, v in self._sessions.items() if now - v['seen'] > self.idle_seconds]:
+                del self._sessions[key]
+
+    def total(self, session):
+        with self._lock:
+            entry = self._sessions.get(session)
+            return sum(entry['items'].values()) if entry else 0
+
+    def over_cap(self, session):
+        return self.cap_bytes > 0 and self.total(session) > self.cap_bytes
+
+    def forget(self, session):
+        with self._lock:
+            self._sessions.pop(session, None)
+
+    def summary(self):
+        """各会话的记录（按占用从高到低），单位KB"""
+        now = self._clock()
+        with self._lock:
+            rows = [dict({'session': str(session)[:8], 'total_kb': round(sum(entry['items'].values()) / 1024, 1),
+                          'idle_s': round(now - entry['seen'], 1)},
+                         **{f'{name}_kb': round(size / 1024, 1) for name, size in entry['items'].items()})
+                    for session, entry in self._sessions.items()]
+        return sorted(rows, key=lambda row: row['total_kb'], reverse=True)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+# 进程内所有会话的内存记录
+sessions = SessionLedger()
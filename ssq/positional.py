@@ -0,0 +1,189 @@
+"""按位置（红球从小到大排序后的第1~6个号码）的前缀和表及其上的统计
+
+数据集生成时建一次前缀和表：prefix[i, s, v-1]为最新的i期中第s位为v的次数，values[i, s]为这i期第s位号码之和。
+数据按开奖日期从新到旧排列，页面上的数据范围（包括回溯到某一期的历史快照）都是连续的若干行[start, stop)，
+任意范围的号码次数、遗漏、位置频率、均值、分位数只需两行相减（遗漏为二分查找）后在6×33的矩阵上计算，与范围长度无关。
+蓝球使用同样的表（只有一个位置，16个号码）；其他玩法的号码区（games.Area）内部编码为1..size后同样适用，
+结果中的位置名称和号码轴取自建表时的号码区。
+"""
+
+import numpy as np
+import pandas as pd
+
+from .games import SSQ
+
+RED = SSQ.area('red')
+# 双色球红球的位置名称和号码轴（页面使用）；其他号码区见SlotWindow.labels/numbers
+SLOT_LABELS = list(RED.columns)
+QUANTILES = (0.25, 0.5, 0.75)
+NUMBERS = RED.numbers
+
+
+class PositionIndex:
+    """整个数据集的位置前缀和表（balls为area号码区(期数, 位置数)的号码，红球已按升序存放，第s列即第s位；
+    每期一个号码的区如蓝球为一维数组）
+
+    表内号码按area.encode编码为1..size，prefix最后一维第v-1列对应编码v；values为编码之和。
+    次数不会超过总期数，期数少于65536时用uint16存放（真实数据约3300期，红球表只有1MB多）。
+    """
+
+    def __init__(self, balls, area=RED):
+        balls = area.encode(balls)
+        if balls.ndim == 1:
+            balls = balls[:, None]
+        size = area.size
+        n = len(balls)
+        dtype = np.uint16 if n <= np.iinfo(np.uint16).max else np.uint32
+        slots = balls.shape[1]
+        prefix = np.zeros((n + 1, slots, size), dtype=dtype)
+        # 先在第i+1行标记第i期的号码，再原地累加
+        prefix[np.arange(1, n + 1)[:, None], np.arange(slots), balls.astype(np.intp) - 1] = 1
+        np.cumsum(prefix, axis=0, dtype=dtype, out=prefix)
+        values = np.zeros((n + 1, slots), dtype=np.int64)
+        np.cumsum(balls, axis=0, out=values[1:])
+        self._set(prefix, values, area)
+
+    @classmethod
+    def from_arrays(cls, prefix, values, area=RED):
+        """由已生成的表（如启动包中内存映射的数组）直接构造"""
+        index = cls.__new__(cls)
+        index._set(prefix, values, area)
+        return index
+
+    def _set(self, prefix, values, area):
+        if prefix.shape[2] != area.size:
+            raise ValueError(f'前缀和表有{prefix.shape[2]}个号码，与{area!r}不一致')
+        self.area = area
+        self.periods = prefix.shape[0] - 1
+        self.slots = prefix.shape[1]
+        self.size = prefix.shape[2]
+        self.prefix = prefix
+        self.values = values
+        for arr in (self.prefix, self.values):
+            arr.setflags(write=False)
+
+    def __len__(self):
+        return self.periods
+
+    @property
+    def nbytes(self):
+        return self.prefix.nbytes + self.values.nbytes
+
+    def counts(self, start, stop):
+        """第[start, stop)行中各位置各号码的出现次数，形状(位置数, 号码数)"""
+        return self.prefix[stop].astype(np.int64) - self.prefix[start]
+
+    def last_seen(self, start, stop):
+        """第[start, stop)行中各位置各号码最近一次出现的行号（相对start），没有出现为stop-start
+
+        前缀和按列单调不减，对198列同时二分查找第一个超过prefix[start]的行，O(6×33×log n)。
+        """
+        flat = self.prefix.reshape(self.periods + 1, -1)
+        base = flat[start]
+        columns = np.arange(flat.shape[1])
+        lo = np.full(len(columns), start + 1)
+        hi = np.full(len(columns), stop + 1)
+        while True:
+            active = lo < hi
+            if not active.any():
+                break
+            mid = (lo + hi) // 2
+            reached = flat[np.minimum(mid, stop), columns] > base
+            hi = np.where(active & reached, mid, hi)
+            lo = np.where(active & ~reached, mid + 1, lo)
+        return (lo - 1 - start).reshape(self.slots, self.size)
+
+
+def _quantile_values(counts, quantiles):
+    """按号码出现次数求分位数（经验分布的下侧分位，不插值）
+
+    counts最后一维为各号码（编码1..size），返回最后一维为len(quantiles)的号码编码数组。
+    """
+    cumulative = np.cumsum(counts, axis=-1)
+    total = cumulative[..., -1:]
+    return np.stack([np.argmax(cumulative >= q * total, axis=-1) + 1 for q in quantiles], axis=-1)
+
+
+class SlotWindow:
+    """某个数据范围（连续的行[start, stop)）内的统计
+
+    number_counts/number_omissions返回按号码从小到大排列的数组（第i个为numbers[i]），
+    其余结果中的号码都已转换回号码区的实际号码。
+    """
+
+    def __init__(self, index, start, stop):
+        self.index = index
+        self.area = index.area
+        self.start = start
+        self.stop = stop
+        self.periods = stop - start
+
+    @property
+    def labels(self):
+        """各位置的名称，如红球1~6"""
+        return list(self.area.columns)
+
+    @property
+    def numbers(self):
+        return self.area.numbers
+
+    def head(self, recent):
+        """本范围内最新的recent期"""
+        return SlotWindow(self.index, self.start, min(self.start + recent, self.stop))
+
+    def number_counts(self):
+        """各号码的出现次数（同一期内号码不重复，各位置相加即可）"""
+        return self.index.counts(self.start, self.stop).sum(axis=0)
+
+    def number_omissions(self):
+        """各号码的当前遗漏期数（最近一期出现为0，从未出现为总期数）"""
+        return self.index.last_seen(self.start, self.stop).min(axis=0)
+
+    def missing(self, recent):
+        """最近recent期内没有出现过的号码"""
+        return [int(n) for n in self.numbers[self.head(recent).number_counts() == 0]]
+
+    def _matrix(self, values):
+        return pd.DataFrame(values, index=pd.Index(self.labels, name='位置'),
+                            columns=pd.Index(self.numbers, name='号码'))
+
+    def frequency(self):
+        """位置频率矩阵：行为各位置（红球1~6），列为各号码（1~33）"""
+        return self._matrix(self.index.counts(self.start, self.stop))
+
+    def omissions(self):
+        """各位置各号码的当前遗漏期数（最近一期出现为0，范围内从未出现为总期数）"""
+        return self._matrix(self.index.last_seen(self.start, self.stop))
+
+    def summary(self):
+        """各位置的均值、分位数和最常见号码"""
+        counts = self.index.counts(self.start, self.stop)
+        periods = max(self.periods, 1)
+        values = self.index.values
+        table = pd.DataFrame({'位置': self.labels})
+        table['平均值'] = self.area.decode((values[self.stop] - values[self.start]) / periods).round(2)
+        for q, column in zip(QUANTILES, _quantile_values(counts, QUANTILES).T):
+            table[f'{int(q * 100)}%分位'] = self.area.decode(column)
+        table['最常见号码'] = self.area.decode(counts.argmax(axis=1) + 1)
+        table['最常见次数'] = counts.max(axis=1)
+        return table
+
+    def mean_trend(self, window):
+        """各位置最近window期（含当期及之前的期）的平均号码，形状(位置数, 期数)，最早的window-1期为NaN"""
+        values = self.index.values[self.start:self.stop + 1].astype(float)
+        trend = np.full((self.index.slots, self.periods), np.nan)
+        valid = self.periods - window + 1
+        if valid > 0:
+            trend[:, :valid] = self.area.decode((values[window:window + valid] - values[:valid]) / window).T
+        return trend
+
+    def quantile_trend(self, slot, window, quantiles=QUANTILES):
+        """第slot位（0起）最近window期的分位数走势，形状(len(quantiles), 期数)，最早的window-1期为NaN"""
+        prefix = self.index.prefix[self.start:self.stop + 1, slot].astype(np.int32)
+        trend = np.full((len(quantiles), self.periods), np.nan)
+        valid = self.periods - window + 1
+        if valid > 0:
+            trend[:, :valid] = self.area.decode(_quantile_values(prefix[window:window + valid] - prefix[:valid],
+                                                                 quantiles)).T
+        return trend
+
@@ -0,0 +1,117 @@
+"""按阶段记录每次页面重跑的耗时与内存分配
+
+用法：
+    profiler = RerunProfiler(enabled=True)
+    with activate(profiler):
+        with profiler.stage('load'):
+            ...
+库代码可以用模块级的stage(name)记录到当前激活的profiler，未激活时为空操作。
+关闭时stage返回共享的空上下文，开销可以忽略。
+
+内存统计基于进程全局的tracemalloc（峰值计数只有一个），因此这是单会话的调试工具：
+统计内存时，各会话的顶层阶段通过一个进程级的锁依次执行，互不重置对方的峰值；
+同一时间其他线程（未被统计的后台任务等）的分配仍会计入当前阶段。
+"""
+
+import contextlib
+import json
+import threading
+import time
+import tracemalloc
+
+_NULL_STAGE = contextlib.nullcontext()
+_local = threading.local()
+# 统计内存的顶层阶段在进程内依次执行（tracemalloc的峰值计数是全局的）
+_memory_lock = threading.Lock()
+
+
+class RerunProfiler:
+    """一次重跑内各阶段的耗时（毫秒）、净分配与峰值内存（KB）"""
+
+    def __init__(self, enabled=False, track_memory=True):
+        self.enabled = enabled
+        self.track_memory = enabled and track_memory
+        self.records = []
+        self._depth = 0
+        self._started = time.perf_counter()
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._stage(name)
+
+    @contextlib.contextmanager
+    def _stage(self, name):
+        top_level = self._depth == 0
+        locked = self.track_memory and top_level
+        if locked:
+            _memory_lock.acquire()
+            tracemalloc.reset_peak()
+        self._depth += 1
+        if self.track_memory:
+            mem_before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self._depth -= 1
+            record = {'stage': name, 'ms': round(elapsed, 3), 'depth': self._depth}
+            if self.track_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record['alloc_kb'] = round((current - mem_before) / 1024, 1)
+                # 嵌套阶段共用外层的峰值计数，只记录顶层阶段的峰值
+                record['peak_kb'] = round((peak - mem_before) / 1024, 1) if top_level else None
+            if locked:
+                _memory_lock.release()
+            self.records.append(record)
+
+    @property
+    def total_ms(self):
+        return round((time.perf_counter() - self._started) * 1000, 3)
+
+    def summary(self):
+        """按阶段汇总（同名阶段累加），按耗时从高到低排列"""
+        totals = {}
+        for record in self.records:
+            entry = totals.setdefault(record['stage'], {'stage': record['stage'], 'calls': 0, 'ms': 0.0, 'alloc_kb': 0.0})
+            entry['calls'] += 1
+            entry['ms'] = round(entry['ms'] + record['ms'], 3)
+            entry['alloc_kb'] = round(entry['alloc_kb'] + (record.get('alloc_kb') or 0.0), 1)
+        return sorted(totals.values(), key=lambda entry: entry['ms'], reverse=True)
+
+    def write_jsonl(self, path, **extra):
+        """把本次重跑的记录追加到JSONL日志"""
+        line = dict(extra, timestamp=time.time(), total_ms=self.total_ms, stages=self.records)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(line, ensure_ascii=False) + '\n')
+
+
+NULL_PROFILER = RerunProfiler(enabled=False)
+
+
+@contextlib.contextmanager
+def activate(profiler):
+    """在当前线程激活profiler，供库代码中的stage()使用"""
+    previous = getattr(_local, 'profiler', NULL_PROFILER)
+    _local.profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _local.profiler = previous
+
+
+def current():
+    return getattr(_local, 'profiler', NULL_PROFILER)
+
+
+def stage(name):
+    """记录到当前线程激活的profiler"""
+    return current().stage(name)
+
+
+def install(profiler):
+    """把profiler设为当前线程的激活profiler（用于Streamlit每次重跑开始时）"""
+    _local.profiler = profiler
@@ -0,0 +1,141 @@
+"""按开奖时间表在后台刷新数据，页面请求不再等待网络"""
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from . import config
+from .data import fetch_history_html, parse_history_html, merge_history
+from .dataset import Dataset
+
+logger = logging.getLogger(__name__)
+
+# 北京时间（无夏令时）
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+# 开奖日：周二、周四、周日
+DRAW_WEEKDAYS = (1, 3, 6)
+
+
+def next_refresh_time(now=None, refresh_at=None):
+    """返回now之后最近一个开奖日的刷新时刻（北京时间）"""
+    now = (now or datetime.now(BEIJING_TZ)).astimezone(BEIJING_TZ)
+    hour, minute = map(int, (refresh_at or config.REFRESH_AT).split(':'))
+    for days in range(8):
+        candidate = (now + timedelta(days=days)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate.weekday() in DRAW_WEEKDAYS and candidate > now:
+            return candidate
+    raise RuntimeError("无法计算下一次刷新时间")
+
+
+class DrawRefresher(threading.Thread):
+    """后台刷新线程
+
+    在每个开奖日晚上抓取并解析最新数据，写入store（HistoryStore，可选）后合并，原子替换DatasetHolder中的数据集，
+    再调用warmers预热统计与图表缓存。未取得新一期数据时按间隔重试。
+    """
+
+    def __init__(self, holder, warmers=(), fetch=fetch_history_html, parse=parse_history_html, store=None):
+        super().__init__(name='ssq-refresher', daemon=True)
+        self.holder = holder
+        self.warmers = list(warmers)
+        self.fetch = fetch
+        self.parse = parse
+        self.store = store
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self.next_run = None
+        self.last_run = None
+        self.last_error = None
+        self.last_result = None
+
+    def trigger(self):
+        """请求立即刷新（不阻塞调用方）"""
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+    @property
+    def busy(self):
+        return self._refresh_lock.locked()
+
+    def status(self):
+        return {
+            'version': self.holder.current().version,
+            'latest_issue': self.holder.current().latest_issue,
+            'busy': self.busy,
+            'next_run': self.next_run,
+            'last_run': self.last_run,
+            'last_result': self.last_result,
+            'last_error': self.last_error,
+        }
+
+    def persist(self, new_df):
+        """抓取的数据写入数据库，重启后不丢失；写入失败只记录日志，不影响本次刷新"""
+        if self.store is None:
+            return
+        try:
+            added = self.store.upsert(new_df)
+            if added:
+                logger.info("已保存%d期新数据", added)
+        except Exception as e:
+            logger.warning("保存抓取数据失败: %s", e)
+
+    def refresh_once(self):
+        """抓取、解析、合并并替换数据集；返回是否得到新版本"""
+        with self._refresh_lock:
+            self.last_run = datetime.now(BEIJING_TZ)
+            try:
+                new_df = self.parse(self.fetch())
+                self.persist(new_df)
+                current = self.holder.current()
+                dataset = Dataset(merge_history(new_df, current.df))
+                swapped = self.holder.swap(dataset)
+            except Exception as e:
+                self.last_error = f"{e}"
+                self.last_result = 'failed'
+                logger.warning("后台刷新失败: %s", e)
+                return False
+
+            self.last_error = None
+            self.last_result = 'updated' if swapped else 'unchanged'
+            if swapped:
+                self.warm(dataset)
+            return swapped
+
+    def warm(self, dataset):
+        """依次调用预热函数，单个失败不影响其他"""
+        for warmer in self.warmers:
+            try:
+                warmer(dataset)
+            except Exception as e:
+                logger.warning("缓存预热失败(%s): %s", getattr(warmer, '__name__', warmer), e)
+
+    def run(self):
+        self.warm(self.holder.current())
+        retries = 0
+        while not self._stopped.is_set():
+            if not config.AUTO_REFRESH:
+                wait_until = None  # 仅响应手动刷新
+            elif retries:
+                wait_until = datetime.now(BEIJING_TZ) + timedelta(minutes=config.REFRESH_RETRY_MINUTES)
+            else:
+                wait_until = next_refresh_time()
+            self.next_run = wait_until
+            timeout = None
+            if wait_until is not None:
+                timeout = max(0.0, (wait_until - datetime.now(BEIJING_TZ)).total_seconds())
+            triggered = self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+
+            updated = self.refresh_once()
+            if triggered or updated or retries >= config.REFRESH_MAX_RETRIES:
+                retries = 0
+            else:
+                # 开奖数据可能尚未发布，稍后重试
+                retries += 1
@@ -0,0 +1,330 @@
+"""本地HTTP JSON服务：向其他看板提供统计结果
+
+运行：python -m ssq.service --port 8601
+压测：python -m ssq.service loadtest --url http://127.0.0.1:8601/api/hot-cold --requests 5000 --concurrency 50
+
+每个接口只接受声明过的参数：未知参数或取值错误返回400，缺省的参数补为默认值后作为缓存key。
+所有响应按数据版本缓存在内存中，ETag由数据版本和响应内容决定，
+客户端带If-None-Match重复请求时直接返回304。
+统计在线程池中计算，不阻塞IOLoop；还没有开奖数据时除version外的接口返回503。
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+
+import numpy as np
+import tornado.web
+from tornado.ioloop import IOLoop
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+from . import analytics, blue
+from .cache import VersionedCache
+from .data import RED_COLUMNS, BLUE_COLUMN
+from .storage import get_store, load_history
+from .dataset import Dataset, DatasetHolder
+from .refresher import DrawRefresher
+
+# 序列化后的响应缓存（按数据版本隔离）
+response_cache = VersionedCache('responses', max_entries=1024)
+
+
+def _jsonable(value):
+    """把NumPy/Pandas对象转换为可JSON序列化的类型"""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _jsonable(value.tolist())
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else round(float(value), 4)
+    if isinstance(value, float):
+        return None if np.isnan(value) else round(value, 4)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+# ---------- 参数 ----------
+
+def _int(default, low=None, high=None):
+    """整数参数，超出[low, high]时截断"""
+    def parse(text):
+        if text is None:
+            return default
+        value = int(text)
+        if low is not None:
+            value = max(low, value)
+        return value if high is None else min(value, high)
+    return parse
+
+
+def _recent(text):
+    """recent参数：最近的期数，0或不提供表示全部；负数与非整数一样按参数错误处理"""
+    recent = int(text) if text is not None else 0
+    if recent < 0:
+        raise ValueError(f"recent不能为负数: {recent}")
+    return recent
+
+
+def _weight(default):
+    """权重参数：非负的有限数"""
+    def parse(text):
+        if text is None:
+            return default
+        value = float(text)
+        if not math.isfinite(value) or value < 0:
+            raise ValueError(f"权重必须是非负数: {text}")
+        return value
+    return parse
+
+
+def _seed(text):
+    return text
+
+
+def parse_params(spec, arguments):
+    """按接口声明的参数（参数名 -> 解析函数）校验并补全默认值，未知参数按参数错误处理"""
+    unknown = sorted(set(arguments) - set(spec))
+    if unknown:
+        raise ValueError(f"未知参数: {', '.join(unknown)}")
+    params = {}
+    for name, parse in spec.items():
+        try:
+            params[name] = parse(arguments.get(name))
+        except ValueError as e:
+            raise ValueError(f"{name}: {e}") from None
+    return params
+
+
+def _etag_matches(header, etag):
+    """If-None-Match（逗号分隔，可带W/前缀，*匹配任意版本）是否包含etag"""
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def _window(dataset, recent):
+    """取最近recent期（0表示全部）"""
+    df = dataset.df if not recent else dataset.df.head(recent)
+    return df, df[RED_COLUMNS].to_numpy(), df[BLUE_COLUMN].to_numpy()
+
+
+# ---------- 各接口的计算 ----------
+
+def version_payload(dataset, params):
+    return {'version': dataset.version, 'latest_issue': dataset.latest_issue, 'draws': len(dataset)}
+
+
+def latest_payload(dataset, params):
+    rows = dataset.df.head(params['count'])
+    return {'draws': [
+        {'issue': int(row['期号']), 'reds': [int(row[c]) for c in RED_COLUMNS], 'blue': int(row[BLUE_COLUMN]),
+         'date': row['开奖日期'].strftime('%Y-%m-%d'), 'pool': float(row['奖池(元)'])}
+        for _, row in rows.iterrows()
+    ]}
+
+
+def hot_cold_payload(dataset, params):
+    top = params['top']
+    df, reds, blues = _window(dataset, params['recent'])
+    red_counts, blue_counts = analytics.red_counts(reds), analytics.blue_counts(blues)
+    red_order = np.argsort(-red_counts, kind='stable')
+    blue_order = np.argsort(-blue_counts, kind='stable')
+    return {
+        'draws': len(df),
+        'red': {'hot': red_order[:top] + 1, 'cold': red_order[::-1][:top] + 1,
+                'counts': red_counts, 'omissions': analytics.red_omissions(reds)},
+        'blue': {'hot': blue_order[:min(top, 16)] + 1, 'cold': blue_order[::-1][:min(top, 16)] + 1,
+                 'counts': blue_counts, 'omissions': analytics.blue_omissions(blues)},
+    }
+
+
+def summary_payload(dataset, params):
+    df, reds, blues = _window(dataset, params['recent'])
+    sums, spans = analytics.red_sums(reds), analytics.red_spans(reds)
+    blue_stats = blue.BlueStats(blues)
+    return {
+        'draws': len(df),
+        'zones': dict(zip(analytics.RED_ZONE_NAMES, analytics.zone_totals(reds))),
+        'odd_even': analytics.odd_even_distribution(reds).to_dict(),
+        'small_big': analytics.small_big_distribution(reds).to_dict(),
+        'consecutive': analytics.value_distribution(analytics.consecutive_pairs(reds)).to_dict(),
+        'sum': analytics.sum_statistics(sums),
+        'span': analytics.sum_statistics(spans),
+        'blue_parity': dict(zip(('even', 'odd'), blue_stats.parity())),
+        'blue_size': dict(zip(('small', 'big'), blue_stats.size())),
+        'blue_mod4': blue_stats.residues(4).tolist(),
+        'blue_mod5': blue_stats.residues(5).tolist(),
+        'blue_repeat_rate': blue_stats.repeat_rate(),
+    }
+
+
+def recommendations_payload(dataset, params):
+    _, reds, blues = _window(dataset, params['recent'])
+    seed = params['seed']
+    recommendations = analytics.recommend(
+        reds, blues,
+        hot_weight=params['hot_weight'],
+        cold_weight=params['cold_weight'],
+        count=params['count'],
+        rng=random.Random(seed) if seed is not None else None,
+    )
+    return {'seed': seed, 'recommendations': recommendations}
+
+
+# 接口名 -> (计算函数, 参数名 -> 解析函数)；未指定seed的推荐结果每次随机，不缓存
+ENDPOINTS = {
+    'version': (version_payload, {}),
+    'latest': (latest_payload, {'count': _int(1, 1, 50)}),
+    'hot-cold': (hot_cold_payload, {'recent': _recent, 'top': _int(10, 1, 33)}),
+    'summary': (summary_payload, {'recent': _recent}),
+    'recommendations': (recommendations_payload, {
+        'recent': _recent, 'seed': _seed, 'hot_weight': _weight(0.7), 'cold_weight': _weight(0.3),
+        'count': _int(5, 1, 20)}),
+}
+
+# 没有开奖数据时仍可访问的接口
+EMPTY_OK = {'version'}
+
+
+def _cacheable(name, params):
+    return name != 'recommendations' or params['seed'] is not None
+
+
+def _render(compute, dataset, params):
+    """计算并序列化响应（在线程池中执行）"""
+    return json.dumps(_jsonable(compute(dataset, params)), ensure_ascii=False).encode('utf-8')
+
+
+class ApiHandler(tornado.web.RequestHandler):
+    """统一处理 /api/<name>"""
+
+    def initialize(self, holder):
+        self.holder = holder
+
+    async def get(self, name):
+        if name not in ENDPOINTS:
+            raise tornado.web.HTTPError(404)
+        compute, spec = ENDPOINTS[name]
+        try:
+            params = parse_params(spec, {k: self.get_argument(k) for k in self.request.arguments})
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, reason=f"参数错误: {e}")
+        dataset = self.holder.current()
+        if not len(dataset) and name not in EMPTY_OK:
+            raise tornado.web.HTTPError(503, reason="还没有开奖数据")
+
+        key = (name, tuple(sorted(params.items())))
+        cached = response_cache.get(dataset.cache_version, key) if _cacheable(name, params) else None
+        if cached is None:
+            body = await IOLoop.current().run_in_executor(None, _render, compute, dataset, params)
+            etag = '"%s-%s"' % (dataset.version, hashlib.sha1(body).hexdigest()[:8])
+            cached = (body, etag)
+            if _cacheable(name, params):
+                response_cache.put(dataset.cache_version, key, cached)
+
+        body, etag = cached
+        self.set_header('ETag', etag)
+        self.set_header('X-Dataset-Version', dataset.version)
+        self.set_header('Cache-Control', 'no-cache')
+        if _etag_matches(self.request.headers.get('If-None-Match', ''), etag):
+            self.set_status(304)
+            return
+        self.set_header('Content-Type', 'application/json; charset=utf-8')
+        self.write(body)
+
+    def compute_etag(self):
+        # ETag已由数据版本决定，不需要tornado再对响应体做哈希
+        return None
+
+
+def make_app(holder):
+    return tornado.web.Application([
+        (r'/api/([\w-]+)', ApiHandler, {'holder': holder}),
+    ])
+
+
+async def serve(port, host='127.0.0.1', auto_refresh=True):
+    store = get_store()
+    holder = DatasetHolder(Dataset(load_history(store)))
+    holder.subscribe(lambda dataset: response_cache.retain_version(dataset.cache_version))
+    if auto_refresh:
+        DrawRefresher(holder, store=store).start()
+    make_app(holder).listen(port, address=host)
+    print(f"✅ 服务已启动: http://{host}:{port}/api/summary （数据版本 {holder.current().version}）")
+    await asyncio.Event().wait()
+
+
+# ---------- 本地压测 ----------
+
+async def loadtest(url, requests=2000, concurrency=50, revalidate=False):
+    """并发请求url，统计吞吐量与延迟分位数；revalidate时携带If-None-Match"""
+    AsyncHTTPClient.configure(None, max_clients=concurrency)
+    client = AsyncHTTPClient()
+    first = await client.fetch(url)
+    headers = {'If-None-Match': first.headers['ETag']} if revalidate else {}
+
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                await client.fetch(url, headers=headers)
+            except HTTPClientError as e:
+                if e.code != 304:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ms = np.array(latencies) * 1000
+    return {
+        'requests': requests, 'concurrency': concurrency, 'errors': errors,
+        'throughput_rps': round(requests / elapsed, 1),
+        'p50_ms': round(float(np.percentile(ms, 50)), 2),
+        'p95_ms': round(float(np.percentile(ms, 95)), 2),
+        'p99_ms': round(float(np.percentile(ms, 99)), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="双色球统计JSON服务")
+    sub = parser.add_subparsers(dest='command')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8601)
+    parser.add_argument('--no-refresh', action='store_true', help="不启动后台定时刷新")
+    bench = sub.add_parser('loadtest', help="对运行中的服务做压测")
+    bench.add_argument('--url', default='http://127.0.0.1:8601/api/hot-cold?recent=100')
+    bench.add_argument('--requests', type=int, default=2000)
+    bench.add_argument('--concurrency', type=int, default=50)
+    bench.add_argument('--revalidate', action='store_true', help="携带If-None-Match，测试304路径")
+    args = parser.parse_args(argv)
+
+    if args.command == 'loadtest':
+        result = asyncio.run(loadtest(args.url, args.requests, args.concurrency, args.revalidate))
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        asyncio.run(serve(args.port, args.host, auto_refresh=not args.no_refresh))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""频率与分布的显著性检验：卡方均匀性检验 + 蒙特卡洛模拟（与完全随机开奖比较）
+
+“热号”“冷号”是否只是随机波动？对所选范围内的号码频率、区间分布、奇偶比、大小比，
+计算卡方统计量的渐近p值，并在“每期完全随机开奖”的假设下模拟同样期数的数据resamples次，
+得到模拟p值。模拟按固定种子分块，在进程池中并行执行，同样的种子和次数结果完全一致（与进程数无关）。
+
+逐号码的检验有33/16个，用Benjamini-Hochberg方法控制错误发现率；
+分布检验只有几个，用Holm方法控制总体错误率。
+"""
+
+import math
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from . import analytics, combination_filter, jobs
+from .analytics import RED_NUMBERS, BLUE_NUMBERS, RED_PICKS, RED_ZONES, RED_SMALL_MAX, BLUE_SMALL_MAX
+
+# 每个模拟任务的模拟次数（分块方式固定，结果与进程数无关）
+CHUNK_RESAMPLES = 500
+# 单个任务一次生成的最大开奖期数（控制内存）
+BATCH_DRAWS = 500_000
+SIGNIFICANCE_LEVEL = 0.05
+
+RED_ODD_NUMBERS = (RED_NUMBERS + 1) // 2
+# 每期红球之间互不重复，号码次数的卡方统计量近似服从 (N-k)/(N-1) * χ²(N-1)
+RED_CHI2_SCALE = (RED_NUMBERS - RED_PICKS) / (RED_NUMBERS - 1)
+
+
+# ---------- 卡方分布 ----------
+
+def _gamma_q(a, x):
+    """正则化上不完全伽马函数 Q(a, x)（级数 / 连分式，精度约1e-12）"""
+    if x <= 0:
+        return 1.0
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        term = total = 1.0 / a
+        n = a
+        for _ in range(1000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+    # Lentz连分式
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(log_prefix) * h
+
+
+def chi2_sf(stat, df):
+    """卡方分布的右尾概率"""
+    return _gamma_q(df / 2, stat / 2)
+
+
+def chi2_statistic(observed, expected):
+    """Pearson卡方统计量；observed可以是(模拟次数, 类别数)，期望为0的类别忽略"""
+    observed = np.asarray(observed, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    keep = expected > 0
+    return (((observed[..., keep] - expected[keep]) ** 2) / expected[keep]).sum(axis=-1)
+
+
+# ---------- 多重比较校正 ----------
+
+def holm(p_values):
+    """Holm逐步校正后的p值"""
+    p = np.asarray(p_values, dtype=float)
+    order = np.argsort(p)
+    adjusted = np.maximum.accumulate((len(p) - np.arange(len(p))) * p[order])
+    result = np.empty_like(p)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result
+
+
+def benjamini_hochberg(p_values):
+    """Benjamini-Hochberg校正后的q值"""
+    p = np.asarray(p_values, dtype=float)
+    order = np.argsort(p)[::-1]
+    ranks = len(p) - np.arange(len(p))
+    adjusted = np.minimum.accumulate(p[order] * len(p) / ranks)
+    result = np.empty_like(p)
+    result[order] = np.minimum(adjusted, 1.0)
+    return result
+
+
+# ---------- 随机开奖下的理论分布 ----------
+
+def hypergeometric_pmf(marked, total=RED_NUMBERS, picks=RED_PICKS):
+    """从total个号码中选picks个，其中恰有k个属于marked个特殊号码的概率，k=0..picks"""
+    return np.array([math.comb(marked, k) * math.comb(total - marked, picks - k) for k in range(picks + 1)]) \
+        / math.comb(total, picks)
+
+
+ODD_PMF = hypergeometric_pmf(RED_ODD_NUMBERS)
+SMALL_PMF = hypergeometric_pmf(RED_SMALL_MAX)
+BLUE_PMF = np.full(BLUE_NUMBERS, 1 / BLUE_NUMBERS)
+
+
+def _zone_totals(red_counts):
+    """号码次数 (…, 33) -> 三个区间的次数 (…, 3)"""
+    return np.stack([red_counts[..., lo - 1:hi].sum(axis=-1) for lo, hi in RED_ZONES], axis=-1)
+
+
+def _blue_split(blue_counts, mask):
+    return np.stack([blue_counts[..., mask].sum(axis=-1), blue_counts[..., ~mask].sum(axis=-1)], axis=-1)
+
+
+_BLUE_EVEN = np.arange(1, BLUE_NUMBERS + 1) % 2 == 0
+_BLUE_SMALL = np.arange(1, BLUE_NUMBERS + 1) <= BLUE_SMALL_MAX
+
+
+# ---------- 模拟 ----------
+
+def simulate_chunk(periods, resamples, seed, index):
+    """在完全随机开奖的假设下模拟resamples份periods期数据
+
+    返回各份数据的红球号码次数(resamples, 33)、蓝球号码次数(resamples, 16)、
+    奇数个数分布(resamples, 7)、小号个数分布(resamples, 7)。
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    table = combination_filter.get_table()
+    red_counts = np.empty((resamples, RED_NUMBERS), dtype=np.int32)
+    batch = max(1, min(resamples, BATCH_DRAWS // max(periods, 1)))
+    for start in range(0, resamples, batch):
+        size = min(batch, resamples - start)
+        # 每期随机取一注组合的序号，全部组合等概率即每期红球为均匀随机的6个不同号码
+        numbers = table.numbers[:, rng.integers(0, len(table), size=(size, periods))]
+        offsets = (np.arange(size, dtype=np.int32) * (RED_NUMBERS + 1))[:, None]
+        counts = np.bincount((numbers + offsets).ravel(), minlength=size * (RED_NUMBERS + 1))
+        red_counts[start:start + size] = counts.reshape(size, RED_NUMBERS + 1)[:, 1:]
+    return {
+        'red': red_counts,
+        'blue': rng.multinomial(periods, BLUE_PMF, size=resamples).astype(np.int32),
+        'odd': rng.multinomial(periods, ODD_PMF, size=resamples).astype(np.int32),
+        'small': rng.multinomial(periods, SMALL_PMF, size=resamples).astype(np.int32),
+    }
+
+
+def simulation_tasks(periods, resamples, seed=0):
+    """按固定方式分块的模拟任务[(函数, 参数)]，可交给jobs在后台执行"""
+    return [(simulate_chunk, (periods, min(CHUNK_RESAMPLES, resamples - start), seed, i))
+            for i, start in enumerate(range(0, resamples, CHUNK_RESAMPLES))]
+
+
+def merge_chunks(results):
+    """合并各分块的模拟结果（任意几个分块合并后仍是有效的模拟样本）"""
+    return {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+
+def simulate(periods, resamples, seed=0, workers=None):
+    """分块模拟并合并结果；workers<=1时在当前进程内执行，否则使用jobs的共享进程池
+
+    未指定workers时按jobs.use_pool决定，计算量（期数×模拟次数）较小时在当前进程内执行。
+    """
+    tasks = simulation_tasks(periods, resamples, seed)
+    parallel = jobs.use_pool(len(tasks), periods * resamples) if workers is None else workers > 1 and len(tasks) > 1
+    results = None
+    if parallel:
+        try:
+            futures = [jobs.get_pool().submit(fn, *args) for fn, args in tasks]
+            results = [future.result() for future in futures]
+        except (BrokenProcessPool, OSError):
+            jobs.reset_pool()
+    if results is None:
+        results = [fn(*args) for fn, args in tasks]
+    return merge_chunks(results)
+
+
+# ---------- 检验 ----------
+
+def _monte_carlo_p(simulated, observed):
+    """模拟中不小于观测值的比例（加1修正，避免p值为0）"""
+    return (1 + np.count_nonzero(simulated >= observed - 1e-9, axis=0)) / (len(simulated) + 1)
+
+
+def _number_table(observed, simulated, expected):
+    deviation = np.abs(observed - expected)
+    p_values = _monte_carlo_p(np.abs(simulated - expected), deviation)
+    q_values = benjamini_hochberg(p_values)
+    return pd.DataFrame({
+        '号码': np.arange(1, len(observed) + 1),
+        '出现次数': observed,
+        '期望次数': np.round(expected, 2),
+        '偏离(%)': np.round((observed - expected) / expected * 100, 2) if expected else 0.0,
+        '模拟p值': np.round(p_values, 4),
+        'BH校正q值': np.round(q_values, 4),
+        '显著': q_values < SIGNIFICANCE_LEVEL,
+    })
+
+
+class SignificanceReport:
+    """distributions为各分布的卡方检验结果，red_numbers/blue_numbers为逐号码的检验结果"""
+
+    def __init__(self, periods, resamples, seed, distributions, red_numbers, blue_numbers, elapsed_ms):
+        self.periods = periods
+        self.resamples = resamples
+        self.seed = seed
+        self.distributions = distributions
+        self.red_numbers = red_numbers
+        self.blue_numbers = blue_numbers
+        self.elapsed_ms = elapsed_ms
+
+
+def significance_report(reds, blues, resamples=10000, seed=0, workers=None):
+    """对所选范围的数据做完整的显著性检验"""
+    start = time.perf_counter()
+    sim = simulate(len(reds), resamples, seed, workers)
+    return build_report(reds, blues, sim, seed, (time.perf_counter() - start) * 1000)
+
+
+def build_report(reds, blues, sim, seed, elapsed_ms):
+    """由模拟结果计算检验表；模拟次数取sim的份数（后台任务的中间结果只包含已完成的分块）"""
+    start = time.perf_counter()
+    reds = np.asarray(reds).reshape(-1, RED_PICKS)
+    blues = np.asarray(blues)
+    periods = len(reds)
+    resamples = len(sim['red'])
+
+    red_counts = analytics.red_counts(reds)
+    blue_counts = analytics.blue_counts(blues)
+    red_expected = np.full(RED_NUMBERS, periods * RED_PICKS / RED_NUMBERS)
+    zone_expected = _zone_totals(red_expected)
+    blue_expected = periods * BLUE_PMF
+
+    # (名称, 观测, 期望, 模拟观测, 自由度, 渐近分布的缩放)
+    tests = [
+        ('红球号码频率', red_counts, red_expected, sim['red'], RED_NUMBERS - 1, RED_CHI2_SCALE),
+        ('红球区间分布', _zone_totals(red_counts), zone_expected, _zone_totals(sim['red']), len(RED_ZONES) - 1,
+         RED_CHI2_SCALE),
+        ('红球奇偶比分布', np.bincount(analytics.odd_counts(reds), minlength=RED_PICKS + 1), periods * ODD_PMF,
+         sim['odd'], RED_PICKS, 1.0),
+        ('红球大小比分布', np.bincount(analytics.small_counts(reds), minlength=RED_PICKS + 1), periods * SMALL_PMF,
+         sim['small'], RED_PICKS, 1.0),
+        ('蓝球号码频率', blue_counts, blue_expected, sim['blue'], BLUE_NUMBERS - 1, 1.0),
+        ('蓝球奇偶分布', _blue_split(blue_counts, _BLUE_EVEN), _blue_split(blue_expected, _BLUE_EVEN),
+         _blue_split(sim['blue'], _BLUE_EVEN), 1, 1.0),
+        ('蓝球大小分布', _blue_split(blue_counts, _BLUE_SMALL), _blue_split(blue_expected, _BLUE_SMALL),
+         _blue_split(sim['blue'], _BLUE_SMALL), 1, 1.0),
+    ]
+    rows = []
+    for name, observed, expected, simulated, df, scale in tests:
+        stat = float(chi2_statistic(observed, expected))
+        rows.append({
+            '检验': name,
+            '卡方统计量': round(stat, 3),
+            '自由度': df,
+            '渐近p值': round(chi2_sf(stat / scale, df), 4),
+            '模拟p值': _monte_carlo_p(chi2_statistic(simulated, expected), stat),
+        })
+    distributions = pd.DataFrame(rows)
+    distributions['Holm校正p值'] = holm(distributions['模拟p值']).round(4)
+    distributions['模拟p值'] = distributions['模拟p值'].round(4)
+    distributions['显著'] = distributions['Holm校正p值'] < SIGNIFICANCE_LEVEL
+
+    return SignificanceReport(
+        periods, resamples, seed, distributions,
+        _number_table(red_counts, sim['red'], red_expected[0]),
+        _number_table(blue_counts, sim['blue'], blue_expected[0]),
+        elapsed_ms + (time.perf_counter() - start) * 1000,
+    )
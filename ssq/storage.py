@@ -0,0 +1,245 @@
+"""历史开奖数据的本地存储：SQLite文件（WAL模式）
+
+期号为主键，开奖日期建索引；抓取到的数据批量upsert（期号相同以新数据为准），重启后不会丢失。
+每种玩法一张表，号码列由玩法的号码区生成（多个号码的区为red1..red6，一个号码的区为blue）；
+双色球的表名为draws，其他玩法为draws_<玩法>，同一个数据库文件可以存放多种玩法。
+WAL模式下写入不阻塞读取，多个应用进程可以同时读，每次查询都读到一致的快照。
+首次使用时若数据库为空，会从CSV（config.DATA_PATH）一次性导入。
+load_history读出的数据同样经过校验（来源为'db'），手工改动或旧版本写入的不合格行不会进入统计。
+
+导入：python -m ssq.storage import data/initial_data.csv
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .data import load_history_csv, validate_history
+from .games import SSQ
+
+logger = logging.getLogger(__name__)
+
+# 其他连接正在写入时等待的秒数
+BUSY_TIMEOUT = 30
+
+# 校验和的模数（小于2^32的素数）
+_MODULUS = 4294967291
+
+
+def table_name(game):
+    return 'draws' if game is SSQ else f'draws_{game.key}'
+
+
+def ball_fields(area):
+    """号码区在表中的列名"""
+    return [area.name] if area.picks == 1 else [f'{area.name}{i}' for i in range(1, area.picks + 1)]
+
+
+class _Sql:
+    """一种玩法的表结构与语句"""
+
+    def __init__(self, game):
+        table = table_name(game)
+        self.balls = [field for area in game.areas for field in ball_fields(area)]
+        self.fields = ('issue', *self.balls, 'draw_date', 'pool')
+        columns = ',\n    '.join(f'{field} INTEGER NOT NULL' for field in self.balls)
+        self.schema = f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    issue INTEGER PRIMARY KEY,
+    {columns},
+    draw_date TEXT NOT NULL,
+    pool REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_{table}_date ON {table} (draw_date);
+"""
+        self.upsert = f"""
+INSERT INTO {table} ({', '.join(self.fields)}, updated_at) VALUES ({', '.join('?' * (len(self.fields) + 1))})
+ON CONFLICT (issue) DO UPDATE SET
+    {', '.join(f'{field} = excluded.{field}' for field in self.fields[1:])}, updated_at = excluded.updated_at
+"""
+        # 每期按期号、号码、开奖日期和奖池算一个小于2^32的整数（逐步取模，不会溢出），再求和（10万期也远小于2^63）
+        row = 'issue'
+        for field in self.balls:
+            row = f'(({row}) * 37 + {field}) % {_MODULUS}'
+        row = f"(({row}) * 100003 + CAST(REPLACE(draw_date, '-', '') AS INTEGER)) % {_MODULUS}"
+        row = f'(({row}) * 1000003 + CAST(ROUND(pool) AS INTEGER) % {_MODULUS}) % {_MODULUS}'
+        self.checksum = f"SELECT COUNT(*), MAX(issue), COALESCE(SUM({row}), 0) FROM {table}"
+        self.count = f'SELECT COUNT(*) FROM {table}'
+        self.latest = f'SELECT MAX(issue) FROM {table}'
+        self.select = f"SELECT {', '.join(self.fields)} FROM {table}"
+
+
+class HistoryStore:
+    """一种玩法的SQLite开奖数据库；每次操作使用独立的连接，可在任意线程中调用"""
+
+    def __init__(self, path=None, game=SSQ):
+        self.path = path or config.DB_PATH
+        self.game = game
+        self._sql = _Sql(game)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self._sql.schema)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        try:
+            conn.execute('PRAGMA synchronous=NORMAL')
+            yield conn
+        finally:
+            conn.close()
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute(self._sql.count).fetchone()[0]
+
+    def latest_issue(self):
+        with self._connect() as conn:
+            return conn.execute(self._sql.latest).fetchone()[0]
+
+    def upsert(self, df, batch_size=5000):
+        """批量写入已校验的数据（game.history_columns格式），期号已存在时覆盖；整批在一个事务中提交
+
+        返回新增的期数。
+        """
+        if df.empty:
+            return 0
+        dates = pd.to_datetime(df['开奖日期']).dt.strftime('%Y-%m-%d')
+        now = time.time()
+        rows = list(zip(
+            df['期号'].astype(int).tolist(),
+            *(df[col].astype(int).tolist() for col in self.game.columns),
+            dates.tolist(),
+            df['奖池(元)'].astype(float).tolist(),
+            [now] * len(df),
+        ))
+        with self._connect() as conn:
+            with conn:
+                before = conn.execute(self._sql.count).fetchone()[0]
+                for start in range(0, len(rows), batch_size):
+                    conn.executemany(self._sql.upsert, rows[start:start + batch_size])
+                after = conn.execute(self._sql.count).fetchone()[0]
+        return after - before
+
+    def import_csv(self, path=None):
+        """从CSV一次性导入（经过校验，不合格的行被隔离），返回新增的期数（CSV为双色球格式）"""
+        return self.upsert(load_history_csv(path))
+
+    def arrays(self, start_issue=None, end_issue=None, start_date=None, end_date=None, limit=None):
+        """按期号、开奖日期范围（闭区间）查询，按开奖日期从新到旧返回NumPy数组
+
+        返回 {'issues', 各号码区名: 号码数组, 'dates'(datetime64[ns]), 'pools'}，号码数组与Dataset.balls形状相同
+        （双色球为'red'(n, 6)和'blue'(n,)）；limit限制最多返回的期数（最新的）。
+        """
+        conditions, params = [], []
+        for clause, value in (('issue >= ?', start_issue), ('issue <= ?', end_issue),
+                              ('draw_date >= ?', start_date), ('draw_date <= ?', end_date)):
+            if value is not None:
+                conditions.append(clause)
+                params.append(str(value) if clause.startswith('draw_date') else int(value))
+        sql = self._sql.select
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY draw_date DESC, issue DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        fields = self._sql.fields
+        columns = list(zip(*rows)) or [()] * len(fields)
+        picks = len(self._sql.balls)
+        numbers = np.array(columns[:picks + 1], dtype=np.int64).reshape(picks + 1, -1)
+        arrays = {'issues': numbers[0]}
+        start = 1
+        for area in self.game.areas:
+            balls = numbers[start:start + area.picks].T.astype(np.int8)
+            arrays[area.name] = balls if area.picks > 1 else balls[:, 0]
+            start += area.picks
+        arrays['dates'] = np.array(columns[picks + 1], dtype='datetime64[D]').astype('datetime64[ns]')
+        arrays['pools'] = np.array(columns[picks + 2], dtype=float)
+        return arrays
+
+    def frame(self, **query):
+        """与normalize_history相同格式的DataFrame（按开奖日期从新到旧），参数同arrays"""
+        return frame_from_arrays(self.arrays(**query), self.game)
+
+    def checksum(self):
+        """全部数据的指纹（期数、最新期号、各期全部字段的校验和），不读出数据即可判断内容是否变化"""
+        with self._connect() as conn:
+            count, latest, total = conn.execute(self._sql.checksum).fetchone()
+        return f'{count}:{latest}:{total}'
+
+
+def frame_from_arrays(arrays, game=SSQ):
+    """把arrays()格式的数组组装为game.history_columns格式的DataFrame"""
+    df = pd.DataFrame({'期号': np.asarray(arrays['issues'], dtype=np.int64)})
+    for area in game.areas:
+        balls = np.asarray(arrays[area.name], dtype=np.int64).reshape(len(df), area.picks)
+        for col, values in zip(area.columns, balls.T):
+            df[col] = values
+    df['开奖日期'] = np.asarray(arrays['dates'])
+    df['奖池(元)'] = np.asarray(arrays['pools'])
+    return df[game.history_columns]
+
+
+_store = None
+_seeded = False
+_store_lock = threading.Lock()
+
+
+def get_store(seed=True):
+    """进程内共享的双色球数据库（首次调用时创建）
+
+    seed为True时，数据库为空则先从CSV导入。启动包在数据库为空时用自己的数据初始化数据库，
+    载入启动包时用seed=False取得同一个数据库，不必先解析一遍CSV；没有可用的启动包时，之后的get_store()照常导入。
+    """
+    global _store, _seeded
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+        if seed and not _seeded:
+            if len(_store) == 0 and os.path.exists(config.DATA_PATH):
+                added = _store.import_csv(config.DATA_PATH)
+                logger.info("已从%s导入%d期数据到%s", config.DATA_PATH, added, _store.path)
+            _seeded = True
+        return _store
+
+
+def load_history(store=None):
+    """读取本地全部历史数据（经过校验，不合格的行被隔离）"""
+    store = store if store is not None else get_store()
+    return validate_history(store.frame(), source='db', game=store.game).valid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="双色球开奖数据库")
+    parser.add_argument('--db', default=None, help=f"数据库路径（默认 {config.DB_PATH}）")
+    sub = parser.add_subparsers(dest='command', required=True)
+    importer = sub.add_parser('import', help="从CSV导入（期号相同以CSV为准）")
+    importer.add_argument('csv', nargs='?', default=None)
+    sub.add_parser('info', help="显示期数和最新期号")
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.db)
+    if args.command == 'import':
+        added = store.import_csv(args.csv)
+        print(f"✅ 新增{added}期，共{len(store)}期（{store.path}）")
+    else:
+        print(f"{store.path}: 共{len(store)}期，最新第{store.latest_issue()}期")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""相邻两期之间的转移统计（马尔可夫转移表）以及重号、邻号
+
+数据按开奖日期从新到旧排列，第i期的“下一期”是第i-1期。
+所有相邻两期的特征编码和号码位图一次性算好，按窗口（最近N期）切片即可得到对应的统计。
+"""
+
+import numpy as np
+import pandas as pd
+
+from . import analytics
+from .analytics import RED_NUMBERS, RED_PICKS, BLUE_SMALL_MAX
+
+# 和值分段的边界：<70、70-89、90-109、110-129、>=130
+SUM_EDGES = (70, 90, 110, 130)
+SUM_LABELS = ('21-69', '70-89', '90-109', '110-129', '130-183')
+
+# 三个区间个数的所有组合（和为6），如 2:2:2
+ZONE_PATTERNS = [(a, b, RED_PICKS - a - b) for a in range(RED_PICKS + 1) for b in range(RED_PICKS + 1 - a)]
+_ZONE_INDEX = np.full((RED_PICKS + 1) ** 2, -1)
+for _i, (_a, _b, _) in enumerate(ZONE_PATTERNS):
+    _ZONE_INDEX[_a * (RED_PICKS + 1) + _b] = _i
+
+FEATURES = {
+    'odd_even': '红球奇偶比',
+    'sum': '红球和值区间',
+    'zones': '红球区间比',
+    'blue_size': '蓝球大小',
+}
+
+FEATURE_LABELS = {
+    'odd_even': [f'{k}:{RED_PICKS - k}' for k in range(RED_PICKS + 1)],
+    'sum': list(SUM_LABELS),
+    'zones': [':'.join(map(str, pattern)) for pattern in ZONE_PATTERNS],
+    'blue_size': ['小号(1-8)', '大号(9-16)'],
+}
+
+# 不考虑任何规律时，某个号码出现在下一期的概率
+BASE_RATE = RED_PICKS / RED_NUMBERS
+
+
+def feature_codes(reds, blues):
+    """每期各特征的状态编码（FEATURE_LABELS中的下标）"""
+    reds = np.asarray(reds).reshape(-1, RED_PICKS)
+    zones = analytics.zone_counts(reds)
+    return {
+        'odd_even': analytics.odd_counts(reds),
+        'sum': np.digitize(analytics.red_sums(reds), SUM_EDGES),
+        'zones': _ZONE_INDEX[zones[:, 0] * (RED_PICKS + 1) + zones[:, 1]],
+        'blue_size': (np.asarray(blues) > BLUE_SMALL_MAX).astype(np.int64),
+    }
+
+
+class DrawTransitions:
+    """所有相邻两期的转移数据
+
+    codes为每期的特征编码；previous/neighbor为上一期的号码位图及其±1邻号位图（不含上期号码本身），
+    repeat_hits/neighbor_hits为下一期命中的位置，均为(期数-1, 33)布尔矩阵，第j行对应第j+1期→第j期。
+    """
+
+    def __init__(self, reds, blues):
+        reds = np.asarray(reds).reshape(-1, RED_PICKS)
+        self.periods = len(reds)
+        self.codes = feature_codes(reds, blues)
+
+        presence = analytics.presence_matrix(reds, RED_NUMBERS)
+        previous, following = presence[1:], presence[:-1]
+        neighbor = np.zeros_like(previous)
+        neighbor[:, 1:] |= previous[:, :-1]
+        neighbor[:, :-1] |= previous[:, 1:]
+        neighbor &= ~previous
+        self.previous = previous
+        self.neighbor = neighbor
+        self.repeat_hits = previous & following
+        self.neighbor_hits = neighbor & following
+
+    def pairs(self, window=None):
+        """最近window期内相邻两期的对数"""
+        periods = self.periods if window is None else min(window, self.periods)
+        return max(periods - 1, 0)
+
+    def table(self, feature, window=None):
+        """转移次数表：行为本期状态，列为下一期状态"""
+        pairs = self.pairs(window)
+        codes = self.codes[feature]
+        labels = FEATURE_LABELS[feature]
+        size = len(labels)
+        counts = np.bincount(codes[1:pairs + 1] * size + codes[:pairs], minlength=size * size).reshape(size, size)
+        return pd.DataFrame(counts, index=pd.Index(labels, name='本期'), columns=pd.Index(labels, name='下一期'))
+
+    def current_state(self, feature):
+        """最新一期的状态标签"""
+        if not self.periods:
+            return None
+        return FEATURE_LABELS[feature][self.codes[feature][0]]
+
+    def next_distribution(self, feature, window=None):
+        """最新一期的状态在历史上出现后，下一期各状态的次数"""
+        state = self.current_state(feature)
+        if state is None:
+            return pd.Series(dtype=np.int64)
+        return self.table(feature, window).loc[state]
+
+    def number_rates(self, window=None):
+        """每个红球的重号率（上期出现、下期再出现）与邻号率（上期号码±1、下期出现），单位为%"""
+        pairs = self.pairs(window)
+        previous = self.previous[:pairs].sum(axis=0)
+        repeats = self.repeat_hits[:pairs].sum(axis=0)
+        neighbors = self.neighbor[:pairs].sum(axis=0)
+        neighbor_hits = self.neighbor_hits[:pairs].sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                '号码': np.arange(1, RED_NUMBERS + 1),
+                '上期出现': previous,
+                '重号次数': repeats,
+                '重号率': (repeats / previous * 100).round(2),
+                '邻号机会': neighbors,
+                '邻号次数': neighbor_hits,
+                '邻号率': (neighbor_hits / neighbors * 100).round(2),
+            })
+
+    def repeat_counts(self, window=None):
+        """每期重号个数的分布"""
+        return analytics.value_distribution(self.repeat_hits[:self.pairs(window)].sum(axis=1))
+
+    def neighbor_counts(self, window=None):
+        """每期邻号个数的分布"""
+        return analytics.value_distribution(self.neighbor_hits[:self.pairs(window)].sum(axis=1))
+
+
+def probabilities(table):
+    """转移次数表按行归一化为条件概率（%），没有样本的行与列去掉"""
+    table = table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+    return (table.div(table.sum(axis=1), axis=0) * 100).round(2)
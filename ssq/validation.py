@@ -0,0 +1,192 @@
+"""开奖数据质量校验：整表向量化检查，不合格的行隔离出来并给出原因
+
+检查只做一遍NumPy运算（每项检查一个布尔掩码），十万期数据也只需几十毫秒，
+因此每次读取本地数据和抓取网页后都会执行。
+号码的检查按玩法（games.Game）的各号码区生成，检查项名称为"号码区名_问题"，如red_out_of_range。
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from .games import GAMES, SSQ
+
+
+def _area_checks(area):
+    """号码区的检查项及说明；重复、乱序只对每期多个且互不相同的号码区检查"""
+    checks = [('invalid', f'{area.label}不是整数'), ('out_of_range', f'{area.label}超出{area.low}-{area.high}')]
+    if area.distinct and area.picks > 1:
+        checks += [('duplicate', f'{area.label}重复'), ('unsorted', f'{area.label}未按升序排列')]
+    return [(f'{area.name}_{name}', label) for name, label in checks]
+
+
+def check_labels(game):
+    """玩法的行级检查项（按执行顺序）及说明：出现即隔离该行"""
+    checks = [('issue_invalid', '期号无效'), ('issue_duplicate', '期号重复')]
+    for area in game.areas:
+        checks += _area_checks(area)
+    checks += [('date_invalid', '开奖日期无效'), ('pool_invalid', '奖池解析失败'), ('pool_implausible', '奖池金额异常')]
+    return dict(checks)
+
+
+# 双色球的行级检查项
+ROW_CHECKS = list(check_labels(SSQ))
+
+# 所有玩法的检查项说明
+CHECK_LABELS = {name: label for game in GAMES.values() for name, label in check_labels(game).items()}
+
+# 奖池低于该金额（元）视为解析错位（例如把号码当成了奖池）
+POOL_MIN = 1_000_000
+# 相邻两期开奖日期间隔超过该天数时给出提示（春节休市等情况属正常）
+MAX_DATE_GAP_DAYS = 7
+# 每类提示最多列出的示例数
+MAX_EXAMPLES = 5
+
+
+def _is_integral(values):
+    """values为浮点数组，NaN或带小数的位置为False"""
+    with np.errstate(invalid='ignore'):
+        return ~np.isnan(values) & (values == np.floor(values))
+
+
+def _check_area(flags, check, area, balls):
+    """一个号码区的检查，balls为形状(picks, n)的浮点数组"""
+    ok = np.logical_and.reduce(_is_integral(balls), axis=0)
+    flags[check[f'{area.name}_invalid']] = ~ok
+    with np.errstate(invalid='ignore'):
+        flags[check[f'{area.name}_out_of_range']] = ok & np.logical_or.reduce(
+            (balls < area.low) | (balls > area.high), axis=0)
+    if f'{area.name}_duplicate' not in check:
+        return
+    with np.errstate(invalid='ignore'):
+        # 正常数据严格升序；只对不满足的少数行排序，区分“重复”和“乱序”
+        suspect = np.flatnonzero(ok & np.logical_or.reduce(balls[1:] <= balls[:-1], axis=0))
+    if len(suspect):
+        duplicate = (np.diff(np.sort(balls[:, suspect], axis=0), axis=0) == 0).any(axis=0)
+        flags[check[f'{area.name}_duplicate'], suspect[duplicate]] = True
+        flags[check[f'{area.name}_unsorted'], suspect[~duplicate]] = True
+
+
+def check_rows(issues, balls, dates, pools, game=SSQ):
+    """对整表执行行级检查
+
+    issues/pools为浮点数组（无法解析的为NaN），balls为{号码区名: 形状(picks, n)的浮点数组}
+    （每行一个位置，按列连续存放比(n, 6)的逐行归约快得多），dates为datetime64[ns]数组（无法解析的为NaT）。
+    返回形状(检查项数, n)的布尔矩阵，行顺序与check_labels(game)一致。
+    """
+    checks = list(check_labels(game))
+    n = len(issues)
+    flags = np.zeros((len(checks), n), dtype=bool)
+    if n == 0:
+        return flags
+    check = {name: i for i, name in enumerate(checks)}
+
+    issue_ok = _is_integral(issues) & (np.nan_to_num(issues) > 0)
+    flags[check['issue_invalid']] = ~issue_ok
+
+    for area in game.areas:
+        _check_area(flags, check, area, np.asarray(balls[area.name], dtype=float).reshape(area.picks, n))
+
+    flags[check['date_invalid']] = np.isnat(dates)
+
+    with np.errstate(invalid='ignore'):
+        flags[check['pool_invalid']] = np.isnan(pools) | (pools < 0)
+        flags[check['pool_implausible']] = (pools > 0) & (pools < POOL_MIN)
+
+    # 其余检查都通过的行中，同一期号只保留第一次出现的（合并时新数据在前）
+    clean = ~np.logical_or.reduce(flags, axis=0)
+    _, first = np.unique(np.where(clean, issues, -1), return_index=True)
+    first_seen = np.zeros(n, dtype=bool)
+    first_seen[first] = True
+    flags[check['issue_duplicate']] = clean & ~first_seen
+    return flags
+
+
+def row_reasons(flags, game=SSQ):
+    """被隔离行的问题说明，flags为这些行对应的列（形状(检查项数, m)）"""
+    labels = np.array(list(check_labels(game).values()))
+    return ['；'.join(labels[row]) for row in flags.T]
+
+
+def check_sequence(issues, dates):
+    """已通过行级检查的数据的整体提示：期号缺失、期号与日期顺序不一致、开奖间隔过长
+
+    issues为整数数组，dates为datetime64[ns]数组，顺序任意；返回提示字符串列表。
+    期号格式为“年份+三位序号”，同一年内序号应连续。
+    """
+    warnings = []
+    if len(issues) < 2:
+        return warnings
+    order = np.argsort(issues, kind='stable')
+    issues, dates = issues[order], dates[order]
+
+    years, seq = issues // 1000, issues % 1000
+    same_year = years[1:] == years[:-1]
+    gap = same_year & (np.diff(seq) > 1)
+    if gap.any():
+        at = np.flatnonzero(gap)
+        missing = int((np.diff(seq)[gap] - 1).sum())
+        examples = '、'.join(f'{issues[i]}→{issues[i + 1]}' for i in at[:MAX_EXAMPLES])
+        warnings.append(f'期号不连续：共缺少{missing}期（{examples}）')
+
+    backwards = np.diff(dates) <= np.timedelta64(0, 'D')
+    if backwards.any():
+        at = np.flatnonzero(backwards)
+        examples = '、'.join(str(issues[i + 1]) for i in at[:MAX_EXAMPLES])
+        warnings.append(f'开奖日期与期号顺序不一致：{len(at)}处（{examples}）')
+
+    long_gap = np.diff(dates) > np.timedelta64(MAX_DATE_GAP_DAYS, 'D')
+    if long_gap.any():
+        at = np.flatnonzero(long_gap)
+        examples = '、'.join(f'{issues[i]}→{issues[i + 1]}' for i in at[:MAX_EXAMPLES])
+        warnings.append(f'开奖间隔超过{MAX_DATE_GAP_DAYS}天：{len(at)}处（{examples}）')
+    return warnings
+
+
+class ValidationReport:
+    """一次校验的结果
+
+    valid为通过校验并已规范化的数据，quarantine为被隔离的原始行
+    （附“问题”列说明原因），counts为各项检查命中的行数。
+    """
+
+    def __init__(self, source, valid, quarantine, counts, warnings, elapsed_ms):
+        self.source = source
+        self.valid = valid
+        self.quarantine = quarantine
+        self.counts = counts
+        self.warnings = warnings
+        self.elapsed_ms = elapsed_ms
+        self.checked_at = time.time()
+
+    @property
+    def ok(self):
+        return self.quarantine.empty
+
+    def summary(self):
+        return {
+            'source': self.source,
+            'rows': len(self.valid) + len(self.quarantine),
+            'valid': len(self.valid),
+            'quarantined': len(self.quarantine),
+            'counts': {CHECK_LABELS[name]: n for name, n in self.counts.items() if n},
+            'warnings': list(self.warnings),
+            'elapsed_ms': round(self.elapsed_ms, 3),
+        }
+
+
+_reports = {}
+_reports_lock = threading.Lock()
+
+
+def record(report):
+    """保存各数据来源最近一次的校验结果，供页面和状态接口展示"""
+    with _reports_lock:
+        _reports[report.source] = report
+    return report
+
+
+def latest_reports():
+    with _reports_lock:
+        return dict(_reports)
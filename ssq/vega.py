@@ -0,0 +1,145 @@
+"""把图表规格转换为Vega-Lite，交给浏览器渲染（st.vega_lite_chart）"""
+
+CHART_HEIGHT_PER_INCH = 50
+_DASHES = {'-': [1, 0], '--': [6, 4], ':': [2, 2]}
+
+
+def _base(spec):
+    return {
+        'title': spec['title'],
+        'height': int(spec['figsize'][1] * CHART_HEIGHT_PER_INCH),
+    }
+
+
+def _axis(title, **extra):
+    return dict({'title': title}, **extra)
+
+
+def _bar(spec):
+    values = [{'x': x, 'y': y} for x, y in zip(spec['x'], spec['y'])]
+    x = {'field': 'x', 'type': 'ordinal', 'sort': None, 'axis': _axis(spec['x_label'], labelAngle=0)}
+    y = {'field': 'y', 'type': 'quantitative', 'axis': _axis(spec['y_label'])}
+    bar_mark = {'type': 'bar', 'opacity': spec['alpha']}
+    encoding = {'x': x, 'y': y}
+    if isinstance(spec['color'], list):
+        encoding['color'] = {'field': 'x', 'type': 'ordinal', 'legend': None,
+                             'scale': {'domain': spec['x'], 'range': spec['color']}}
+    else:
+        bar_mark['color'] = spec['color']
+    return {
+        'data': {'values': values},
+        'encoding': encoding,
+        'layer': [
+            {'mark': bar_mark},
+            {'mark': {'type': 'text', 'baseline': 'bottom', 'dy': -2, 'color': 'black'},
+             'encoding': {'text': {'field': 'y', 'type': 'quantitative'}}},
+        ],
+    }
+
+
+def _heatmap(spec):
+    encoding = {'x': {'field': 'x', 'type': 'ordinal', 'axis': _axis(spec['x_label'], labelAngle=0)}}
+    if spec.get('y') is None:
+        values = [{'x': x, 'v': v} for x, v in zip(spec['x'], spec['values'])]
+    else:
+        # 多行热力图：None（不可能出现的格子）不画
+        values = [{'x': x, 'y': y, 'v': v} for y, row in zip(spec['y'], spec['values'])
+                  for x, v in zip(spec['x'], row) if v is not None]
+        encoding['y'] = {'field': 'y', 'type': 'ordinal', 'sort': spec['y'], 'axis': _axis(spec.get('y_label'))}
+    return {
+        'data': {'values': values},
+        'encoding': encoding,
+        'layer': [
+            {'mark': 'rect',
+             'encoding': {'color': {'field': 'v', 'type': 'quantitative',
+                                    'scale': {'scheme': spec['cmap'].lower()}, 'title': spec['row_label']}}},
+            {'mark': {'type': 'text', 'color': 'black'},
+             'encoding': {'text': {'field': 'v', 'type': 'quantitative'}}},
+        ],
+    }
+
+
+def _pie(spec):
+    values = [{'label': label, 'value': value} for label, value in zip(spec['labels'], spec['values'])]
+    return {
+        'data': {'values': values},
+        'transform': [
+            {'joinaggregate': [{'op': 'sum', 'field': 'value', 'as': 'total'}]},
+            {'calculate': 'datum.total ? datum.value / datum.total : 0', 'as': 'share'},
+        ],
+        'encoding': {
+            'theta': {'field': 'value', 'type': 'quantitative', 'stack': True},
+            'color': {'field': 'label', 'type': 'nominal', 'title': None,
+                      'scale': {'domain': spec['labels'], 'range': spec['colors']}},
+        },
+        'layer': [
+            {'mark': {'type': 'arc', 'outerRadius': 120}},
+            {'mark': {'type': 'text', 'radius': 80, 'color': 'white'},
+             'encoding': {'text': {'field': 'share', 'type': 'quantitative', 'format': '.1%'}}},
+        ],
+    }
+
+
+def _hist(spec):
+    edges, counts = spec['edges'], spec['counts']
+    values = [{'start': edges[i], 'end': edges[i + 1], 'count': c} for i, c in enumerate(counts)]
+    return {
+        'data': {'values': values},
+        'mark': {'type': 'bar', 'color': spec['color'], 'opacity': 0.7, 'stroke': 'black'},
+        'encoding': {
+            'x': {'field': 'start', 'type': 'quantitative', 'bin': {'binned': True}, 'axis': _axis(spec['x_label'])},
+            'x2': {'field': 'end'},
+            'y': {'field': 'count', 'type': 'quantitative', 'axis': _axis(spec['y_label'])},
+        },
+    }
+
+
+def _line(spec):
+    names = [item['name'] for item in spec['series']]
+    values = [{'x': x, 's': item['name'], 'y': y}
+              for item in spec['series'] for x, y in zip(spec['x'], item['y'])]
+    if spec['x_type'] == 'temporal':
+        x = {'field': 'x', 'type': 'temporal', 'axis': _axis(spec['x_label'], format='%Y-%m-%d', labelAngle=-45)}
+    else:
+        x = {'field': 'x', 'type': 'ordinal', 'sort': None,
+             'axis': _axis(spec['x_label'], labelAngle=-45, labelOverlap=True)}
+    color = {'field': 's', 'type': 'nominal', 'title': None,
+             'scale': {'domain': names, 'range': [item['color'] for item in spec['series']]}}
+    if not spec['legend']:
+        color['legend'] = None
+    layers = []
+    for item in spec['series']:
+        layers.append({
+            'transform': [{'filter': {'field': 's', 'equal': item['name']}}],
+            'mark': {'type': 'line', 'point': item['marker'] is not None,
+                     'strokeDash': _DASHES.get(item['linestyle'], [1, 0])},
+        })
+    return {
+        'data': {'values': values},
+        'encoding': {
+            'x': x,
+            'y': {'field': 'y', 'type': 'quantitative', 'axis': _axis(spec['y_label'])},
+            'color': color,
+            'tooltip': [{'field': 'x', 'title': spec['x_label']}, {'field': 'y', 'title': spec['y_label']}],
+        },
+        'layer': layers,
+    }
+
+
+_CONVERTERS = {
+    'bar': _bar,
+    'heatmap': _heatmap,
+    'pie': _pie,
+    'hist': _hist,
+    'line': _line,
+}
+
+
+def to_vega_lite(spec):
+    """图表规格 -> Vega-Lite规格（数据内联）"""
+    converter = _CONVERTERS.get(spec['kind'])
+    if converter is None:
+        raise ValueError(f"未知的图表类型: {spec['kind']}")
+    result = _base(spec)
+    result.update(converter(spec))
+    return result
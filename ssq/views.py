@@ -0,0 +1,222 @@
+"""页面使用的缓存视图：按数据版本和数据范围缓存统计结果与图表"""
+
+import io
+import time
+
+import pandas as pd
+
+from . import analytics, charts, chart_specs, combination_filter, config, jobs, significance, transitions, vega
+from .cache import analytics_cache, chart_cache, export_cache
+from .data import PRESET_PERIODS, RED_COLUMNS, BLUE_COLUMN, filter_history
+
+# 参数类图表在数据更新后预热时使用的默认参数（与页面控件默认值一致）
+DEFAULT_SUM_WINDOW = 5
+DEFAULT_HEAT_NUMBER = 1
+DEFAULT_SLOT_WINDOW = 10
+DEFAULT_SLOT = 0
+DEFAULT_BLUE_NUMBER = 1
+DEFAULT_BLUE_WINDOW = 20
+DEFAULT_MIN_OMISSION = 10
+# 组合缩水的默认条件（页面控件的默认值：全部范围、全部比例）
+DEFAULT_COMBINATION_FILTER = {
+    'sum_range': (21, 183), 'span_range': (5, 32),
+    'odd_counts': tuple(range(7)), 'small_counts': tuple(range(7)),
+    'zone_ranges': ((0, 6),) * 3, 'consecutive_range': (0, 5),
+    'exclude': (), 'require': (), 'cold_range': (0, 6),
+}
+
+
+def range_key(period, start_date=None, end_date=None, as_of=None):
+    """数据范围的缓存键，as_of为回溯的期号（None表示最新）"""
+    key = (period,) if period in PRESET_PERIODS else (period, str(start_date), str(end_date))
+    return key if as_of is None else key + (('as_of', as_of),)
+
+
+def snapshot(dataset, as_of=None):
+    """截至as_of期（含）的历史数据：只是dataset.df的切片，行号不变，前缀和表照常可用"""
+    if as_of is None:
+        return dataset.df
+    return dataset.df.iloc[dataset.issue_row(as_of):]
+
+
+def red_frequency(dataset, chart_data, key):
+    return analytics_cache.get_or_compute(
+        dataset.cache_version, ('red_frequency', key),
+        lambda: analytics.frequency_table(chart_data.slots.number_counts(), chart_data.periods, analytics.RED_PICKS))
+
+
+def blue_stats(dataset, chart_data, key):
+    """本数据范围的蓝球统计（按数据范围缓存），同时交给chart_data供本次重跑的蓝球图表和推荐使用"""
+    chart_data.blue = analytics_cache.get_or_compute(
+        dataset.cache_version, ('blue_stats', key), lambda: chart_data.blue)
+    return chart_data.blue
+
+
+def blue_frequency(dataset, chart_data, key):
+    return analytics_cache.get_or_compute(
+        dataset.cache_version, ('blue_frequency', key), lambda: blue_stats(dataset, chart_data, key).frequency_table())
+
+
+def blue_intervals(dataset, chart_data, key):
+    """各蓝球的间隔统计表"""
+    return analytics_cache.get_or_compute(
+        dataset.cache_version, ('blue_intervals', key), lambda: blue_stats(dataset, chart_data, key).interval_table())
+
+
+def sum_statistics(dataset, chart_data, key):
+    """红球和值的统计指标"""
+    return analytics_cache.get_or_compute(
+        dataset.cache_version, ('sum_statistics', key),
+        lambda: analytics.sum_statistics(analytics.red_sums(chart_data.reds)))
+
+
+def combination_summary(dataset, chart_data, min_omission, **conditions):
+    """组合缩水结果（FilterSummary）及当前的冷号；conditions为filter_combinations的条件
+
+    结果只取决于条件和冷号，按数据版本、条件和冷号缓存，不同数据范围的冷号相同时共用。
+    """
+    cold = combination_filter.cold_numbers(chart_data.slots.number_omissions(), min_omission)
+    conditions = {name: _normalize_condition(name, value) for name, value in conditions.items()}
+    key = ('combination_filter', tuple(sorted(conditions.items())), tuple(cold))
+    summary = analytics_cache.get_or_compute(
+        dataset.cache_version, key,
+        lambda: combination_filter.FilterSummary.from_result(
+            combination_filter.filter_combinations(cold=cold, **conditions)))
+    return summary, cold
+
+
+def _normalize_condition(name, value):
+    """把缩水条件转换为可作为缓存键的形式（号码和比例集合排序，区间转换为元组）"""
+    if value is None:
+        return None
+    if name in ('odd_counts', 'small_counts', 'exclude', 'require'):
+        return tuple(sorted(set(int(v) for v in value)))
+    if name == 'zone_ranges':
+        return tuple(None if bounds is None else tuple(int(v) for v in bounds) for bounds in value)
+    return tuple(int(v) for v in value)
+
+
+def slot_summary(dataset, chart_data, key):
+    return analytics_cache.get_or_compute(dataset.cache_version, ('slot_summary', key), chart_data.slots.summary)
+
+
+def transition_table(dataset, chart_data, key, feature, window):
+    """转移概率表（%）"""
+    return analytics_cache.get_or_compute(
+        dataset.cache_version, ('transition_table', key, feature, window),
+        lambda: transitions.probabilities(chart_data.transitions.table(feature, window)))
+
+
+def transition_rates(dataset, chart_data, key, window):
+    """各号码的重号率、邻号率"""
+    return analytics_cache.get_or_compute(
+        dataset.cache_version, ('transition_rates', key, window), lambda: chart_data.transitions.number_rates(window))
+
+
+def significance_report(dataset, chart_data, key, resamples, owner=None):
+    """显著性检验：已有结果时返回(结果, None)，否则返回(None, 后台任务)
+
+    结果按数据版本、数据范围、模拟次数和种子缓存；计算中的任务在各会话之间共享，owner为发起的会话。
+    """
+    seed = config.SIGNIFICANCE_SEED
+    cache_key = ('significance', key, resamples, seed)
+    report = analytics_cache.get(dataset.cache_version, cache_key)
+    if report is not None:
+        return report, None
+    reds, blues = chart_data.reds, chart_data.blues
+    start = time.perf_counter()
+
+    def finish(results):
+        sim = significance.merge_chunks(results)
+        return significance.build_report(reds, blues, sim, seed, (time.perf_counter() - start) * 1000)
+
+    job = jobs.manager.submit(
+        (dataset.cache_version,) + cache_key, f'显著性检验（{resamples:,}次模拟）',
+        significance.simulation_tasks(len(reds), resamples, seed), finish, owner=owner,
+        on_done=lambda report: analytics_cache.put(dataset.cache_version, cache_key, report),
+        work=len(reds) * resamples)
+    return job.result, job
+
+
+def export_csv(dataset, filtered_df, key):
+    """导出的CSV字节（各会话共享同一份）"""
+    return export_cache.get_or_compute(
+        dataset.cache_version, ('csv', key), lambda: filtered_df.to_csv(index=False).encode('utf-8-sig'))
+
+
+def export_excel(dataset, filtered_df, key):
+    """导出的Excel字节（各会话共享同一份）"""
+    def build():
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+            filtered_df.to_excel(writer, index=False, sheet_name='双色球数据')
+        return buffer.getvalue()
+
+    return export_cache.get_or_compute(dataset.cache_version, ('xlsx', key), build)
+
+
+def chart_spec(dataset, key, build):
+    """图表规格，key需包含数据范围及build依赖的所有参数"""
+    return analytics_cache.get_or_compute(dataset.cache_version, ('chart_spec',) + key, build)
+
+
+def chart_output(dataset, key, spec, backend=None):
+    """按后端返回可直接显示的结果：matplotlib为PNG字节，vega-lite为Vega-Lite字典"""
+    backend = backend or config.CHART_BACKEND
+    if backend == 'vega-lite':
+        return chart_cache.get_or_compute(dataset.cache_version, ('vega',) + key, lambda: vega.to_vega_lite(spec))
+    return chart_cache.get_or_compute(dataset.cache_version, ('png',) + key, lambda: charts.spec_png(spec))
+
+
+# 转移统计页以窗口为参数的图表
+TRANSITION_CHARTS = {
+    'transition.repeat_rates': chart_specs.repeat_rates,
+    'transition.repeat_counts': chart_specs.repeat_counts,
+    'transition.neighbor_rates': chart_specs.neighbor_rates,
+    'transition.neighbor_counts': chart_specs.neighbor_counts,
+}
+
+
+def warm_chart(dataset, key, build):
+    chart_output(dataset, key, chart_spec(dataset, key, build))
+
+
+def warm_default_views(dataset):
+    """预热各预设数据范围的统计与图表缓存（在后台刷新线程中调用）"""
+    for cache in (analytics_cache, chart_cache, export_cache):
+        cache.retain_version(dataset.cache_version)
+    for period in PRESET_PERIODS:
+        filtered_df = filter_history(dataset.df, period)
+        if filtered_df.empty:
+            continue
+        key = range_key(period)
+        data = chart_specs.ChartData(filtered_df, dataset)
+        red_frequency(dataset, data, key)
+        blue_frequency(dataset, data, key)
+        blue_intervals(dataset, data, key)
+        for name, build in chart_specs.RANGE_CHARTS.items():
+            warm_chart(dataset, (name,) + key, lambda: build(data))
+        warm_chart(dataset, ('trend.sum',) + key + (DEFAULT_SUM_WINDOW,),
+                   lambda: chart_specs.sum_trend(data, DEFAULT_SUM_WINDOW))
+        warm_chart(dataset, ('trend.heat',) + key + (DEFAULT_HEAT_NUMBER,),
+                   lambda: chart_specs.number_heat(data, DEFAULT_HEAT_NUMBER))
+        warm_chart(dataset, ('blue.rolling',) + key + (DEFAULT_BLUE_NUMBER, DEFAULT_BLUE_WINDOW),
+                   lambda: chart_specs.blue_rolling(data, DEFAULT_BLUE_NUMBER, DEFAULT_BLUE_WINDOW))
+        slot_summary(dataset, data, key)
+        sum_statistics(dataset, data, key)
+        combination_summary(dataset, data, DEFAULT_MIN_OMISSION, **DEFAULT_COMBINATION_FILTER)
+        warm_chart(dataset, ('red.slot_trend',) + key + (DEFAULT_SLOT_WINDOW,),
+                   lambda: chart_specs.slot_trend(data, DEFAULT_SLOT_WINDOW))
+        warm_chart(dataset, ('red.slot_quantiles',) + key + (DEFAULT_SLOT, DEFAULT_SLOT_WINDOW),
+                   lambda: chart_specs.slot_quantiles(data, DEFAULT_SLOT, DEFAULT_SLOT_WINDOW))
+        # 转移统计页的窗口默认为整个数据范围
+        window = data.periods
+        if window < 3:
+            continue
+        for feature in transitions.FEATURES:
+            warm_chart(dataset, ('transition.next',) + key + (feature, window),
+                       lambda: chart_specs.transition_next(data, feature, window))
+            transition_table(dataset, data, key, feature, window)
+        for name, build in TRANSITION_CHARTS.items():
+            warm_chart(dataset, (name,) + key + (window,), lambda: build(data, window))
+        transition_rates(dataset, data, key, window)
@@ -0,0 +1,41 @@
+"""测试环境：ssq.config在导入时读取环境变量，这里在导入ssq之前把数据库和启动包指向临时目录"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_workdir = tempfile.mkdtemp(prefix='ssq-tests-')
+os.environ.update({
+    'SSQ_DB_PATH': os.path.join(_workdir, 'ssq.db'),
+    'SSQ_BUNDLE_DIR': os.path.join(_workdir, 'bundle'),
+    'SSQ_AUTO_REFRESH': '0',
+    'SSQ_JOB_WORKERS': '1',
+})
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def stop_jobs():
+    """测试结束时取消后台任务、等待后台线程并关闭进程池，避免解释器退出时线程仍在运行"""
+    yield
+    from ssq import jobs
+
+    jobs.shutdown()
+
+
+@pytest.fixture
+def history():
+    """300期合成开奖数据（按开奖日期从新到旧）"""
+    from benchmarks.synthetic import make_history
+    from ssq.data import normalize_history
+
+    return normalize_history(make_history(300, seed=7))
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(20240101)
@@ -0,0 +1,99 @@
+"""统计接口：向量化的结果与原页面中逐行计算的写法一致"""
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ssq import analytics
+from ssq.data import RED_COLUMNS, BLUE_COLUMN
+
+
+@pytest.fixture
+def reds(history):
+    return history[RED_COLUMNS].to_numpy()
+
+
+@pytest.fixture
+def blues(history):
+    return history[BLUE_COLUMN].to_numpy()
+
+
+def per_row(reds, fn):
+    return np.array([fn(sorted(row)) for row in reds.tolist()])
+
+
+def test_ratios_and_shapes(reds):
+    np.testing.assert_array_equal(analytics.odd_counts(reds), per_row(reds, lambda r: sum(b % 2 == 1 for b in r)))
+    np.testing.assert_array_equal(analytics.small_counts(reds), per_row(reds, lambda r: sum(b <= 16 for b in r)))
+    np.testing.assert_array_equal(analytics.consecutive_pairs(reds),
+                                  per_row(reds, lambda r: sum(r[i + 1] - r[i] == 1 for i in range(5))))
+    np.testing.assert_array_equal(analytics.red_sums(reds), per_row(reds, sum))
+    np.testing.assert_array_equal(analytics.red_spans(reds), per_row(reds, lambda r: max(r) - min(r)))
+    np.testing.assert_array_equal(
+        analytics.zone_counts(reds),
+        per_row(reds, lambda r: [sum(lo <= b <= hi for b in r) for lo, hi in ((1, 11), (12, 22), (23, 33))]))
+
+    odd = per_row(reds, lambda r: sum(b % 2 == 1 for b in r))
+    expected = pd.Series([f'{k}:{6 - k}' for k in odd]).value_counts().sort_index()
+    pd.testing.assert_series_equal(analytics.odd_even_distribution(reds), expected)
+
+
+def test_counts_and_missing(reds, blues):
+    np.testing.assert_array_equal(analytics.red_counts(reds),
+                                  [int((reds == n).sum()) for n in range(1, 34)])
+    recent = set(reds[:10].ravel())
+    assert analytics.missing_reds(reds, 10) == [n for n in range(1, 34) if n not in recent]
+    assert analytics.missing_blues(blues, 10) == [n for n in range(1, 17) if n not in set(blues[:10])]
+    table = analytics.blue_frequency_table(blues)
+    assert table['出现次数'].sum() == len(blues)
+    np.testing.assert_allclose(table['出现频率'], (table['出现次数'] / len(blues) * 100).round(2))
+
+
+def test_number_heat(reds):
+    presence = pd.Series([1 if 7 in row else 0 for row in reds.tolist()])
+    np.testing.assert_allclose(analytics.number_heat(reds, 7), presence.rolling(window=10).mean() * 10)
+
+
+def test_sum_statistics(reds):
+    sums = pd.Series(per_row(reds, sum))
+    stats = analytics.sum_statistics(sums)
+    assert stats['平均值'] == round(sums.mean(), 2)
+    assert stats['标准差'] == round(sums.std(), 2)
+
+
+def reference_red_scores(reds, hot_weight=0.7, cold_weight=0.3):
+    """原页面的逐号码循环"""
+    total = len(reds)
+    recent = min(20, total)
+    recent_balls = reds[:recent].ravel().tolist()
+    scores = []
+    for num in range(1, 34):
+        base = (reds == num).sum() / total * 6 * 100
+        recent_score = recent_balls.count(num) / recent * 6 * 100
+        hot = hot_weight * base + (1 - hot_weight) * recent_score
+        if num not in recent_balls:
+            cold = 100
+        else:
+            last = next(i for i, row in enumerate(reds[:recent].tolist()) if num in row)
+            cold = (recent - last) / recent * 100
+        scores.append(hot_weight * hot + cold_weight * cold)
+    return np.array(scores)
+
+
+@pytest.mark.parametrize('periods', [300, 12])
+def test_red_scores(reds, periods):
+    np.testing.assert_allclose(analytics.red_scores(reds[:periods]), reference_red_scores(reds[:periods]))
+
+
+def test_recommend(reds, blues):
+    picks = analytics.recommend(reds, blues, count=3, rng=random.Random(4))
+    top_red = set(np.argsort(-reference_red_scores(reds), kind='stable')[:15] + 1)
+    top_blue = set(np.argsort(-analytics.blue_scores(blues), kind='stable')[:5] + 1)
+    assert [p['组合'] for p in picks] == ['推荐1', '推荐2', '推荐3']
+    for pick in picks:
+        assert len(pick['红球']) == 6 and pick['红球'] == sorted(pick['红球'])
+        assert set(pick['红球']) <= top_red
+        assert pick['蓝球'] in top_blue
+    assert picks == analytics.recommend(reds, blues, count=3, rng=random.Random(4))
@@ -0,0 +1,54 @@
+"""用AppTest逐页运行应用（内置的CSV数据），检查没有未捕获的异常"""
+
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from ssq import storage
+
+from .conftest import ROOT
+
+APP = os.path.join(ROOT, 'app.py')
+PAGES = ["基本数据概览", "红球号码分析", "蓝球号码分析", "号码组合分析", "历史趋势分析", "智能号码推荐"]
+
+
+def _run(at):
+    at.run()
+    assert not at.exception, [e.value for e in at.exception]
+    return at
+
+
+@pytest.fixture(scope='module')
+def app():
+    return _run(AppTest.from_file(APP, default_timeout=300))
+
+
+@pytest.mark.parametrize('page', PAGES)
+def test_page(app, page):
+    app.sidebar.radio[0].set_value(page)
+    _run(app)
+    assert app.subheader
+
+
+def test_transitions(app):
+    app.sidebar.radio[0].set_value("历史趋势分析")
+    _run(app)
+    next(r for r in app.radio if r.options == ["走势图表", "转移统计"]).set_value("转移统计")
+    _run(app)
+    assert not app.warning
+
+
+def test_as_of_transitions_three_draws():
+    """回溯到倒数第3期时数据范围正好3期，转移统计不显示窗口滑块"""
+    at = _run(AppTest.from_file(APP, default_timeout=300))
+    at.sidebar.checkbox(key='as_of_enabled').check()
+    _run(at)
+    issues = storage.load_history()['期号']
+    at.sidebar.number_input(key='as_of_issue').set_value(int(issues.iloc[-3]))
+    at.sidebar.radio[0].set_value("历史趋势分析")
+    _run(at)
+    next(r for r in at.radio if r.options == ["走势图表", "转移统计"]).set_value("转移统计")
+    _run(at)
+    assert not any(s.label == "统计最近N期" for s in at.slider)
+    assert at.markdown
@@ -0,0 +1,72 @@
+"""蓝球统计：一次分组得到的结果与原来analytics中逐项计算的结果一致，间隔、重号与滚动频率与直接统计一致"""
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ssq import analytics, blue
+from ssq.data import RED_COLUMNS, BLUE_COLUMN
+
+
+@pytest.fixture(params=[300, 40, 1])
+def blues(request, history):
+    return history[BLUE_COLUMN].to_numpy()[:request.param]
+
+
+def test_matches_analytics(blues):
+    stats = blue.BlueStats(blues)
+    pd.testing.assert_frame_equal(stats.frequency_table(), analytics.blue_frequency_table(blues))
+    np.testing.assert_array_equal(stats.scores(), analytics.blue_scores(blues))
+    assert stats.parity() == analytics.blue_parity_counts(blues)
+    assert stats.size() == analytics.blue_size_counts(blues)
+    np.testing.assert_array_equal(stats.omissions, analytics.blue_omissions(blues))
+    np.testing.assert_array_equal(stats.counts, analytics.blue_counts(blues))
+
+
+def test_residues(blues):
+    stats = blue.BlueStats(blues)
+    for k in (4, 5):
+        residues = stats.residues(k)
+        assert residues.to_dict() == {r: int((blues % k == r).sum()) for r in range(k)}
+
+
+def test_gaps_and_repeats(blues):
+    stats = blue.BlueStats(blues)
+    gaps = {n: np.diff(np.flatnonzero(blues == n)) for n in range(1, 17)}
+    table = stats.interval_table()
+    for n, g in gaps.items():
+        row = table.iloc[n - 1]
+        assert row['重号次数'] == (g == 1).sum()
+        if len(g):
+            assert row['平均间隔'] == pytest.approx(round(g.mean(), 2))
+            assert row['最长间隔'] == g.max()
+        else:
+            assert np.isnan(row['平均间隔'])
+    repeats = int((blues[1:] == blues[:-1]).sum())
+    assert stats.repeats == repeats
+    assert stats.pairs == len(blues) - 1
+    assert stats.repeat_rate() == (round(repeats / (len(blues) - 1) * 100, 2) if len(blues) > 1 else 0.0)
+
+    distribution = stats.interval_distribution(max_gap=10)
+    for n, g in gaps.items():
+        expected = np.bincount(np.minimum(g, 10) - 1, minlength=10)
+        np.testing.assert_array_equal(distribution[n - 1], expected)
+
+
+def test_rolling(blues):
+    window = 20
+    rolling = blue.BlueStats(blues).rolling(window)
+    assert rolling.shape == (len(blues), 16)
+    valid = len(blues) - window + 1
+    for i in range(max(valid, 0)):
+        np.testing.assert_array_equal(rolling[i], np.bincount(blues[i:i + window], minlength=17)[1:])
+    assert np.isnan(rolling[max(valid, 0):]).all()
+
+
+def test_recommend_with_precomputed_scores(history):
+    reds, blues = history[RED_COLUMNS].to_numpy(), history[BLUE_COLUMN].to_numpy()
+    expected = analytics.recommend(reds, blues, rng=random.Random(1))
+    actual = analytics.recommend(reds, blues, rng=random.Random(1), blue=blue.BlueStats(blues).scores())
+    assert actual == expected
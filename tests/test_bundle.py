@@ -0,0 +1,217 @@
+"""启动包：load只读取并校验，与当前数据不一致时放弃；install才修改进程内状态"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ssq import blue, bundle, chart_specs, combination_filter, config, storage, views
+from ssq.cache import analytics_cache, chart_cache
+from ssq.data import validate_history
+from ssq.games import DLT
+from ssq.storage import HistoryStore
+from tests.test_games import make_game_history
+
+
+@pytest.fixture
+def store(tmp_path, history):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    store.upsert(history)
+    return store
+
+
+@pytest.fixture
+def path(tmp_path, store):
+    path = str(tmp_path / 'bundle')
+    bundle.build(path, store=store, warm=False)
+    return path
+
+
+def _edit_manifest(path, **changes):
+    with open(os.path.join(path, bundle.MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest.update(changes)
+    with open(os.path.join(path, bundle.MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+
+def test_load_is_pure(path, store, history):
+    table = combination_filter.get_table()
+    cached = len(analytics_cache)
+    loaded = bundle.load(path, store=store)
+    assert loaded is not None
+    pd.testing.assert_frame_equal(loaded.dataset.df, history)
+    assert loaded.manifest['version'] == loaded.dataset.version
+    assert loaded.manifest['source'] == store.checksum()
+    # 前缀和表来自启动包（内存映射），与重新生成的一致
+    assert isinstance(loaded.arrays['index.red.prefix'], np.memmap)
+    np.testing.assert_array_equal(loaded.dataset.index('red').counts(0, 100),
+                                  loaded.dataset.__class__(history).index('red').counts(0, 100))
+    assert combination_filter.get_table() is table
+    assert len(analytics_cache) == cached
+
+
+def test_rejects_stale_checksum(path, store, history):
+    changed = history.iloc[:1].copy()
+    changed['蓝球'] = changed['蓝球'] % 16 + 1
+    store.upsert(changed)
+    assert bundle.load(path, store=store) is None
+
+
+@pytest.mark.parametrize('column, value', [('奖池(元)', 1.5e9), ('开奖日期', pd.Timestamp('2030-01-01'))])
+def test_rejects_changed_pool_or_date(path, store, history, column, value):
+    """只修正奖池或开奖日期也使启动包失效"""
+    changed = history.iloc[:1].copy()
+    changed[column] = value
+    store.upsert(changed)
+    assert bundle.load(path, store=store) is None
+
+
+def test_rejects_new_draws(path, store, history):
+    store.upsert(history.iloc[:1].assign(期号=history['期号'].max() + 1))
+    assert bundle.load(path, store=store) is None
+
+
+def test_rejects_other_format(path, store):
+    _edit_manifest(path, format=bundle.FORMAT - 1)
+    assert bundle.load(path, store=store) is None
+
+
+def test_rejects_version_mismatch(path, store):
+    _edit_manifest(path, version='0' * 40)
+    assert bundle.load(path, store=store) is None
+
+
+def test_missing_bundle(tmp_path, store):
+    assert bundle.load(str(tmp_path / 'nowhere'), store=store) is None
+
+
+def test_install_seeds_empty_store(tmp_path, path, store, monkeypatch):
+    """数据库为空时与CSV比对；install用启动包中的数据初始化数据库并换用其中的组合特征表"""
+    monkeypatch.setattr(combination_filter, '_table', None)
+    empty = HistoryStore(str(tmp_path / 'empty.db'))
+    _edit_manifest(path, csv=bundle.file_sha1(bundle.config.DATA_PATH))
+    loaded = bundle.load(path, store=empty)
+    assert loaded is not None
+    assert len(empty) == 0
+    assert combination_filter._table is None
+
+    dataset = bundle.install(loaded, store=empty)
+    assert dataset is loaded.dataset
+    pd.testing.assert_frame_equal(empty.frame(), store.frame())
+    assert combination_filter.get_table() is loaded.table
+
+
+def test_uses_shared_store(path, store, monkeypatch):
+    """不传store时使用进程内共享的数据库，不另外打开数据库，也不先从CSV导入"""
+    monkeypatch.setattr(storage, '_store', store)
+    monkeypatch.setattr(storage, '_seeded', False)
+    monkeypatch.setattr(storage, 'HistoryStore', None)
+    loaded = bundle.load(path)
+    assert loaded is not None
+    assert bundle.install(loaded) is loaded.dataset
+    assert storage._seeded is False
+
+
+def test_other_game(tmp_path, store):
+    """其他玩法的启动包只有开奖数据和前缀和表；与数据库的玩法不一致时放弃"""
+    dlt = HistoryStore(store.path, game=DLT)
+    df = validate_history(make_game_history(DLT, 80, seed=6), game=DLT).valid
+    dlt.upsert(df)
+    path = str(tmp_path / 'dlt-bundle')
+    manifest = bundle.build(path, store=dlt)
+    assert manifest['game'] == 'dlt' and manifest['views'] == {'analytics': 0, 'charts': 0}
+    assert not any(name.startswith('combinations.') for name in manifest['arrays'])
+    loaded = bundle.load(path, store=dlt)
+    assert loaded is not None and loaded.table is None
+    assert loaded.dataset.game is DLT
+    pd.testing.assert_frame_equal(loaded.dataset.df, df)
+    np.testing.assert_array_equal(loaded.dataset.index('back').counts(0, 50),
+                                  loaded.dataset.__class__(df, game=DLT).index('back').counts(0, 50))
+    assert bundle.load(path, store=store) is None
+
+
+def assert_same(a, b):
+    """解码后的值a与原值b相同（类型也相同，NumPy标量解码为对应的Python标量）"""
+    if isinstance(b, np.generic):
+        b = b.item()
+    assert type(a) is type(b), (type(a), type(b))
+    if isinstance(a, pd.DataFrame):
+        pd.testing.assert_frame_equal(a, b)
+    elif isinstance(a, np.ndarray):
+        assert a.dtype == b.dtype
+        np.testing.assert_array_equal(a, b)
+    elif isinstance(a, (list, tuple)):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            assert_same(x, y)
+    elif isinstance(a, dict):
+        assert list(a) == list(b)
+        for key in a:
+            assert_same(a[key], b[key])
+    elif isinstance(a, (blue.BlueStats, combination_filter.FilterSummary)):
+        assert_same(vars(a), vars(b))
+    elif isinstance(a, float) and np.isnan(a):
+        assert np.isnan(b)
+    else:
+        assert a == b
+
+
+def test_views_codec(tmp_path, history):
+    frame = pd.DataFrame({'号码': ['01', '02'], 'x': [1.5, np.nan]}, index=pd.Index(['a', 'b'], name='本期'))
+    result = combination_filter.filter_combinations(sum_range=(21, 22))
+    values = {'analytics': [
+        (('frame', ('全部数据',)), frame),
+        (('range_frame',), pd.DataFrame({'n': np.arange(3, dtype=np.int8), 'd': history['开奖日期'].iloc[:3]})),
+        (('stats',), {'平均值': np.float64(1.5), 'count': np.int64(3), 1: None, '$x': (True, [1, 'a'])}),
+        (('blue_stats',), blue.BlueStats(history['蓝球'].to_numpy())),
+        (('filter',), combination_filter.FilterSummary.from_result(result)),
+        (('array',), np.array(['a', 'bc'], dtype=object)),
+    ], 'charts': [(('png', 'red.frequency'), b'\x89PNG\r\n\x00data')]}
+    bundle.write_views(str(tmp_path), values)
+    decoded = bundle.read_views(str(tmp_path))
+    assert_same(decoded, values)
+    assert decoded['analytics'][4][1].result().to_csv() == result.to_csv()
+
+    with pytest.raises(TypeError):
+        bundle.write_views(str(tmp_path), {'analytics': [(('bad',), object())]})
+
+
+def test_views_round_trip(tmp_path, store, monkeypatch):
+    """启动包中预先算好的统计和图表与构建时的缓存条目相同；安装后默认条件的组合缩水不再计算"""
+    monkeypatch.setattr(views, 'PRESET_PERIODS', {'最近50期': 50})
+    monkeypatch.setattr(config, 'CHART_BACKEND', 'vega-lite')
+    path = str(tmp_path / 'warm')
+    try:
+        bundle.build(path, store=store)
+        dataset = bundle.load(path, store=store).dataset
+        expected = {'analytics': analytics_cache.entries(dataset.cache_version),
+                    'charts': chart_cache.entries(dataset.cache_version)}
+        assert not os.path.exists(os.path.join(path, 'views.pkl'))
+        analytics_cache.clear()
+        chart_cache.clear()
+
+        loaded = bundle.load(path, store=store)
+        assert_same(loaded.views, expected)
+        names = {key[0] for key, _ in loaded.views['analytics']}
+        assert {'sum_statistics', 'combination_filter', 'blue_stats'} <= names
+
+        dataset = bundle.install(loaded, store=store)
+        monkeypatch.setattr(combination_filter, 'filter_combinations', None)
+        data = chart_specs.ChartData(dataset.df.head(50), dataset)
+        summary, cold = views.combination_summary(dataset, data, views.DEFAULT_MIN_OMISSION,
+                                                  **views.DEFAULT_COMBINATION_FILTER)
+        assert summary.count == combination_filter.TOTAL_COMBINATIONS
+        assert views.sum_statistics(dataset, data, views.range_key('最近50期')) is not None
+    finally:
+        analytics_cache.clear()
+        chart_cache.clear()
+
+
+def test_rejects_unknown_view(path, store):
+    """views中无法识别的内容按启动包损坏处理"""
+    with open(os.path.join(path, bundle.VIEWS), 'w', encoding='utf-8') as f:
+        json.dump({'analytics': [{'$object': 'os.system'}], 'charts': []}, f)
+    assert bundle.load(path, store=store) is None
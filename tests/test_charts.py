@@ -0,0 +1,112 @@
+"""matplotlib后端：每种图表规格都能绘制，绘制结果与规格一致，PNG渲染复用图表且结果稳定"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+from matplotlib.collections import QuadMesh
+from matplotlib.figure import Figure
+
+from ssq import chart_specs, charts
+
+from .test_vega import ALL_CHARTS
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+@pytest.fixture
+def chart_data(history):
+    return chart_specs.ChartData(history)
+
+
+def draw(spec):
+    fig = Figure(figsize=spec['figsize'])
+    ax = fig.add_subplot()
+    charts.draw_spec(fig, ax, spec)
+    return fig, ax
+
+
+@pytest.mark.parametrize('name', sorted(ALL_CHARTS))
+def test_every_chart_draws(chart_data, name):
+    spec = ALL_CHARTS[name](chart_data)
+    fig, ax = draw(spec)
+    assert ax.get_title() == spec['title']
+
+
+def test_bar(chart_data):
+    spec = chart_specs.red_frequency(chart_data)
+    _, ax = draw(spec)
+    assert len(ax.patches) == len(spec['x'])
+    assert [round(bar.get_height()) for bar in ax.patches] == list(spec['y'])
+    # 每根柱子上方标注数值
+    assert [text.get_text() for text in ax.texts] == [str(int(v)) for v in spec['y']]
+    assert ax.get_xlabel() == spec['x_label'] and ax.get_ylabel() == spec['y_label']
+
+
+def test_heatmaps(chart_data):
+    spec = chart_specs.red_heatmap(chart_data)
+    fig, ax = draw(spec)
+    mesh = next(c for c in ax.collections if isinstance(c, QuadMesh))
+    assert mesh.get_array().shape == (1, 33)
+    assert [label.get_text() for label in ax.get_yticklabels()] == [spec['row_label']]
+
+    spec = chart_specs.slot_frequency(chart_data)
+    fig, ax = draw(spec)
+    mesh = next(c for c in ax.collections if isinstance(c, QuadMesh))
+    assert mesh.get_array().shape == (len(spec['y']), len(spec['x']))
+    # 不可能出现的格子（None）不画、不标注
+    cells = sum(v is not None for row in spec['values'] for v in row)
+    assert np.ma.count(mesh.get_array()) == cells == len(ax.texts)
+    # 多行热力图的颜色条标注数值含义
+    assert fig.axes[-1].get_ylabel() == spec['row_label']
+
+
+def test_pie(chart_data):
+    spec = chart_specs.blue_parity(chart_data)
+    _, ax = draw(spec)
+    assert len(ax.patches) == len(spec['labels'])
+    assert [text.get_text() for text in ax.texts[::2]] == spec['labels']
+
+
+def test_hist(chart_data):
+    spec = chart_specs.sum_histogram(chart_data)
+    _, ax = draw(spec)
+    assert len(ax.patches) == len(spec['counts'])
+    assert sum(bar.get_height() for bar in ax.patches) == pytest.approx(chart_data.periods)
+
+
+def test_lines(chart_data):
+    spec = chart_specs.slot_quantiles(chart_data, 0, 10)
+    _, ax = draw(spec)
+    assert [line.get_label() for line in ax.lines] == [item['name'] for item in spec['series']]
+    assert ax.get_legend() is not None
+    # 窗口不足的期（None）画为缺口
+    assert np.isnan(ax.lines[0].get_ydata()).any()
+
+    spec = chart_specs.blue_trend(chart_data)
+    assert spec['x_type'] == 'ordinal'
+    _, ax = draw(spec)
+    assert len(ax.lines[0].get_xdata()) == len(spec['x'])
+    # 期号较多时只显示部分标签
+    assert 0 < len(ax.get_xticklabels()) <= 11
+    assert ax.get_legend() is None
+
+
+def test_spec_png_reuses_figure(chart_data):
+    spec = chart_specs.red_zones(chart_data)
+    png = charts.spec_png(spec)
+    assert png.startswith(PNG_SIGNATURE)
+    figure = charts._figures[tuple(spec['figsize'])]
+    # 复用的图表在渲染后清空，同样的规格得到同样的结果
+    charts.spec_png(chart_specs.slot_quantiles(chart_data, 0, 10))
+    assert charts.spec_png(spec) == png
+    assert charts._figures[tuple(spec['figsize'])] is figure
+    assert not figure.axes
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        charts.spec_png({'kind': 'radar', 'title': 't', 'figsize': (8, 6)})
+    # 绘制失败后图表同样被清空
+    assert not any(fig.axes for fig in charts._figures.values())
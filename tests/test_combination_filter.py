@@ -0,0 +1,131 @@
+"""组合缩水：向量化筛选与逐注直接判断的结果一致"""
+
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from ssq import combination_filter
+from ssq.games import Area
+
+# 小号码区（1-12开出5个，共792注），可以逐注穷举对比
+SMALL = Area('small', '号码', 1, 12, 5, zones=((1, 4), (5, 8), (9, 12)))
+
+
+@pytest.fixture(scope='module')
+def small_table():
+    return combination_filter.CombinationTable(SMALL)
+
+
+@pytest.fixture(scope='module')
+def red_table():
+    return combination_filter.get_table()
+
+
+def naive(sum_range=None, span_range=None, odd_counts=None, small_counts=None, zone_ranges=None,
+          consecutive_range=None, exclude=(), require=(), cold=(), cold_range=None):
+    kept = []
+    for combo in itertools.combinations(range(SMALL.low, SMALL.high + 1), SMALL.picks):
+        zones = [sum(lo <= n <= hi for n in combo) for lo, hi in SMALL.zones]
+        checks = [
+            sum_range is None or sum_range[0] <= sum(combo) <= sum_range[1],
+            span_range is None or span_range[0] <= combo[-1] - combo[0] <= span_range[1],
+            odd_counts is None or sum(n % 2 for n in combo) in odd_counts,
+            small_counts is None or sum(n <= SMALL.small_max for n in combo) in small_counts,
+            all(b is None or b[0] <= z <= b[1] for z, b in zip(zones, zone_ranges or ())),
+            consecutive_range is None or
+            consecutive_range[0] <= sum(b - a == 1 for a, b in zip(combo, combo[1:])) <= consecutive_range[1],
+            not set(exclude) & set(combo),
+            set(require) <= set(combo),
+            cold_range is None or cold_range[0] <= len(set(cold) & set(combo)) <= cold_range[1],
+        ]
+        if all(checks):
+            kept.append(combo)
+    return np.array(kept, dtype=np.uint8).reshape(-1, SMALL.picks)
+
+
+@pytest.mark.parametrize('conditions', [
+    {},
+    {'sum_range': (25, 40)},
+    {'span_range': (6, 9), 'odd_counts': (2, 3)},
+    {'small_counts': (1, 2, 3), 'zone_ranges': [(1, 2), None, (0, 1)]},
+    {'consecutive_range': (0, 1), 'exclude': (3, 7)},
+    {'require': (2, 11), 'cold': (1, 5, 9), 'cold_range': (0, 1)},
+    {'sum_range': (20, 45), 'span_range': (5, 11), 'odd_counts': (1, 2, 3, 4), 'small_counts': (2, 3),
+     'zone_ranges': [(1, 3), (1, 3), (1, 3)], 'consecutive_range': (1, 2), 'exclude': (12,), 'require': (6,)},
+])
+def test_matches_naive(small_table, conditions):
+    result = combination_filter.filter_combinations(small_table, **conditions)
+    expected = naive(**conditions)
+    np.testing.assert_array_equal(result.combinations(), expected)
+    assert result.count == len(expected)
+    # 每一步剩余的注数不增加，最后一步为结果注数
+    remaining = [count for _, count in result.steps]
+    assert remaining[0] == math.comb(12, 5)
+    assert remaining == sorted(remaining, reverse=True)
+    assert remaining[-1] == result.count
+
+
+def test_red_table(red_table):
+    assert len(red_table) == combination_filter.TOTAL_COMBINATIONS
+    assert red_table.rows([0]).tolist() == [[1, 2, 3, 4, 5, 6]]
+    assert red_table.rows([-1]).tolist() == [[28, 29, 30, 31, 32, 33]]
+    assert combination_filter.filter_combinations(red_table, require=(7,)).count == math.comb(32, 5)
+    assert combination_filter.filter_combinations(red_table, exclude=(1, 2, 3)).count == math.comb(30, 6)
+    assert combination_filter.filter_combinations(red_table, sum_range=(21, 21)).count == 1
+
+
+def test_chunks_and_csv(small_table):
+    result = combination_filter.filter_combinations(small_table, require=(1,))
+    chunks = np.concatenate(list(result.iter_chunks(size=100)))
+    np.testing.assert_array_equal(chunks, result.combinations())
+    lines = result.to_csv().splitlines()
+    assert lines[0] == ','.join(SMALL.columns)
+    assert lines[1] == '01,02,03,04,05'
+    assert len(lines) == result.count + 1
+
+
+def test_from_arrays(small_table):
+    copy = combination_filter.CombinationTable.from_arrays(
+        {name: arr.copy() for name, arr in small_table.arrays().items()}, SMALL)
+    conditions = {'sum_range': (25, 40), 'zone_ranges': [(1, 2), None, None]}
+    np.testing.assert_array_equal(combination_filter.filter_combinations(copy, **conditions).mask,
+                                  combination_filter.filter_combinations(small_table, **conditions).mask)
+
+
+def test_rejects_positional_area():
+    with pytest.raises(ValueError):
+        combination_filter.CombinationTable(Area('digits', '号码', 0, 9, 3, distinct=False))
+
+
+def test_cold_numbers():
+    omissions = np.zeros(33, dtype=int)
+    omissions[[4, 20]] = [12, 30]
+    assert combination_filter.cold_numbers(omissions, 10) == [5, 21]
+
+
+def test_empty_cold_list(red_table):
+    # 没有冷号时，要求至少1个冷号的条件应排除全部组合，而不是被跳过
+    empty = combination_filter.filter_combinations(red_table, cold=[], cold_range=(1, 6))
+    assert empty.count == 0
+    assert empty.steps[-1] == ('冷号1-6个', 0)
+    assert combination_filter.filter_combinations(red_table, cold=[], cold_range=(0, 6)).count == len(red_table)
+
+
+def test_summary(small_table, monkeypatch):
+    """缓存用的摘要不引用特征表，保存了组合序号时可还原为FilterResult"""
+    result = combination_filter.filter_combinations(small_table, require=(1,), sum_range=(20, 30))
+    summary = combination_filter.FilterSummary.from_result(result, head=3)
+    assert summary.count == result.count and summary.ratio == result.ratio
+    assert summary.steps == result.steps
+    np.testing.assert_array_equal(summary.head, result.combinations(limit=3))
+    restored = summary.result(small_table)
+    np.testing.assert_array_equal(restored.mask, result.mask)
+    assert restored.to_csv() == result.to_csv()
+
+    monkeypatch.setattr(combination_filter, 'DOWNLOAD_LIMIT', result.count - 1)
+    large = combination_filter.FilterSummary.from_result(result, limit=result.count - 1)
+    assert large.index is None
+    with pytest.raises(ValueError):
+        large.result(small_table)
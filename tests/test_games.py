@@ -0,0 +1,164 @@
+"""玩法定义：奖级规则、号码编码、按玩法校验，以及其他玩法的数据集和位置统计"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ssq import positional
+from ssq.data import validate_history
+from ssq.dataset import Dataset
+from ssq.games import DLT, FC3D, SSQ, Area, Game, get_game
+
+
+def make_game_history(game, draws, seed=0):
+    """game的合成原始数据（最新一期在前，号码互不相同的区按升序）"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'期号': 2024000 + np.arange(draws, 0, -1)})
+    for area in game.areas:
+        if area.distinct:
+            balls = np.sort(np.argsort(rng.random((draws, area.size)), axis=1)[:, :area.picks], axis=1)
+        else:
+            balls = rng.integers(0, area.size, size=(draws, area.picks))
+        for column, values in zip(area.columns, area.decode(balls + 1).T):
+            df[column] = values
+    df['开奖日期'] = pd.Timestamp('2024-12-31') - pd.to_timedelta(np.arange(draws) * 2, unit='D')
+    df['奖池(元)'] = 5e8
+    return df[game.history_columns]
+
+
+def naive_counts(balls, area):
+    balls = np.asarray(balls).reshape(len(balls), -1)
+    counts = np.zeros((balls.shape[1], area.size), dtype=np.int64)
+    for row in balls:
+        for slot, number in enumerate(row):
+            counts[slot, number - area.low] += 1
+    return counts
+
+
+def judge(game, tickets, draw):
+    return [game.prizes[level][0] if level >= 0 else None
+            for level in game.prize_levels(game.hits(tickets, draw))]
+
+
+def test_ssq_prizes():
+    draw = {'red': [1, 2, 3, 4, 5, 6], 'blue': [7]}
+    tickets = {
+        'red': [[1, 2, 3, 4, 5, 6], [1, 2, 3, 4, 5, 6], [1, 2, 3, 4, 5, 33], [1, 2, 3, 4, 5, 33],
+                [1, 2, 3, 4, 32, 33], [1, 2, 3, 4, 32, 33], [1, 2, 3, 31, 32, 33], [1, 2, 3, 31, 32, 33],
+                [20, 21, 22, 23, 24, 25]],
+        'blue': [[7], [8], [7], [8], [7], [8], [7], [8], [7]],
+    }
+    assert judge(SSQ, tickets, draw) == ['一等奖', '二等奖', '三等奖', '四等奖', '四等奖', '五等奖', '五等奖',
+                                         None, '六等奖']
+    assert SSQ.hits(tickets, draw)[2].tolist() == [5, 1]
+
+
+def test_dlt_prizes():
+    draw = {'front': [1, 2, 3, 4, 5], 'back': [1, 2]}
+    cases = [
+        ([1, 2, 3, 4, 5], [1, 2], '一等奖'),
+        ([1, 2, 3, 4, 5], [1, 3], '二等奖'),
+        ([1, 2, 3, 4, 5], [3, 4], '三等奖'),
+        ([1, 2, 3, 4, 35], [1, 2], '四等奖'),
+        ([1, 2, 3, 4, 35], [2, 12], '五等奖'),
+        ([1, 2, 3, 34, 35], [1, 2], '六等奖'),
+        ([1, 2, 3, 4, 35], [3, 4], '七等奖'),
+        ([1, 2, 3, 34, 35], [1, 9], '八等奖'),
+        ([1, 2, 33, 34, 35], [1, 2], '八等奖'),
+        ([1, 2, 3, 34, 35], [9, 10], '九等奖'),
+        ([31, 32, 33, 34, 35], [1, 2], '九等奖'),
+        ([1, 2, 33, 34, 35], [9, 10], None),
+    ]
+    tickets = {'front': [front for front, _, _ in cases], 'back': [back for _, back, _ in cases]}
+    assert judge(DLT, tickets, draw) == [level for _, _, level in cases]
+
+
+def test_3d_direct_only():
+    draw = {'digits': [0, 5, 9]}
+    tickets = {'digits': [[0, 5, 9], [9, 5, 0], [0, 0, 0], [1, 2, 3]]}
+    # 按位置比对：号码相同但顺序不同不算直选
+    assert FC3D.hits(tickets, draw)[:, 0].tolist() == [3, 1, 1, 0]
+    assert judge(FC3D, tickets, draw) == ['直选', None, None, None]
+    assert FC3D.prize([3]) == '直选'
+    assert FC3D.prize([2]) is None
+
+
+def test_area_encoding():
+    digits = FC3D.area('digits')
+    assert digits.size == 10
+    assert digits.encode([0, 9]).tolist() == [1, 10]
+    assert digits.decode(digits.encode([0, 4, 9])).tolist() == [0, 4, 9]
+    assert digits.numbers.tolist() == list(range(10))
+    red = SSQ.area('red')
+    assert red.encode([1, 33]).tolist() == [1, 33]
+    assert red.columns == [f'红球{i}' for i in range(1, 7)]
+    assert get_game('dlt') is DLT
+    with pytest.raises(KeyError):
+        get_game('kl8')
+
+
+def test_validate_other_games():
+    raw = make_game_history(DLT, 40, seed=1).astype({'前区1': object, '后区2': object})
+    raw.loc[3, '前区1'] = 36
+    raw.loc[7, '后区2'] = raw.loc[7, '后区1']
+    report = validate_history(raw, game=DLT)
+    assert report.counts['front_out_of_range'] == 1
+    assert report.counts['back_duplicate'] == 1
+    assert report.quarantine.index.tolist() == [3, 7]
+    assert list(report.valid.columns) == DLT.history_columns
+
+    raw = make_game_history(FC3D, 40, seed=2)
+    raw.loc[[0, 1], ['百位', '十位', '个位']] = [[3, 3, 3], [9, 0, 1]]
+    raw.loc[5, '十位'] = 10
+    report = validate_history(raw, game=FC3D)
+    # 3D的各位置可以重复，也不要求升序
+    assert report.counts['digits_out_of_range'] == 1
+    assert report.quarantine.index.tolist() == [5]
+    assert 'digits_duplicate' not in report.counts
+
+
+def test_fingerprint_includes_game():
+    df = make_game_history(SSQ, 30, seed=3)
+    twin = Game('twin', '双色球（副本）', SSQ.areas, SSQ.prizes)
+    assert Dataset(df).version == Dataset(df.copy()).version
+    assert Dataset(df, game=twin).version != Dataset(df).version
+
+
+@pytest.mark.parametrize('column, value', [('奖池(元)', 6.1e8), ('开奖日期', pd.Timestamp('2025-01-02'))])
+def test_fingerprint_includes_dates_and_pools(column, value):
+    """只修正奖池或开奖日期（号码不变）也产生新版本"""
+    df = make_game_history(SSQ, 30, seed=3)
+    changed = df.copy()
+    changed.loc[5, column] = value
+    assert Dataset(changed).version != Dataset(df).version
+
+
+@pytest.mark.parametrize('game, area', [(DLT, 'front'), (DLT, 'back'), (FC3D, 'digits')])
+def test_other_game_slot_window(game, area):
+    """非双色球的数据集：位置统计的位置名称、号码轴和号码值都来自该号码区"""
+    dataset = Dataset(validate_history(make_game_history(game, 120, seed=4), game=game).valid, game=game)
+    spec = game.area(area)
+    balls = dataset.balls[area]
+    window = positional.SlotWindow(dataset.index(area), 10, 110)
+    rows = balls[10:110].reshape(100, -1).astype(int)
+
+    frequency = window.frequency()
+    assert frequency.index.tolist() == spec.columns
+    assert frequency.columns.tolist() == spec.numbers.tolist()
+    np.testing.assert_array_equal(frequency.to_numpy(), naive_counts(rows, spec))
+    np.testing.assert_array_equal(window.number_counts(), naive_counts(rows, spec).sum(axis=0))
+    assert window.omissions().shape == (spec.picks, spec.size)
+
+    summary = window.summary()
+    assert summary['位置'].tolist() == spec.columns
+    np.testing.assert_allclose(summary['平均值'], rows.mean(axis=0).round(2))
+    np.testing.assert_array_equal(summary['最常见号码'], naive_counts(rows, spec).argmax(axis=1) + spec.low)
+    assert summary['50%分位'].between(spec.low, spec.high).all()
+    np.testing.assert_allclose(window.mean_trend(5)[:, 0], rows[:5].mean(axis=0))
+    assert set(window.missing(3)) == set(spec.numbers.tolist()) - set(rows[:3].ravel().tolist())
+
+
+def test_index_rejects_other_area():
+    index = Dataset(make_game_history(SSQ, 20)).index('red')
+    with pytest.raises(ValueError):
+        positional.PositionIndex.from_arrays(index.prefix, index.values, Area('other', '号码', 1, 35, 6))
@@ -0,0 +1,198 @@
+"""后台任务：按key去重、按发起者取消、中间结果、失败后可重新提交"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from ssq import config, jobs
+
+
+@pytest.fixture
+def manager():
+    return jobs.JobManager()
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('等待超时')
+        time.sleep(0.005)
+
+
+def gated_tasks(n, gate, open_chunks):
+    """n个分块，第open_chunks个及之后的分块等gate打开后才返回"""
+    def chunk(i):
+        if i >= open_chunks:
+            gate.wait(10)
+        return i
+    return [(chunk, (i,)) for i in range(n)]
+
+
+def test_inline_job_completes(manager):
+    assert not jobs.use_pool(3)
+    done = []
+    job = manager.submit('squares', '平方', [(pow, (i, 2)) for i in range(3)], sum, owner='a', on_done=done.append)
+    assert job.wait(10)
+    assert job.status == jobs.DONE
+    assert job.result == 5 and job.partial() == 5
+    assert job.progress == 1.0
+    assert done == [5]
+
+
+def test_empty_job(manager):
+    job = manager.submit('empty', '空任务', [], list)
+    assert job.status == jobs.DONE and job.result == []
+
+
+def test_dedupe_across_owners(manager):
+    gate = threading.Event()
+    try:
+        job = manager.submit('shared', '共享', gated_tasks(3, gate, 0), list, owner='a')
+        again = manager.submit('shared', '共享', gated_tasks(3, gate, 0), list, owner='b')
+        assert again is job
+        assert job.owners == {'a', 'b'}
+        assert manager.active() == [job]
+    finally:
+        gate.set()
+    assert job.wait(10)
+    assert job.result == [0, 1, 2]
+    # 已完成的任务直接复用，不重新计算
+    assert manager.submit('shared', '共享', [], list, owner='c') is job
+
+
+def test_cancel_keeps_job_for_other_owner(manager):
+    gate = threading.Event()
+    try:
+        job = manager.submit('shared', '共享', gated_tasks(3, gate, 0), list, owner='a')
+        manager.submit('shared', '共享', gated_tasks(3, gate, 0), list, owner='b')
+        assert manager.cancel(job, owner='a') is False
+        assert job.status == jobs.RUNNING
+        assert job.owners == {'b'}
+        assert manager.cancel(job, owner='b') is True
+        assert job.status == jobs.CANCELLED
+        assert job.wait(0)
+    finally:
+        gate.set()
+    # 取消后剩余的分块不再记录
+    time.sleep(0.05)
+    assert job.status == jobs.CANCELLED and job.result is None
+    # 取消的任务重新提交时重新计算
+    rerun = manager.submit('shared', '共享', gated_tasks(3, gate, 0), list, owner='a')
+    assert rerun is not job
+    assert rerun.wait(10) and rerun.result == [0, 1, 2]
+
+
+def test_partial_while_running(manager):
+    gate = threading.Event()
+    try:
+        job = manager.submit('partial', '中间结果', gated_tasks(4, gate, 2), list, owner='a')
+        wait_until(lambda: job.done == 2)
+        assert job.status == jobs.RUNNING
+        assert job.progress == 0.5
+        assert job.partial() == [0, 1]
+        assert job.result is None
+    finally:
+        gate.set()
+    assert job.wait(10)
+    assert job.partial() == job.result == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize('tasks, finish', [
+    ([(pow, (2, 2)), (int, ('x',))], list),
+    ([(pow, (2, 2))], lambda results: 1 / 0),
+])
+def test_failure_allows_resubmit(manager, tasks, finish):
+    job = manager.submit('flaky', '会失败', tasks, finish, owner='a')
+    assert job.wait(10)
+    assert job.status == jobs.FAILED
+    assert job.error
+    assert job.result is None
+    assert manager.active() == []
+    retry = manager.submit('flaky', '会失败', [(pow, (2, 2))], list, owner='a')
+    assert retry is not job
+    assert retry.wait(10) and retry.status == jobs.DONE and retry.result == [4]
+    assert manager.get('flaky') is retry
+
+
+def test_finished_jobs_are_pruned():
+    manager = jobs.JobManager(max_finished=2)
+    for i in range(4):
+        assert manager.submit(i, f'任务{i}', [], list).finished
+    # 提交时清理：保留最近max_finished个已结束的任务和新提交的任务
+    manager.submit('last', '最后', [], list)
+    assert [job.key for job in manager.jobs()] == [2, 3, 'last']
+
+
+@pytest.fixture
+def pooled(monkeypatch):
+    monkeypatch.setattr(config, 'JOB_WORKERS', 2)
+    monkeypatch.setattr(config, 'JOB_INLINE_CHUNKS', 0)
+    yield
+    jobs.reset_pool(wait=True)
+
+
+def test_pool_job(pooled, manager):
+    assert jobs.use_pool(3)
+    tasks = [(pow, (i, 2)) for i in range(6)]
+    job = manager.submit('pool', '进程池', tasks, list, owner='a')
+    again = manager.submit('pool', '进程池', tasks, list, owner='b')
+    assert again is job
+    assert job.wait(60)
+    assert job.status == jobs.DONE
+    assert job.result == [i * i for i in range(6)]
+    assert job.owners == {'a', 'b'}
+
+
+def test_pool_failure_allows_resubmit(pooled, manager):
+    job = manager.submit('pool', '进程池', [(pow, (2, 2)), (int, ('x',))], list, owner='a')
+    assert job.wait(60)
+    assert job.status == jobs.FAILED
+    assert 'x' in job.error
+    retry = manager.submit('pool', '进程池', [(pow, (3, 2))], list, owner='a')
+    assert retry.wait(60) and retry.result == [9]
+
+
+class BrokenPool:
+    """第一个分块提交成功并已开始运行（无法取消，结果由测试给出），之后提交失败"""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        if self.futures:
+            raise RuntimeError('进程池已关闭')
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.futures.append(future)
+        return future
+
+
+def test_fallback_drops_stale_chunks(pooled, manager, monkeypatch):
+    """进程池提交中途失败后改为在后台线程中执行，之前已提交的分块完成时不再计入"""
+    pool = BrokenPool()
+    monkeypatch.setattr(jobs, 'get_pool', lambda: pool)
+    gate = threading.Event()
+    try:
+        job = manager.submit('fallback', '回退', gated_tasks(3, gate, 1), list, owner='a')
+        assert not job.pooled and job.attempt == 1
+        wait_until(lambda: job.done == 1)
+        # 已在运行的分块取消不了，它完成时的结果必须丢弃
+        stale = pool.futures[0]
+        assert not stale.cancelled()
+        stale.set_result('stale')
+        assert job.done == 1 and job.partial() == [0]
+    finally:
+        gate.set()
+    assert job.wait(10)
+    assert job.status == jobs.DONE and job.result == [0, 1, 2]
+
+
+def test_shutdown_stops_inline_threads(manager):
+    job = manager.submit('slow', '慢任务', [(time.sleep, (0.02,)) for _ in range(500)], list, owner='a')
+    wait_until(lambda: job.done > 0)
+    assert manager.shutdown(timeout=5)
+    assert job.status == jobs.CANCELLED
+    assert manager.active() == []
@@ -0,0 +1,113 @@
+"""内存上限：缓存按字节数淘汰，会话记录按上限判断并清理空闲会话"""
+
+import numpy as np
+import pytest
+
+from ssq import memory
+from ssq.cache import VersionedCache
+
+
+def block(nbytes):
+    return np.zeros(nbytes, dtype=np.uint8)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_sizeof():
+    assert memory.sizeof(block(100)) == 100
+    shared = block(100)
+    # 同一对象只计一次
+    assert memory.sizeof([shared, block(100)]) - memory.sizeof([shared, shared]) == 100
+
+
+def test_byte_cap_evicts_least_recently_used():
+    cache = VersionedCache('test', max_bytes=300)
+    for key in 'abc':
+        cache.put('v1', key, block(100))
+    assert cache.nbytes == 300 and cache.evictions == 0
+    assert cache.get('v1', 'a') is not None
+    cache.put('v1', 'd', block(100))
+    # b最久未使用，被淘汰；a刚被读取过，保留
+    assert [key for key, _ in cache.entries('v1')] == ['c', 'a', 'd']
+    assert cache.nbytes == 300 and cache.evictions == 1
+    cache.put('v1', 'e', block(250))
+    assert [key for key, _ in cache.entries('v1')] == ['e']
+    assert cache.nbytes == 250 and cache.evictions == 4
+
+
+def test_replacing_entry_updates_size():
+    cache = VersionedCache('test', max_bytes=300)
+    cache.put('v1', 'a', block(100))
+    cache.put('v1', 'a', block(200))
+    assert cache.nbytes == 200 and len(cache) == 1
+
+
+def test_oversized_entry_is_rejected():
+    cache = VersionedCache('test', max_bytes=300)
+    cache.put('v1', 'a', block(100))
+    cache.put('v1', 'b', block(100))
+    big = block(301)
+    assert cache.put('v1', 'big', big) is big
+    assert cache.get('v1', 'big') is None
+    # 其他条目不受影响
+    assert [key for key, _ in cache.entries('v1')] == ['a', 'b']
+    assert cache.nbytes == 200 and cache.evictions == 0 and cache.rejected == 1
+    # 同一个key的旧值被新值取代，新值过大时旧值也不再保留
+    cache.put('v1', 'a', big)
+    assert cache.get('v1', 'a') is None and cache.nbytes == 100
+    assert cache.stats()['rejected'] == 2
+    calls = []
+    assert cache.get_or_compute('v1', 'big', lambda: calls.append(1) or big) is big
+    assert cache.get_or_compute('v1', 'big', lambda: calls.append(1) or big) is big
+    assert len(calls) == 2
+
+
+def test_entry_cap_and_unlimited_bytes():
+    cache = VersionedCache('test', max_entries=2)
+    for key in 'abc':
+        cache.put('v1', key, block(10_000))
+    assert [key for key, _ in cache.entries('v1')] == ['b', 'c']
+    assert cache.stats()['limit_kb'] is None
+
+
+def test_session_cap():
+    ledger = memory.SessionLedger(cap_bytes=1000, idle_seconds=60, clock=FakeClock())
+    ledger.record('a', {'exports': 600, 'charts': 300})
+    assert ledger.total('a') == 900
+    assert not ledger.over_cap('a')
+    ledger.record('a', {'exports': 800, 'charts': 300})
+    assert ledger.over_cap('a')
+    # 每次记录替换该会话之前的记录
+    ledger.record('a', {'charts': 300})
+    assert ledger.total('a') == 300 and not ledger.over_cap('a')
+    assert not ledger.over_cap('unknown')
+
+
+def test_zero_cap_disables_check():
+    ledger = memory.SessionLedger(cap_bytes=0, idle_seconds=60, clock=FakeClock())
+    ledger.record('a', {'exports': 10 ** 9})
+    assert not ledger.over_cap('a')
+
+
+def test_idle_sessions_are_pruned():
+    clock = FakeClock()
+    ledger = memory.SessionLedger(cap_bytes=1000, idle_seconds=60, clock=clock)
+    ledger.record('a', {'exports': 100})
+    clock.now += 30
+    ledger.record('b', {'exports': 500})
+    clock.now += 31
+    # a已空闲61秒，在下一次记录时移除；b空闲31秒，保留
+    ledger.record('c', {'exports': 200})
+    assert len(ledger) == 2 and ledger.total('a') == 0
+    rows = ledger.summary()
+    assert [row['session'] for row in rows] == ['b', 'c']
+    assert rows[0]['idle_s'] == pytest.approx(31)
+    assert rows[0]['exports_kb'] == round(500 / 1024, 1)
+    ledger.forget('b')
+    assert len(ledger) == 1
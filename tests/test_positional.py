@@ -0,0 +1,82 @@
+"""位置统计：前缀和表上任意数据范围的结果与逐期直接统计一致"""
+
+import numpy as np
+import pytest
+
+from ssq import analytics, positional
+from ssq.data import RED_COLUMNS, BLUE_COLUMN
+
+RANGES = [(0, 300), (0, 1), (0, 50), (37, 38), (120, 300), (299, 300), (10, 10)]
+
+
+@pytest.fixture
+def reds(history):
+    return history[RED_COLUMNS].to_numpy()
+
+
+@pytest.fixture
+def index(reds):
+    return positional.PositionIndex(reds)
+
+
+def naive_counts(reds, size=33):
+    counts = np.zeros((reds.shape[1], size), dtype=np.int64)
+    for row in reds:
+        for slot, number in enumerate(row):
+            counts[slot, number - 1] += 1
+    return counts
+
+
+def naive_last_seen(reds, size=33):
+    seen = np.full((reds.shape[1], size), len(reds))
+    for i in range(len(reds) - 1, -1, -1):
+        for slot, number in enumerate(reds[i]):
+            seen[slot, number - 1] = i
+    return seen
+
+
+@pytest.mark.parametrize('start, stop', RANGES)
+def test_window_matches_naive(reds, index, start, stop):
+    window = positional.SlotWindow(index, start, stop)
+    rows = reds[start:stop]
+    counts = naive_counts(rows)
+    np.testing.assert_array_equal(window.frequency().to_numpy(), counts)
+    np.testing.assert_array_equal(window.number_counts(), counts.sum(axis=0))
+    seen = naive_last_seen(rows)
+    np.testing.assert_array_equal(window.omissions().to_numpy(), seen)
+    np.testing.assert_array_equal(window.number_omissions(), seen.min(axis=0))
+
+
+@pytest.mark.parametrize('start, stop', [(0, 300), (40, 140)])
+def test_summary_and_trends(reds, index, start, stop):
+    window = positional.SlotWindow(index, start, stop)
+    rows = reds[start:stop]
+    summary = window.summary()
+    np.testing.assert_allclose(summary['平均值'], rows.mean(axis=0).round(2))
+    np.testing.assert_array_equal(summary['最常见号码'], naive_counts(rows).argmax(axis=1) + 1)
+    # 中位数：经验分布的下侧分位
+    np.testing.assert_array_equal(summary['50%分位'], np.sort(rows, axis=0)[(len(rows) - 1) // 2])
+
+    trend = window.mean_trend(10)
+    for i in (0, 5, len(rows) - 10):
+        np.testing.assert_allclose(trend[:, i], rows[i:i + 10].mean(axis=0))
+    assert np.isnan(trend[:, len(rows) - 9:]).all()
+
+
+def test_missing(reds, index):
+    window = positional.SlotWindow(index, 20, 300)
+    expected = sorted(set(range(1, 34)) - set(reds[20:30].ravel()))
+    assert window.missing(10) == expected
+
+
+def test_blue_index(history):
+    blues = history[BLUE_COLUMN].to_numpy()
+    window = positional.SlotWindow(positional.PositionIndex(blues, analytics.BLUE), 30, 200)
+    np.testing.assert_array_equal(window.number_counts(), np.bincount(blues[30:200], minlength=17)[1:])
+    np.testing.assert_array_equal(window.number_omissions(), naive_last_seen(blues[30:200, None], 16)[0])
+
+
+def test_from_arrays_round_trip(index):
+    copy = positional.PositionIndex.from_arrays(index.prefix.copy(), index.values.copy())
+    np.testing.assert_array_equal(copy.counts(5, 250), index.counts(5, 250))
+    np.testing.assert_array_equal(copy.last_seen(5, 250), index.last_seen(5, 250))
@@ -0,0 +1,110 @@
+"""性能调试：阶段记录、嵌套阶段的汇总、关闭时为空操作，统计内存的顶层阶段依次执行"""
+
+import json
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from ssq import profiling
+
+
+@pytest.fixture(autouse=True)
+def stop_tracing():
+    """profiler开启的tracemalloc在测试后关闭，不拖慢其他测试"""
+    tracing = tracemalloc.is_tracing()
+    yield
+    if not tracing:
+        tracemalloc.stop()
+
+
+def test_stage_records():
+    profiler = profiling.RerunProfiler(enabled=True)
+    with profiler.stage('load'):
+        data = np.ones(256 * 1024, dtype=np.uint8)
+    with profiler.stage('draw'):
+        time.sleep(0.01)
+    assert [record['stage'] for record in profiler.records] == ['load', 'draw']
+    load, draw = profiler.records
+    assert load['depth'] == draw['depth'] == 0
+    assert load['alloc_kb'] >= 250 and load['peak_kb'] >= load['alloc_kb']
+    assert draw['ms'] >= 10
+    assert profiler.total_ms >= draw['ms']
+    del data
+
+
+def test_nested_stages():
+    profiler = profiling.RerunProfiler(enabled=True)
+    with profiling.activate(profiler):
+        with profiler.stage('chart'):
+            for _ in range(3):
+                # 库代码通过模块级的stage记录到当前线程激活的profiler
+                with profiling.stage('font_setup'):
+                    pass
+    assert profiling.current() is profiling.NULL_PROFILER
+    # 内层阶段先结束，先记录
+    assert [(record['stage'], record['depth']) for record in profiler.records] == [
+        ('font_setup', 1), ('font_setup', 1), ('font_setup', 1), ('chart', 0)]
+    # 只有顶层阶段记录峰值
+    assert [record['peak_kb'] is None for record in profiler.records] == [True, True, True, False]
+    summary = {entry['stage']: entry for entry in profiler.summary()}
+    assert summary['font_setup']['calls'] == 3 and summary['chart']['calls'] == 1
+    inner = sum(record['ms'] for record in profiler.records if record['stage'] == 'font_setup')
+    assert summary['font_setup']['ms'] == pytest.approx(inner, abs=1e-3)
+    assert summary['chart']['ms'] >= summary['font_setup']['ms']
+
+
+def test_disabled_is_noop():
+    tracing = tracemalloc.is_tracing()
+    profiler = profiling.RerunProfiler(enabled=False)
+    assert profiler.stage('load') is profiling._NULL_STAGE
+    with profiler.stage('load'):
+        pass
+    # 未激活时模块级stage记录到关闭的NULL_PROFILER
+    with profiling.stage('font_setup'):
+        pass
+    assert profiler.records == [] and profiling.NULL_PROFILER.records == []
+    assert tracemalloc.is_tracing() == tracing
+
+
+def test_time_only():
+    profiler = profiling.RerunProfiler(enabled=True, track_memory=False)
+    with profiler.stage('load'):
+        pass
+    assert 'alloc_kb' not in profiler.records[0] and 'peak_kb' not in profiler.records[0]
+
+
+def test_memory_stages_are_serialized():
+    """两个会话同时统计内存时，顶层阶段不重叠（不互相重置峰值）"""
+    spans = []
+    started = threading.Barrier(2)
+
+    def session(name):
+        profiler = profiling.RerunProfiler(enabled=True)
+        started.wait(5)
+        with profiler.stage(name):
+            begin = time.perf_counter()
+            time.sleep(0.05)
+            spans.append((begin, time.perf_counter()))
+
+    threads = [threading.Thread(target=session, args=(name,)) for name in 'ab']
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    (first_start, first_end), (second_start, _) = sorted(spans)
+    assert second_start >= first_end
+
+
+def test_write_jsonl(tmp_path):
+    profiler = profiling.RerunProfiler(enabled=True, track_memory=False)
+    with profiler.stage('load'):
+        pass
+    path = tmp_path / 'profile.jsonl'
+    profiler.write_jsonl(path, page='overview')
+    profiler.write_jsonl(path, page='trend')
+    lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [line['page'] for line in lines] == ['overview', 'trend']
+    assert lines[0]['stages'][0]['stage'] == 'load'
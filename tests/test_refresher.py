@@ -0,0 +1,138 @@
+"""后台刷新：开奖日的刷新时刻，刷新后替换数据集并预热，失败时保留原数据集"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ssq import config, views
+from ssq.cache import analytics_cache, chart_cache
+from ssq.dataset import Dataset, DatasetHolder
+from ssq.refresher import BEIJING_TZ, DrawRefresher, next_refresh_time
+
+
+def beijing(*args):
+    return datetime(*args, tzinfo=BEIJING_TZ)
+
+
+# 2024-01-01为周一；开奖日为周二、周四、周日
+@pytest.mark.parametrize('now, refresh_at, expected', [
+    (beijing(2024, 1, 1, 10, 0), '21:45', beijing(2024, 1, 2, 21, 45)),
+    (beijing(2024, 1, 2, 20, 0), '21:45', beijing(2024, 1, 2, 21, 45)),
+    (beijing(2024, 1, 2, 21, 45), '21:45', beijing(2024, 1, 4, 21, 45)),
+    (beijing(2024, 1, 2, 22, 0), '21:45', beijing(2024, 1, 4, 21, 45)),
+    (beijing(2024, 1, 6, 23, 59), '21:45', beijing(2024, 1, 7, 21, 45)),
+    # 周日刷新之后跨到下一周的周二
+    (beijing(2024, 1, 7, 22, 0), '21:45', beijing(2024, 1, 9, 21, 45)),
+    (beijing(2024, 12, 29, 22, 0), '21:45', beijing(2024, 12, 31, 21, 45)),
+    (beijing(2024, 1, 2, 0, 10), '00:30', beijing(2024, 1, 2, 0, 30)),
+    # 其他时区的时间按北京时间计算
+    (datetime(2024, 1, 2, 13, 0, tzinfo=timezone.utc), '21:45', beijing(2024, 1, 2, 21, 45)),
+    (datetime(2024, 1, 2, 14, 0, tzinfo=timezone.utc), '21:45', beijing(2024, 1, 4, 21, 45)),
+    (datetime(2024, 1, 2, 21, 0, tzinfo=timezone(timedelta(hours=-5))), '21:45', beijing(2024, 1, 4, 21, 45)),
+])
+def test_next_refresh_time(now, refresh_at, expected):
+    result = next_refresh_time(now, refresh_at)
+    assert result == expected
+    assert result.weekday() in (1, 3, 6)
+
+
+class StubStore:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.saved = []
+
+    def upsert(self, df):
+        if self.fail:
+            raise OSError('disk full')
+        self.saved.append(df)
+        return len(df)
+
+
+@pytest.fixture
+def holder(history):
+    # 当前数据缺少最新一期
+    return DatasetHolder(Dataset(history.iloc[1:].reset_index(drop=True)))
+
+
+def make_refresher(holder, rows, store=None, warmers=()):
+    def parse(html):
+        if isinstance(rows, Exception):
+            raise rows
+        return rows
+
+    return DrawRefresher(holder, warmers=warmers, fetch=lambda: '<html></html>', parse=parse, store=store)
+
+
+def test_refresh_swaps_and_warms(history, holder):
+    old = holder.current()
+    warmed = []
+    store = StubStore()
+    refresher = make_refresher(holder, history.head(5), store, warmers=[warmed.append])
+    assert refresher.refresh_once() is True
+    dataset = holder.current()
+    assert dataset is not old
+    assert dataset.latest_issue == history['期号'].iloc[0]
+    assert len(dataset) == len(history)
+    assert dataset.version == Dataset(history).version
+    assert warmed == [dataset]
+    assert len(store.saved) == 1
+    status = refresher.status()
+    assert status['last_result'] == 'updated' and status['last_error'] is None
+
+    # 再次取得同样的数据：版本不变，不替换也不预热
+    assert refresher.refresh_once() is False
+    assert holder.current() is dataset
+    assert warmed == [dataset]
+    assert refresher.last_result == 'unchanged'
+
+
+def test_failure_keeps_old_dataset(holder):
+    old = holder.current()
+    warmed = []
+    refresher = make_refresher(holder, ValueError('页面结构变化'), StubStore(), warmers=[warmed.append])
+    assert refresher.refresh_once() is False
+    assert holder.current() is old
+    assert warmed == []
+    assert refresher.last_result == 'failed'
+    assert '页面结构变化' in refresher.last_error
+
+
+def test_store_and_warmer_failures_do_not_block(history, holder):
+    def broken(dataset):
+        raise RuntimeError('预热失败')
+
+    warmed = []
+    refresher = make_refresher(holder, history.head(3), StubStore(fail=True), warmers=[broken, warmed.append])
+    assert refresher.refresh_once() is True
+    assert holder.current().latest_issue == history['期号'].iloc[0]
+    assert warmed == [holder.current()]
+    assert refresher.last_result == 'updated'
+
+
+def test_listeners_see_swap(history, holder):
+    seen = []
+    holder.subscribe(seen.append)
+    make_refresher(holder, history.head(2)).refresh_once()
+    assert seen == [holder.current()]
+
+
+def test_warm_keeps_other_games(history, holder, monkeypatch):
+    """预热只清理同一玩法的旧版本，其他玩法的缓存条目保留"""
+    # 只预热一个数据范围，图表用Vega-Lite（不在服务端绘图）
+    monkeypatch.setattr(views, 'PRESET_PERIODS', {'最近50期': 50})
+    monkeypatch.setattr(config, 'CHART_BACKEND', 'vega-lite')
+    old = holder.current()
+    other = ('dlt', 'v-other')
+    analytics_cache.put(old.cache_version, ('probe',), 1)
+    analytics_cache.put(other, ('probe',), 2)
+    chart_cache.put(other, ('probe',), 3)
+    try:
+        dataset = Dataset(history)
+        views.warm_default_views(dataset)
+        assert analytics_cache.get(old.cache_version, ('probe',)) is None
+        assert analytics_cache.get(other, ('probe',)) == 2
+        assert chart_cache.get(other, ('probe',)) == 3
+        assert analytics_cache.entries(dataset.cache_version)
+    finally:
+        analytics_cache.clear()
+        chart_cache.clear()
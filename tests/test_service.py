@@ -0,0 +1,109 @@
+"""HTTP接口：参数校验、缓存key、空数据、ETag与304"""
+
+import json
+
+import pytest
+from tornado.testing import AsyncHTTPTestCase
+
+from ssq import service
+from ssq.dataset import Dataset, DatasetHolder
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('"v1-abc"', True),
+    ('W/"v1-abc"', True),
+    ('"x", "v1-abc"', True),
+    ('*', True),
+    ('"v1-abcd"', False),
+    ('xx"v1-abc"xx', False),
+    ('', False),
+])
+def test_etag_matches(header, expected):
+    assert service._etag_matches(header, '"v1-abc"') is expected
+
+
+@pytest.fixture(autouse=True)
+def _clear_responses():
+    service.response_cache.clear()
+
+
+class ApiTest(AsyncHTTPTestCase):
+    def get_app(self):
+        from benchmarks.synthetic import make_history
+        from ssq.data import normalize_history
+
+        self.dataset = Dataset(normalize_history(make_history(120, seed=3)))
+        return service.make_app(DatasetHolder(self.dataset))
+
+    def test_summary(self):
+        response = self.fetch('/api/summary?recent=50')
+        assert response.code == 200
+        body = json.loads(response.body)
+        assert body['draws'] == 50
+        assert sum(body['blue_mod4']) == 50
+
+    def test_negative_recent(self):
+        for name in ('summary', 'hot-cold', 'recommendations'):
+            assert self.fetch(f'/api/{name}?recent=-5&seed=1').code == 400
+        assert self.fetch('/api/summary?recent=abc').code == 400
+        assert len(service.response_cache) == 0
+
+    def test_not_modified(self):
+        etag = self.fetch('/api/version').headers['ETag']
+        assert self.fetch('/api/version', headers={'If-None-Match': etag}).code == 304
+        assert self.fetch('/api/version', headers={'If-None-Match': f'W/{etag}'}).code == 304
+        assert self.fetch('/api/version', headers={'If-None-Match': '*'}).code == 304
+        assert self.fetch('/api/version', headers={'If-None-Match': etag[:-2] + '"'}).code == 200
+
+    def test_unknown_endpoint(self):
+        assert self.fetch('/api/nope').code == 404
+
+    def test_unknown_parameter(self):
+        assert self.fetch('/api/summary?recent=50&foo=1').code == 400
+        assert self.fetch('/api/version?recent=5').code == 400
+        # 参数名拼错不会被静默忽略
+        assert self.fetch('/api/recommendations?sed=1').code == 400
+        assert len(service.response_cache) == 0
+
+    def test_bad_values(self):
+        for query in ('latest?count=x', 'hot-cold?top=1.5', 'hot-cold?recent=-1', 'summary?recent=',
+                      'recommendations?count=abc&seed=1', 'recommendations?hot_weight=-1&seed=1',
+                      'recommendations?cold_weight=nan&seed=1'):
+            assert self.fetch(f'/api/{query}').code == 400, query
+        assert len(service.response_cache) == 0
+
+    def test_cache_key_uses_normalized_params(self):
+        first = self.fetch('/api/hot-cold')
+        assert first.code == 200
+        # 显式给出默认值、超出范围被截断的参数与缺省时是同一个缓存条目
+        for query in ('recent=0', 'top=10', 'recent=0&top=10'):
+            response = self.fetch(f'/api/hot-cold?{query}')
+            assert response.headers['ETag'] == first.headers['ETag']
+        assert len(service.response_cache) == 1
+        assert self.fetch('/api/hot-cold?top=99').headers['ETag'] == self.fetch('/api/hot-cold?top=33').headers['ETag']
+        assert len(service.response_cache) == 2
+        # 未指定seed的推荐不缓存
+        assert self.fetch('/api/recommendations').code == 200
+        assert len(service.response_cache) == 2
+        body = json.loads(self.fetch('/api/recommendations?seed=7&count=3').body)
+        assert len(body['recommendations']) == 3 and body['seed'] == '7'
+
+
+class EmptyApiTest(AsyncHTTPTestCase):
+    """数据库中还没有开奖数据"""
+
+    def get_app(self):
+        from benchmarks.synthetic import make_history
+        from ssq.data import normalize_history
+
+        self.dataset = Dataset(normalize_history(make_history(10, seed=3)).iloc[:0])
+        return service.make_app(DatasetHolder(self.dataset))
+
+    def test_empty_dataset(self):
+        for name in ('latest', 'hot-cold', 'summary', 'recommendations?seed=1', 'recommendations'):
+            assert self.fetch(f'/api/{name}').code == 503, name
+        response = self.fetch('/api/version')
+        assert response.code == 200
+        assert json.loads(response.body) == {'version': self.dataset.version, 'latest_issue': None, 'draws': 0}
+        # 参数错误仍先返回400
+        assert self.fetch('/api/summary?recent=-1').code == 400
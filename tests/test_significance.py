@@ -0,0 +1,101 @@
+"""显著性检验：卡方分布、多重比较校正与参考值一致，模拟结果与进程数无关"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_history
+from ssq import chart_specs, config, jobs, significance, views
+from ssq.data import RED_COLUMNS, BLUE_COLUMN, normalize_history
+from ssq.dataset import Dataset
+
+
+@pytest.mark.parametrize('stat, df, expected', [
+    (3.841458820694124, 1, 0.05),
+    (18.307038053275146, 10, 0.05),
+    (2.0, 2, np.exp(-1)),
+    (0.0, 5, 1.0),
+    (6.0, 4, 4 * np.exp(-3)),
+    (40.0, 4, 21 * np.exp(-20)),
+])
+def test_chi2_sf(stat, df, expected):
+    assert significance.chi2_sf(stat, df) == pytest.approx(expected, rel=1e-9)
+
+
+# 与R的p.adjust(p, 'holm')、p.adjust(p, 'BH')一致
+@pytest.mark.parametrize('p, holm, bh', [
+    ([0.01, 0.04, 0.03, 0.005], [0.03, 0.06, 0.06, 0.02], [0.02, 0.04, 0.04, 0.02]),
+    ([0.01, 0.02, 0.03, 0.04, 0.05], [0.05, 0.08, 0.09, 0.09, 0.09], [0.05] * 5),
+    ([0.5, 0.9, 0.001], [1.0, 1.0, 0.003], [0.75, 0.9, 0.003]),
+])
+def test_multiple_comparisons(p, holm, bh):
+    np.testing.assert_allclose(significance.holm(p), holm)
+    np.testing.assert_allclose(significance.benjamini_hochberg(p), bh)
+
+
+def test_hypergeometric_pmf():
+    assert significance.ODD_PMF.sum() == pytest.approx(1.0)
+    # 33个号码中17个奇数，6个全为奇数的概率 C(17,6)/C(33,6)
+    assert significance.ODD_PMF[6] == pytest.approx(12376 / 1107568)
+
+
+def test_chunks_are_independent_of_workers():
+    """同样的种子和次数，在当前进程内与进程池中执行的结果完全相同"""
+    inline = significance.simulate(50, 1500, seed=3, workers=1)
+    try:
+        pooled = significance.simulate(50, 1500, seed=3, workers=2)
+    finally:
+        jobs.reset_pool(wait=True)
+    assert inline.keys() == pooled.keys()
+    for key in inline:
+        np.testing.assert_array_equal(inline[key], pooled[key])
+    assert inline['red'].shape == (1500, 33)
+    # 每份模拟的红球总数为期数×6
+    assert (inline['red'].sum(axis=1) == 300).all()
+
+
+def test_partial_chunks_are_a_prefix():
+    tasks = significance.simulation_tasks(40, 1200, seed=5)
+    assert [args[1] for _, args in tasks] == [500, 500, 200]
+    results = [fn(*args) for fn, args in tasks]
+    full = significance.merge_chunks(results)
+    partial = significance.merge_chunks(results[:2])
+    np.testing.assert_array_equal(partial['blue'], full['blue'][:1000])
+
+
+def test_report(history):
+    reds, blues = history[RED_COLUMNS].to_numpy(), history[BLUE_COLUMN].to_numpy()
+    report = significance.significance_report(reds, blues, resamples=1000, seed=0, workers=1)
+    again = significance.significance_report(reds, blues, resamples=1000, seed=0, workers=1)
+    assert report.distributions.equals(again.distributions)
+    assert report.resamples == 1000 and report.periods == len(history)
+    table = report.distributions
+    assert len(table) == 7
+    assert ((table['模拟p值'] > 0) & (table['模拟p值'] <= 1)).all()
+    assert (table['Holm校正p值'] >= table['模拟p值']).all()
+    assert report.red_numbers['出现次数'].sum() == len(history) * 6
+    assert (report.red_numbers['BH校正q值'] >= report.red_numbers['模拟p值']).all()
+
+
+@pytest.mark.parametrize('periods, pooled', [(3300, True), (120, False)])
+def test_pool_follows_work(monkeypatch, periods, pooled):
+    """完整历史（约3300期）的10000次模拟交给进程池，小数据范围在后台线程中执行"""
+    monkeypatch.setattr(config, 'JOB_WORKERS', 4)
+    monkeypatch.setattr(jobs, 'manager', jobs.JobManager())
+    # 用线程池代替进程池，只检查任务走哪条路径
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(jobs, 'get_pool', lambda: executor)
+    dataset = Dataset(normalize_history(make_history(periods, seed=1)))
+    data = chart_specs.ChartData(dataset.df, dataset)
+    assert jobs.use_pool(20, periods * 10000) is pooled
+    report, job = views.significance_report(dataset, data, ('全部数据',), 10000, owner='test')
+    try:
+        assert report is None
+        assert job.work == periods * 10000
+        assert job.pooled is pooled
+        assert job.summary()['pool'] is pooled
+    finally:
+        jobs.manager.cancel(job, owner='test')
+        executor.shutdown(wait=True, cancel_futures=True)
+        job.wait(30)
@@ -0,0 +1,130 @@
+"""SQLite存储：写入再读出的数据与原数据一致，upsert按期号覆盖，查询条件与校验和正确"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_history_csv
+from ssq import config, storage, validation
+from ssq.data import HISTORY_COLUMNS, validate_history
+from ssq.dataset import Dataset
+from ssq.games import DLT, FC3D
+from ssq.storage import HistoryStore, load_history
+from tests.test_games import make_game_history
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / 'history.db'))
+
+
+def test_round_trip(store, history):
+    assert store.upsert(history) == len(history)
+    assert len(store) == len(history)
+    assert store.latest_issue() == history['期号'].max()
+    pd.testing.assert_frame_equal(store.frame(), history)
+    # 重新打开同一个文件
+    pd.testing.assert_frame_equal(HistoryStore(store.path).frame(), history)
+
+
+def test_upsert_overwrites_by_issue(store, history):
+    store.upsert(history.iloc[10:])
+    checksum = store.checksum()
+    changed = history.iloc[:20].copy()
+    changed.loc[15, '蓝球'] = changed.loc[15, '蓝球'] % 16 + 1
+    assert store.upsert(changed) == 10
+    assert len(store) == len(history)
+    assert store.checksum() != checksum
+    expected = history.copy()
+    expected.loc[15, '蓝球'] = changed.loc[15, '蓝球']
+    pd.testing.assert_frame_equal(store.frame(), expected)
+
+
+def test_checksum_depends_on_content_only(tmp_path, history):
+    first, second = HistoryStore(str(tmp_path / 'a.db')), HistoryStore(str(tmp_path / 'b.db'))
+    first.upsert(history)
+    second.upsert(history.iloc[::-1])
+    assert first.checksum() == second.checksum()
+    assert HistoryStore(str(tmp_path / 'empty.db')).checksum() == '0:None:0'
+
+
+def test_queries(store, history):
+    store.upsert(history)
+    recent = store.arrays(limit=25)
+    np.testing.assert_array_equal(recent['issues'], history['期号'].to_numpy()[:25])
+    np.testing.assert_array_equal(recent['red'], history.iloc[:25, 1:7].to_numpy())
+
+    issues = history['期号'].to_numpy()
+    subset = store.frame(start_issue=issues[80], end_issue=issues[40])
+    pd.testing.assert_frame_equal(subset, history.iloc[40:81].reset_index(drop=True))
+
+    dates = history['开奖日期']
+    subset = store.frame(start_date=dates.iloc[60].date(), end_date=dates.iloc[30].date())
+    pd.testing.assert_frame_equal(subset, history.iloc[30:61].reset_index(drop=True))
+
+
+def test_empty(store):
+    assert len(store) == 0
+    assert store.upsert(pd.DataFrame()) == 0
+    df = store.frame()
+    assert df.empty
+    assert list(df.columns) == HISTORY_COLUMNS
+
+
+def test_load_history_validates(store, history):
+    store.upsert(history)
+    pd.testing.assert_frame_equal(load_history(store), history)
+    assert validation.latest_reports()['db'].ok
+    # 数据库中被直接改坏的行（绕过upsert前的校验）在读取时隔离
+    bad_issue = int(history.loc[7, '期号'])
+    with sqlite3.connect(store.path) as conn:
+        conn.execute('UPDATE draws SET red1 = 40 WHERE issue = ?', (bad_issue,))
+    assert len(store.frame()) == len(history)
+    loaded = load_history(store)
+    assert bad_issue not in loaded['期号'].tolist()
+    pd.testing.assert_frame_equal(loaded, history.drop(index=7).reset_index(drop=True))
+    report = validation.latest_reports()['db']
+    assert report.counts['red_out_of_range'] == 1
+    assert report.quarantine['期号'].tolist() == [bad_issue]
+
+
+def test_shared_store_seeds_lazily(store, history, tmp_path, monkeypatch):
+    """get_store(seed=False)不从CSV导入；之后的get_store()照常在数据库为空时导入一次"""
+    csv = str(tmp_path / 'history.csv')
+    make_history_csv(history, csv)
+    monkeypatch.setattr(config, 'DATA_PATH', csv)
+    monkeypatch.setattr(storage, '_store', store)
+    monkeypatch.setattr(storage, '_seeded', False)
+    assert storage.get_store(seed=False) is store
+    assert len(store) == 0
+    assert storage.get_store() is store
+    assert len(store) == len(history)
+    pd.testing.assert_frame_equal(storage.load_history(), history)
+
+
+@pytest.mark.parametrize('game', [DLT, FC3D])
+def test_other_games(tmp_path, history, game):
+    """其他玩法各用一张表，与双色球数据存放在同一个文件中"""
+    ssq_store = HistoryStore(str(tmp_path / 'history.db'))
+    ssq_store.upsert(history)
+    store = HistoryStore(ssq_store.path, game=game)
+    assert len(store) == 0
+    df = validate_history(make_game_history(game, 60, seed=5), game=game).valid
+    assert store.upsert(df) == 60
+    pd.testing.assert_frame_equal(store.frame(), df)
+    pd.testing.assert_frame_equal(load_history(store), df)
+    arrays = store.arrays(limit=5)
+    for area in game.areas:
+        np.testing.assert_array_equal(arrays[area.name], Dataset(df, game=game).balls[area.name][:5])
+    # 双色球的表不受影响
+    assert len(ssq_store) == len(history)
+    pd.testing.assert_frame_equal(ssq_store.frame(), history)
+    # 校验和包含最后一个号码区的最后一列
+    checksum = store.checksum()
+    field = storage.ball_fields(game.areas[-1])[-1]
+    with sqlite3.connect(store.path) as conn:
+        conn.execute(f'UPDATE {storage.table_name(game)} SET {field} = {field} + 1 WHERE issue = ?',
+                     (int(df['期号'].iloc[0]),))
+    assert store.checksum() != checksum
@@ -0,0 +1,82 @@
+"""转移统计：转移表、重号与邻号与逐对相邻两期的直接统计一致"""
+
+import numpy as np
+import pytest
+
+from ssq import transitions
+from ssq.data import RED_COLUMNS, BLUE_COLUMN
+
+
+@pytest.fixture
+def draws(history):
+    reds = history[RED_COLUMNS].to_numpy()
+    blues = history[BLUE_COLUMN].to_numpy()
+    return reds, blues, transitions.DrawTransitions(reds, blues)
+
+
+def state(feature, reds, blue):
+    """一期的特征状态标签（直接按定义计算）"""
+    if feature == 'odd_even':
+        odd = sum(n % 2 for n in reds)
+        return f'{odd}:{6 - odd}'
+    if feature == 'sum':
+        total = sum(reds)
+        return transitions.SUM_LABELS[sum(total >= edge for edge in transitions.SUM_EDGES)]
+    if feature == 'zones':
+        return ':'.join(str(sum(lo <= n <= hi for n in reds)) for lo, hi in ((1, 11), (12, 22), (23, 33)))
+    return '小号(1-8)' if blue <= 8 else '大号(9-16)'
+
+
+@pytest.mark.parametrize('feature', list(transitions.FEATURES))
+@pytest.mark.parametrize('window', [None, 50, 2, 1])
+def test_table_matches_pairs(draws, feature, window):
+    reds, blues, trans = draws
+    table = trans.table(feature, window)
+    expected = table * 0
+    pairs = trans.pairs(window)
+    # 数据从新到旧，第i+1期的下一期是第i期
+    for i in range(pairs):
+        expected.loc[state(feature, reds[i + 1], blues[i + 1]), state(feature, reds[i], blues[i])] += 1
+    assert table.equals(expected)
+    assert table.to_numpy().sum() == pairs
+    assert trans.current_state(feature) == state(feature, reds[0], blues[0])
+
+
+def test_number_rates(draws):
+    reds, blues, trans = draws
+    window = 80
+    rates = trans.number_rates(window)
+    previous = np.zeros(34, dtype=int)
+    repeats = np.zeros(34, dtype=int)
+    neighbor_hits = np.zeros(34, dtype=int)
+    for i in range(window - 1):
+        last, now = set(reds[i + 1]), set(reds[i])
+        for n in last:
+            previous[n] += 1
+            repeats[n] += n in now
+        for n in ({m - 1 for m in last} | {m + 1 for m in last}) - last - {0, 34}:
+            neighbor_hits[n] += n in now
+    np.testing.assert_array_equal(rates['上期出现'], previous[1:])
+    np.testing.assert_array_equal(rates['重号次数'], repeats[1:])
+    np.testing.assert_array_equal(rates['邻号次数'], neighbor_hits[1:])
+
+    repeat_counts = trans.repeat_counts(window)
+    per_draw = [len(set(reds[i]) & set(reds[i + 1])) for i in range(window - 1)]
+    assert repeat_counts.to_dict() == {k: per_draw.count(k) for k in set(per_draw)}
+
+
+def test_probabilities():
+    trans = transitions.DrawTransitions(np.array([[1, 2, 3, 4, 5, 6], [1, 3, 5, 7, 9, 11], [2, 4, 6, 8, 10, 12]]),
+                                        np.array([1, 9, 2]))
+    probs = transitions.probabilities(trans.table('blue_size'))
+    # 从旧到新为小号→大号→小号
+    assert probs.to_dict('index') == {'小号(1-8)': {'小号(1-8)': 0.0, '大号(9-16)': 100.0},
+                                      '大号(9-16)': {'小号(1-8)': 100.0, '大号(9-16)': 0.0}}
+    assert trans.next_distribution('blue_size').to_dict() == {'小号(1-8)': 0, '大号(9-16)': 1}
+
+
+def test_single_draw():
+    trans = transitions.DrawTransitions(np.array([[1, 2, 3, 4, 5, 6]]), np.array([1]))
+    assert trans.pairs() == 0
+    assert trans.table('sum').to_numpy().sum() == 0
+    assert trans.number_rates()['上期出现'].sum() == 0
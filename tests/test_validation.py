@@ -0,0 +1,82 @@
+"""数据校验：不合格的行被隔离并给出原因，其余行原样保留"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ssq import validation
+from ssq.data import RED_COLUMNS, BLUE_COLUMN, validate_history
+from ssq.games import DLT
+
+
+def _raw(history):
+    """按CSV读入时的样子：各列为字符串"""
+    return history.astype({col: str for col in history.columns if col != '开奖日期'}).assign(
+        开奖日期=history['开奖日期'].dt.strftime('%Y-%m-%d'))
+
+
+def test_clean_history_passes(history):
+    report = validate_history(_raw(history))
+    assert report.ok
+    assert not any(report.counts.values())
+    pd.testing.assert_frame_equal(report.valid, history)
+
+
+@pytest.mark.parametrize('column, value, check', [
+    ('期号', 'abc', 'issue_invalid'),
+    ('红球1', '0', 'red_out_of_range'),
+    ('红球2', '1.5', 'red_invalid'),
+    (BLUE_COLUMN, '17', 'blue_out_of_range'),
+    ('开奖日期', '2026-13-40', 'date_invalid'),
+    ('奖池(元)', 'n/a', 'pool_invalid'),
+    ('奖池(元)', '33', 'pool_implausible'),
+])
+def test_bad_cell_is_quarantined(history, column, value, check):
+    raw = _raw(history)
+    raw.loc[5, column] = value
+    report = validate_history(raw)
+    assert report.counts[check] == 1
+    assert sum(report.counts.values()) == 1
+    assert len(report.valid) == len(history) - 1
+    assert report.quarantine['问题'].tolist() == [validation.CHECK_LABELS[check]]
+    assert report.quarantine.index.tolist() == [5]
+
+
+def test_duplicate_and_unsorted_reds(history):
+    raw = _raw(history)
+    reds = history.loc[3, RED_COLUMNS].to_numpy()
+    raw.loc[3, RED_COLUMNS] = [str(n) for n in reds[::-1]]
+    raw.loc[4, '红球2'] = raw.loc[4, '红球1']
+    report = validate_history(raw)
+    assert report.counts['red_unsorted'] == 1
+    assert report.counts['red_duplicate'] == 1
+    assert report.quarantine.index.tolist() == [3, 4]
+
+
+def test_duplicate_issue_keeps_first(history):
+    raw = pd.concat([_raw(history).iloc[[0]], _raw(history)], ignore_index=True)
+    report = validate_history(raw)
+    assert report.counts['issue_duplicate'] == 1
+    assert report.quarantine.index.tolist() == [1]
+    assert len(report.valid) == len(history)
+
+
+def test_check_rows_matches_labels():
+    """check_rows返回的矩阵行与check_labels一一对应（按玩法生成）"""
+    for game in (validation.SSQ, DLT):
+        n = 4
+        balls = {area.name: np.full((area.picks, n), np.nan) for area in game.areas}
+        flags = validation.check_rows(np.arange(1, n + 1, dtype=float), balls,
+                                      np.full(n, np.datetime64('2024-01-01', 'ns')), np.full(n, 5e6), game)
+        labels = list(validation.check_labels(game))
+        assert flags.shape == (len(labels), n)
+        invalid = {f'{area.name}_invalid' for area in game.areas}
+        assert {labels[i] for i in np.flatnonzero(flags.any(axis=1))} == invalid
+
+
+def test_check_sequence_reports_gaps():
+    issues = np.array([2024001, 2024002, 2024005])
+    dates = np.array(['2024-01-02', '2024-01-04', '2024-01-30'], dtype='datetime64[ns]')
+    warnings = validation.check_sequence(issues, dates)
+    assert any('缺少2期' in w for w in warnings)
+    assert any('超过7天' in w for w in warnings)
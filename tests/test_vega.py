@@ -0,0 +1,148 @@
+"""Vega-Lite后端：每种图表规格转换为结构完整、数据内联的Vega-Lite字典"""
+
+import json
+
+import pytest
+
+from ssq import chart_specs, transitions, vega
+
+MARKS = {'bar', 'rect', 'text', 'arc', 'line'}
+
+# 带参数的图表（参数取页面默认值）
+PARAM_CHARTS = {
+    'trend.sum': lambda data: chart_specs.sum_trend(data, 5),
+    'trend.heat': lambda data: chart_specs.number_heat(data, 1),
+    'blue.rolling': lambda data: chart_specs.blue_rolling(data, 1, 20),
+    'red.slot_trend': lambda data: chart_specs.slot_trend(data, 10),
+    'red.slot_quantiles': lambda data: chart_specs.slot_quantiles(data, 0, 10),
+}
+TRANSITION_CHARTS = dict(
+    {f'transition.next.{feature}': lambda data, feature=feature: chart_specs.transition_next(data, feature, 100)
+     for feature in transitions.FEATURES},
+    **{name: lambda data, build=build: build(data, 100) for name, build in {
+        'transition.repeat_rates': chart_specs.repeat_rates,
+        'transition.repeat_counts': chart_specs.repeat_counts,
+        'transition.neighbor_rates': chart_specs.neighbor_rates,
+        'transition.neighbor_counts': chart_specs.neighbor_counts,
+    }.items()})
+ALL_CHARTS = dict(chart_specs.RANGE_CHARTS, **PARAM_CHARTS, **TRANSITION_CHARTS)
+
+
+@pytest.fixture
+def chart_data(history):
+    return chart_specs.ChartData(history)
+
+
+def _marks(chart):
+    if 'mark' in chart:
+        return [chart['mark']]
+    return [layer['mark'] for layer in chart['layer']]
+
+
+def _fields(chart):
+    """各层编码中引用的字段名"""
+    encodings = [chart.get('encoding', {})] + [layer.get('encoding', {}) for layer in chart.get('layer', [])]
+    fields = set()
+    for encoding in encodings:
+        for channel in encoding.values():
+            for item in channel if isinstance(channel, list) else [channel]:
+                if 'field' in item:
+                    fields.add(item['field'])
+    return fields
+
+
+def check_chart(spec, chart):
+    """通用检查：标题、高度、内联数据、已知的mark，编码引用的字段都在数据（或变换结果）中"""
+    assert chart['title'] == spec['title']
+    assert isinstance(chart['height'], int) and chart['height'] > 0
+    values = chart['data']['values']
+    assert isinstance(values, list)
+    marks = _marks(chart)
+    assert marks
+    assert {mark if isinstance(mark, str) else mark['type'] for mark in marks} <= MARKS
+    available = set().union(*(row.keys() for row in values)) if values else set()
+    available |= {step['as'] for step in chart.get('transform', []) if 'as' in step}
+    available |= {item['as'] for step in chart.get('transform', []) for item in step.get('joinaggregate', [])}
+    if values:
+        assert _fields(chart) <= available
+    # 可以直接JSON序列化交给浏览器
+    json.dumps(chart, ensure_ascii=False)
+
+
+@pytest.mark.parametrize('name', sorted(ALL_CHARTS))
+def test_every_chart_converts(chart_data, name):
+    spec = ALL_CHARTS[name](chart_data)
+    check_chart(spec, vega.to_vega_lite(spec))
+
+
+def test_bar(chart_data):
+    spec = chart_specs.red_frequency(chart_data)
+    chart = vega.to_vega_lite(spec)
+    assert len(chart['data']['values']) == len(spec['x'])
+    assert [mark['type'] for mark in _marks(chart)] == ['bar', 'text']
+    assert chart['encoding']['x']['field'] == 'x' and chart['encoding']['y']['type'] == 'quantitative'
+    assert chart['layer'][0]['mark']['color'] == 'red'
+    # 每根柱子一种颜色时按x映射
+    zones = vega.to_vega_lite(chart_specs.red_zones(chart_data))
+    assert zones['encoding']['color']['scale']['range'] == ['#FF9999', '#FF6666', '#CC0000']
+
+
+def test_heatmaps(chart_data):
+    spec = chart_specs.red_heatmap(chart_data)
+    chart = vega.to_vega_lite(spec)
+    assert len(chart['data']['values']) == 33
+    assert 'y' not in chart['encoding']
+    assert [mark if isinstance(mark, str) else mark['type'] for mark in _marks(chart)] == ['rect', 'text']
+    assert chart['layer'][0]['encoding']['color']['scale']['scheme'] == 'reds'
+
+    spec = chart_specs.slot_frequency(chart_data)
+    chart = vega.to_vega_lite(spec)
+    # 不可能出现的格子（None）不画
+    cells = sum(v is not None for row in spec['values'] for v in row)
+    assert len(chart['data']['values']) == cells < 6 * 33
+    assert chart['encoding']['y']['sort'] == spec['y']
+
+
+def test_pie(chart_data):
+    spec = chart_specs.blue_parity(chart_data)
+    chart = vega.to_vega_lite(spec)
+    assert [row['label'] for row in chart['data']['values']] == ['偶数', '奇数']
+    assert sum(row['value'] for row in chart['data']['values']) == chart_data.periods
+    assert chart['encoding']['theta']['field'] == 'value'
+    assert [mark['type'] for mark in _marks(chart)] == ['arc', 'text']
+
+
+def test_hist(chart_data):
+    spec = chart_specs.sum_histogram(chart_data)
+    chart = vega.to_vega_lite(spec)
+    values = chart['data']['values']
+    assert len(values) == len(spec['counts']) == len(spec['edges']) - 1
+    assert sum(row['count'] for row in values) == chart_data.periods
+    assert chart['mark']['type'] == 'bar'
+    assert chart['encoding']['x']['bin'] == {'binned': True} and chart['encoding']['x2']['field'] == 'end'
+
+
+def test_line(chart_data):
+    spec = chart_specs.slot_quantiles(chart_data, 0, 10)
+    chart = vega.to_vega_lite(spec)
+    assert len(chart['data']['values']) == len(spec['x']) * len(spec['series'])
+    assert len(chart['layer']) == len(spec['series'])
+    assert [layer['mark']['strokeDash'] for layer in chart['layer']] == [[6, 4], [1, 0], [6, 4]]
+    assert chart['encoding']['x']['type'] == 'temporal'
+    # NaN（窗口不足的期）转为None
+    assert any(row['y'] is None for row in chart['data']['values'])
+    assert 'legend' not in chart['encoding']['color']
+    assert vega.to_vega_lite(chart_specs.pool_trend(chart_data))['encoding']['color']['legend'] is None
+
+
+@pytest.mark.parametrize('rows', [0, 1])
+def test_tiny_frames(history, rows):
+    data = chart_specs.ChartData(history.iloc[:rows])
+    for build in dict(chart_specs.RANGE_CHARTS, **PARAM_CHARTS).values():
+        spec = build(data)
+        check_chart(spec, vega.to_vega_lite(spec))
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        vega.to_vega_lite({'kind': 'radar', 'title': 't', 'figsize': (8, 6)})